@@ -0,0 +1,85 @@
+"""Análisis por lotes sin Streamlit.
+
+Ejecuta sobre uno o muchos experimentos el mismo análisis de la página de Análisis
+Técnico (calidad, resumen estadístico, transformación logarítmica, estadísticas por
+grupo y bloque, RCBD) para todas sus métricas y escribe por experimento un
+``resultados.json``, tablas Parquet y figuras PNG, más un índice del lote con las
+métricas clave. Los experimentos salen de un JSON de especificaciones (``--config``)
+o de CSV con las mismas columnas (flags ``--metricas``, ``--bloque``, ...).
+
+Uso:
+    python analisis_lote.py --config config/experimentos.json
+    python analisis_lote.py extractos/ --salida reportes/2025-01-31 --workers 8
+    python analisis_lote.py "extractos/*.csv" --sin-figuras --metricas htls ventas --bloque management
+"""
+import argparse
+import glob
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from etl_data.especificacion import EspecificacionExperimento, cargar_especificaciones
+from etl_data.pipeline import analizar_lote
+
+
+def expandir_rutas(entradas: list) -> list:
+    """Archivos CSV a partir de rutas, directorios (``*.csv`` dentro) y patrones glob"""
+    rutas = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            rutas.extend(sorted(glob.glob(os.path.join(entrada, '*.csv'))))
+        elif any(caracter in entrada for caracter in '*?['):
+            rutas.extend(sorted(glob.glob(entrada, recursive=True)))
+        else:
+            rutas.append(entrada)
+    # Sin repetidos, conservando el orden
+    return list(dict.fromkeys(os.path.abspath(ruta) for ruta in rutas))
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporte de análisis por lotes (sin Streamlit)")
+    parser.add_argument('entradas', nargs='*', help="CSV, directorios o patrones glob")
+    parser.add_argument('--config', default=None, help="JSON de especificaciones de experimentos")
+    parser.add_argument('--salida', default='reportes', help="Directorio de resultados")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos en paralelo (por defecto, CPUs)")
+    parser.add_argument('--sin-figuras', action='store_true', help="No renderizar los PNG")
+    parser.add_argument('--sin-sidecar', action='store_true',
+                        help="No leer ni escribir el sidecar Parquet junto a cada CSV")
+    # Columnas de los CSV pasados como entradas (los de --config traen su propia especificación)
+    por_defecto = EspecificacionExperimento(nombre='', archivo='')
+    parser.add_argument('--metricas', nargs='+', default=list(por_defecto.metricas))
+    for clave in ('columna_id', 'bloque', 'tratamiento', 'nivel_tratamiento', 'nivel_control'):
+        parser.add_argument(f"--{clave.replace('_', '-')}", default=getattr(por_defecto, clave))
+    parser.add_argument('--memoria-mapeada', action='store_true',
+                        help="Servir las columnas desde un almacén .npy mapeado en memoria junto a cada CSV")
+    argumentos = parser.parse_args()
+
+    especificaciones = cargar_especificaciones(argumentos.config) if argumentos.config else []
+    for ruta in expandir_rutas(argumentos.entradas):
+        especificaciones.append(EspecificacionExperimento(
+            nombre=os.path.splitext(os.path.basename(ruta))[0], archivo=ruta, metricas=argumentos.metricas,
+            columna_id=argumentos.columna_id, bloque=argumentos.bloque, tratamiento=argumentos.tratamiento,
+            nivel_tratamiento=argumentos.nivel_tratamiento, nivel_control=argumentos.nivel_control,
+            memoria_mapeada=argumentos.memoria_mapeada
+        ))
+    if not especificaciones:
+        parser.error("no se encontraron experimentos (pasar CSV o --config)")
+
+    total = len(especificaciones)
+    terminados = []
+
+    def reportar(filas):
+        terminados.append(filas)
+        fila = filas[0]
+        estado = f"{fila['duracion_s']:.1f}s" if fila['estado'] == 'ok' else f"ERROR {fila['error']}"
+        print(f"[{len(terminados)}/{total}] {fila['experimento']}: {estado}", flush=True)
+
+    indice = analizar_lote(especificaciones, argumentos.salida, argumentos.workers, not argumentos.sin_figuras,
+                           not argumentos.sin_sidecar, reportar)
+    errores = indice.loc[indice['estado'] == 'error', 'experimento'].nunique()
+    print(f"{total - errores} experimentos analizados, {errores} con error. Índice en "
+          f"{os.path.join(argumentos.salida, 'indice.json')}")
+    sys.exit(1 if errores else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""Benchmarks de las funciones de ETL y de gráficos sobre datos sintéticos.
+
+Cada caso (función, tamaño) se ejecuta en un subproceso limpio para que el pico
+de memoria sea atribuible a esa función. Por caso se registran el tiempo de pared
+(mínimo de varias repeticiones), el pico de RSS, y bytes y bloques asignados según
+``tracemalloc`` (en una pasada aparte, para no contaminar el tiempo).
+
+Uso:
+    python benchmarks/ejecutar_benchmarks.py --tamanos 10000 100000 1000000 --salida resultados.json
+    python benchmarks/ejecutar_benchmarks.py --linea-base benchmarks/linea_base.json --tolerancia 0.25
+    python benchmarks/ejecutar_benchmarks.py --guardar-linea-base benchmarks/linea_base.json
+
+Con ``--linea-base`` el proceso termina con código 1 si algún caso empeora más
+que la tolerancia en tiempo o en memoria.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+DIRECTORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DIRECTORIO_BENCHMARKS, '..', 'src'))
+sys.path.insert(0, DIRECTORIO_BENCHMARKS)
+
+from generar_datos import ruta_datos
+
+DIRECTORIO_DATOS = os.path.join(DIRECTORIO_BENCHMARKS, '.datos')
+TAMANOS_POR_DEFECTO = [10_000, 100_000, 1_000_000]
+
+# Por debajo de este tiempo (s) la variación es ruido del sistema y no se reporta como regresión
+MIN_TIEMPO_COMPARABLE = 0.01
+
+
+def _preparar_log(df):
+    from etl_data.transformaciones import aplicar_transformacion_log
+    return aplicar_transformacion_log(df, 'htls')
+
+def _caso_carga(ruta, df):
+    from etl_data.eda import cargar_datos_test
+    return lambda: cargar_datos_test(ruta, usar_cache=False)
+
+def _caso_carga_cache(ruta, df):
+    from etl_data.eda import cargar_datos_test, limpiar_cache_datos
+    cargar_datos_test(ruta)
+    limpiar_cache_datos()
+    return lambda: (limpiar_cache_datos(), cargar_datos_test(ruta))
+
+def _caso_resumen(ruta, df):
+    from etl_data.eda import obtener_resumen_estadistico
+    return lambda: obtener_resumen_estadistico(df, 'htls')
+
+def _caso_duplicados(ruta, df):
+    from etl_data.eda import verificar_duplicados
+    return lambda: verificar_duplicados(df, 'client_id')
+
+def _caso_perfil_calidad(ruta, df):
+    from etl_data.eda import perfilar_calidad
+    return lambda: perfilar_calidad(df, 'client_id', ['management', 'group'])
+
+def _caso_transformacion_log(ruta, df):
+    from etl_data.transformaciones import aplicar_transformacion_log
+    # Copia superficial nueva en cada llamada: el resultado se memoriza por DataFrame de origen
+    return lambda: aplicar_transformacion_log(df.copy(deep=False), 'htls')
+
+def _caso_comparativas(ruta, df):
+    from etl_data.transformaciones import obtener_estadisticas_comparativas
+    df_log = _preparar_log(df)
+    return lambda: obtener_estadisticas_comparativas(df_log, 'htls', 'htls_log')
+
+def _caso_rcbd(ruta, df):
+    from etl_data.rcbd import anova_rcbd
+    df_log = _preparar_log(df)
+    return lambda: anova_rcbd(df_log, 'htls_log')
+
+def _caso_graficos_antes_despues(ruta, df):
+    import matplotlib
+    matplotlib.use('Agg')
+    from utils.cache import figura_a_bytes
+    from visual_tools.figuras import crear_graficos_antes_despues
+    df_log = _preparar_log(df)
+    return lambda: figura_a_bytes(crear_graficos_antes_despues(df_log, 'htls', 'htls_log'))
+
+def _caso_boxplots(ruta, df):
+    import matplotlib
+    matplotlib.use('Agg')
+    from utils.cache import figura_a_bytes
+    from visual_tools.figuras import crear_boxplots_categoricas
+    df_log = _preparar_log(df)
+    return lambda: figura_a_bytes(crear_boxplots_categoricas(df_log, 'htls_log', ['group', 'management']))
+
+# Nombre del caso -> constructor que recibe (ruta CSV, DataFrame cargado) y devuelve la llamada a medir
+CASOS = {
+    'cargar_datos_test': _caso_carga,
+    'cargar_datos_test_sidecar': _caso_carga_cache,
+    'obtener_resumen_estadistico': _caso_resumen,
+    'verificar_duplicados': _caso_duplicados,
+    'perfilar_calidad': _caso_perfil_calidad,
+    'aplicar_transformacion_log': _caso_transformacion_log,
+    'obtener_estadisticas_comparativas': _caso_comparativas,
+    'anova_rcbd': _caso_rcbd,
+    'crear_graficos_antes_despues': _caso_graficos_antes_despues,
+    'crear_boxplots_categoricas': _caso_boxplots
+}
+
+
+def _memoria_proceso():
+    """(RSS actual, pico de RSS) en MB; en Linux el pico puede reiniciarse vía clear_refs"""
+    try:
+        with open('/proc/self/status') as archivo:
+            campos = dict(linea.split(':', 1) for linea in archivo)
+        return int(campos['VmRSS'].split()[0]) / 1024, int(campos['VmHWM'].split()[0]) / 1024
+    except (OSError, KeyError):
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        pico = pico / 1024 ** 2 if sys.platform == 'darwin' else pico / 1024
+        return pico, pico
+
+def _reiniciar_pico_memoria() -> bool:
+    try:
+        with open('/proc/self/clear_refs', 'w') as archivo:
+            archivo.write('5')
+        return True
+    except OSError:
+        return False
+
+def medir_caso(nombre: str, ruta: str, repeticiones: int) -> dict:
+    """Mide un caso en el proceso actual (se invoca desde el subproceso del caso)"""
+    from etl_data.eda import cargar_datos_test
+
+    df = cargar_datos_test(ruta, usar_cache=False)
+    llamada = CASOS[nombre](ruta, df)
+
+    rss_inicial, _ = _memoria_proceso()
+    pico_aislado = _reiniciar_pico_memoria()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        llamada()
+        tiempos.append(time.perf_counter() - inicio)
+    _, rss_pico = _memoria_proceso()
+
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    llamada()
+    despues = tracemalloc.take_snapshot()
+    _, pico_tracemalloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    diferencias = despues.compare_to(antes, 'lineno')
+
+    return {
+        'funcion': nombre,
+        'filas': len(df),
+        'tiempo_s': min(tiempos),
+        'tiempo_mediana_s': sorted(tiempos)[len(tiempos) // 2],
+        'rss_pico_mb': rss_pico,
+        'rss_delta_mb': rss_pico - rss_inicial if pico_aislado else None,
+        'tracemalloc_pico_mb': pico_tracemalloc / 1024 ** 2,
+        'bloques_asignados': sum(d.count_diff for d in diferencias if d.count_diff > 0)
+    }
+
+def ejecutar_caso_en_subproceso(nombre: str, ruta: str, repeticiones: int) -> dict:
+    """Ejecuta un caso en un intérprete nuevo y devuelve su resultado"""
+    salida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--caso', nombre, '--ruta', ruta,
+         '--repeticiones', str(repeticiones)],
+        capture_output=True, text=True, check=False
+    )
+    if salida.returncode != 0:
+        return {'funcion': nombre, 'error': salida.stderr.strip().splitlines()[-1:]}
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+def comparar_con_linea_base(resultados: list, linea_base: list, tolerancia: float) -> list:
+    """Lista de regresiones: casos cuyo tiempo o pico de memoria superan la línea base más la tolerancia"""
+    base = {(r['funcion'], r['filas']): r for r in linea_base if 'error' not in r}
+    regresiones = []
+    for resultado in resultados:
+        referencia = base.get((resultado.get('funcion'), resultado.get('filas')))
+        if referencia is None or 'error' in resultado:
+            continue
+        for metrica in ('tiempo_s', 'rss_pico_mb', 'tracemalloc_pico_mb'):
+            actual, previo = resultado.get(metrica), referencia.get(metrica)
+            if metrica == 'tiempo_s' and actual is not None:
+                actual, previo = max(actual, MIN_TIEMPO_COMPARABLE), max(previo, MIN_TIEMPO_COMPARABLE)
+            if actual is not None and previo and actual > previo * (1 + tolerancia):
+                regresiones.append({
+                    'funcion': resultado['funcion'],
+                    'filas': resultado['filas'],
+                    'metrica': metrica,
+                    'linea_base': previo,
+                    'actual': actual,
+                    'razon': actual / previo
+                })
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de ETL y gráficos con datos sintéticos")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=TAMANOS_POR_DEFECTO)
+    parser.add_argument('--funciones', nargs='+', choices=sorted(CASOS), default=sorted(CASOS))
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--salida', default=None, help="Archivo JSON con los resultados")
+    parser.add_argument('--linea-base', default=None, help="JSON de referencia contra el cual comparar")
+    parser.add_argument('--guardar-linea-base', default=None, help="Guarda los resultados como nueva línea base")
+    parser.add_argument('--tolerancia', type=float, default=0.25)
+    parser.add_argument('--caso', help=argparse.SUPPRESS)
+    parser.add_argument('--ruta', help=argparse.SUPPRESS)
+    argumentos = parser.parse_args()
+
+    if argumentos.caso:
+        print(json.dumps(medir_caso(argumentos.caso, argumentos.ruta, argumentos.repeticiones)))
+        return
+
+    resultados = []
+    for n_filas in argumentos.tamanos:
+        ruta = ruta_datos(n_filas, DIRECTORIO_DATOS)
+        for nombre in argumentos.funciones:
+            resultado = ejecutar_caso_en_subproceso(nombre, ruta, argumentos.repeticiones)
+            resultados.append(resultado)
+            if 'error' in resultado:
+                print(f"{nombre:<36} {n_filas:>12,}  ERROR {resultado['error']}")
+            else:
+                print(f"{nombre:<36} {n_filas:>12,}  {resultado['tiempo_s']:>9.4f}s  "
+                      f"{resultado['rss_pico_mb']:>9.1f} MB RSS  {resultado['bloques_asignados']:>9,} bloques")
+
+    informe = {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'resultados': resultados
+    }
+    for destino in (argumentos.salida, argumentos.guardar_linea_base):
+        if destino:
+            with open(destino, 'w', encoding='utf-8') as archivo:
+                json.dump(informe, archivo, indent=2)
+
+    if argumentos.linea_base:
+        with open(argumentos.linea_base, encoding='utf-8') as archivo:
+            linea_base = json.load(archivo)['resultados']
+        regresiones = comparar_con_linea_base(resultados, linea_base, argumentos.tolerancia)
+        for r in regresiones:
+            print(f"REGRESIÓN {r['funcion']} ({r['filas']:,} filas) {r['metrica']}: "
+                  f"{r['linea_base']:.4g} -> {r['actual']:.4g} (x{r['razon']:.2f})")
+        if regresiones:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
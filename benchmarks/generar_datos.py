@@ -0,0 +1,71 @@
+"""Generador de datos sintéticos de experimento para los benchmarks.
+
+Produce columnas ``client_id``, ``management``, ``group`` y ``htls`` con la misma
+forma que ``data/raw/test.csv``: bloques con nivel propio, un efecto multiplicativo
+pequeño del grupo Test y una respuesta lognormal con cola pesada (una fracción de
+observaciones con cola de Pareto), para reproducir la asimetría y los outliers
+que se ven en los datos reales.
+
+Uso:
+    python benchmarks/generar_datos.py 1000000 benchmarks/.datos/experimento_1000000.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+BLOQUES = ['Gerencia A', 'Gerencia B', 'Gerencia C', 'Gerencia D', 'Gerencia E']
+
+# Efecto de cada bloque en escala log (fijo para que todos los bloques de escritura coincidan)
+NIVELES_BLOQUE = np.array([0.0, 0.3, -0.2, 0.5, 0.1])
+
+# Filas por bloque de escritura: acota la memoria al generar 50M de filas
+FILAS_POR_ESCRITURA = 2_000_000
+
+def generar_datos_experimento(n_filas: int, semilla: int = 0, efecto_log: float = 0.05,
+                              sigma: float = 1.1, fraccion_cola: float = 0.01,
+                              desplazamiento_id: int = 0) -> pd.DataFrame:
+    """Genera ``n_filas`` observaciones sintéticas de un experimento RCBD"""
+    rng = np.random.default_rng(semilla)
+
+    codigos_bloque = rng.integers(0, len(BLOQUES), n_filas)
+    es_test = rng.random(n_filas) < 0.5
+    log_htls = 3.0 + NIVELES_BLOQUE[codigos_bloque] + efecto_log * es_test + rng.normal(0, sigma, n_filas)
+
+    # Cola pesada: una fracción de clientes con multiplicador Pareto
+    en_cola = rng.random(n_filas) < fraccion_cola
+    log_htls[en_cola] += np.log1p(rng.pareto(1.5, np.count_nonzero(en_cola)))
+
+    return pd.DataFrame({
+        'client_id': np.arange(desplazamiento_id, desplazamiento_id + n_filas, dtype=np.int64),
+        'management': pd.Categorical.from_codes(codigos_bloque, BLOQUES),
+        'group': pd.Categorical.from_codes(es_test.astype(np.int8), ['Control', 'Test']),
+        'htls': np.exp(log_htls).astype(np.float32)
+    })
+
+def escribir_datos_experimento(n_filas: int, ruta: str, semilla: int = 0) -> str:
+    """Escribe el CSV sintético por bloques para no materializar todas las filas a la vez"""
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    ruta_temporal = f"{ruta}.tmp"
+    for i, inicio in enumerate(range(0, n_filas, FILAS_POR_ESCRITURA)):
+        n_bloque = min(FILAS_POR_ESCRITURA, n_filas - inicio)
+        bloque = generar_datos_experimento(n_bloque, semilla=semilla + i, desplazamiento_id=inicio)
+        bloque.to_csv(ruta_temporal, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    os.replace(ruta_temporal, ruta)
+    return ruta
+
+def ruta_datos(n_filas: int, directorio: str) -> str:
+    """Ruta del CSV sintético de ``n_filas`` (se genera solo si no existe)"""
+    ruta = os.path.join(directorio, f"experimento_{n_filas}.csv")
+    if not os.path.exists(ruta):
+        escribir_datos_experimento(n_filas, ruta)
+    return ruta
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Genera un CSV sintético de experimento")
+    parser.add_argument('n_filas', type=int)
+    parser.add_argument('ruta')
+    parser.add_argument('--semilla', type=int, default=0)
+    argumentos = parser.parse_args()
+    escribir_datos_experimento(argumentos.n_filas, argumentos.ruta, argumentos.semilla)
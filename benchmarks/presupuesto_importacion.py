@@ -0,0 +1,91 @@
+"""Presupuesto de tiempo de importación de la página de análisis.
+
+Extrae los imports de nivel de módulo de la página (con ``ast``, sin ejecutarla),
+los importa en un intérprete nuevo con ``-X importtime`` y verifica que:
+
+- ningún módulo pesado de gráficos o estadística (matplotlib, seaborn, scipy, ...)
+  se cargue antes de que una sección lo necesite, y
+- el tiempo acumulado de importación no supere el presupuesto.
+
+Uso:
+    python benchmarks/presupuesto_importacion.py --presupuesto-ms 1500
+    python benchmarks/presupuesto_importacion.py --archivo Inicio.py --presupuesto-ms 400
+
+Termina con código 1 si se viola el presupuesto o se carga un módulo prohibido.
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+DIRECTORIO_RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+PAGINA_ANALISIS = os.path.join(DIRECTORIO_RAIZ, 'pages', '01_📊_Analisis_Tecnico.py')
+
+# Módulos que la primera pintura (sección de calidad) no debe pagar
+MODULOS_PROHIBIDOS = ['matplotlib', 'seaborn', 'scipy', 'sklearn', 'statsmodels']
+
+PRESUPUESTO_MS = 1500
+
+
+def codigo_importaciones(ruta: str) -> str:
+    """Código con solo los imports de nivel de módulo del archivo (y ``src`` en el path)"""
+    with open(ruta, encoding='utf-8') as archivo:
+        arbol = ast.parse(archivo.read())
+    importaciones = [nodo for nodo in arbol.body if isinstance(nodo, (ast.Import, ast.ImportFrom))]
+    encabezado = f"import sys; sys.path.insert(0, {os.path.join(DIRECTORIO_RAIZ, 'src')!r})\n"
+    return encabezado + '\n'.join(ast.unparse(nodo) for nodo in importaciones)
+
+def medir_importaciones(codigo: str) -> dict:
+    """Ejecuta ``codigo`` con ``-X importtime``; devuelve el tiempo acumulado y los módulos cargados"""
+    salida = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                            capture_output=True, text=True, check=True, cwd=DIRECTORIO_RAIZ)
+    acumulado_us = 0
+    modulos = {}
+    for linea in salida.stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, acumulado, nombre = linea[len('import time:'):].split('|')
+        modulos[nombre.strip()] = int(acumulado)
+        # Solo los módulos de primer nivel (sin sangría) suman al total
+        if not nombre[1:].startswith(' '):
+            acumulado_us += int(acumulado)
+    return {'total_ms': acumulado_us / 1000, 'modulos': modulos}
+
+def verificar_presupuesto(archivo: str = PAGINA_ANALISIS, presupuesto_ms: float = PRESUPUESTO_MS,
+                          repeticiones: int = 3) -> dict:
+    """Mide la importación de ``archivo`` y devuelve la medición, los módulos prohibidos y las fallas"""
+    codigo = codigo_importaciones(archivo)
+    # El mínimo de varias corridas descuenta la caché fría del sistema de archivos
+    mediciones = [medir_importaciones(codigo) for _ in range(repeticiones)]
+    medicion = min(mediciones, key=lambda m: m['total_ms'])
+
+    raices = {nombre.split('.')[0] for nombre in medicion['modulos']}
+    prohibidos = sorted(raices & set(MODULOS_PROHIBIDOS))
+    fallas = []
+    if prohibidos:
+        fallas.append(f"módulos pesados importados al cargar la página: {', '.join(prohibidos)}")
+    if medicion['total_ms'] > presupuesto_ms:
+        fallas.append(f"{medicion['total_ms']:.0f} ms supera el presupuesto de {presupuesto_ms:.0f} ms")
+    return {**medicion, 'prohibidos': prohibidos, 'fallas': fallas}
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica el presupuesto de importación de una página")
+    parser.add_argument('--archivo', default=PAGINA_ANALISIS)
+    parser.add_argument('--presupuesto-ms', type=float, default=PRESUPUESTO_MS)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--mas-lentos', type=int, default=10, help="Módulos más lentos a listar")
+    argumentos = parser.parse_args()
+
+    resultado = verificar_presupuesto(argumentos.archivo, argumentos.presupuesto_ms, argumentos.repeticiones)
+    lentos = sorted(resultado['modulos'].items(), key=lambda item: -item[1])
+    print(f"Importación de {os.path.basename(argumentos.archivo)}: {resultado['total_ms']:.0f} ms "
+          f"(presupuesto {argumentos.presupuesto_ms:.0f} ms)")
+    for nombre, acumulado in lentos[:argumentos.mas_lentos]:
+        print(f"  {acumulado / 1000:>8.1f} ms  {nombre}")
+    for falla in resultado['fallas']:
+        print(f"FALLA: {falla}")
+    sys.exit(1 if resultado['fallas'] else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Mirada diaria a un experimento en curso (análisis secuencial).
+
+Incorpora al monitor del experimento las filas nuevas de un extracto (los IDs ya
+vistos se descartan) y registra una mirada de la secuencia de confianza del efecto
+en log para cada métrica. Cada ejecución cuesta O(filas nuevas): el historial vive
+en los estadísticos por celda del monitor (``directorio_monitor`` de la
+especificación). La página de Análisis Técnico muestra el límite y la decisión.
+
+Uso:
+    python mirada_diaria.py extractos/2025-02-01.csv --experimento "Prueba técnica (HTLS)"
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from etl_data.eda import cargar_datos
+from etl_data.especificacion import ARCHIVO_EXPERIMENTOS, cargar_especificaciones
+from etl_data.secuencial import TAU_MEZCLA
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mirada secuencial diaria a un experimento en curso")
+    parser.add_argument('lote', help="CSV con las filas nuevas (puede repetir filas de días anteriores)")
+    parser.add_argument('--config', default=ARCHIVO_EXPERIMENTOS, help="JSON de especificaciones de experimentos")
+    parser.add_argument('--experimento', default=None, help="Nombre del experimento (por defecto, el primero)")
+    parser.add_argument('--alpha', type=float, default=0.05, help="Solo se usa en la primera mirada")
+    parser.add_argument('--tau', type=float, default=TAU_MEZCLA, help="Solo se usa en la primera mirada")
+    argumentos = parser.parse_args()
+
+    especificaciones = cargar_especificaciones(argumentos.config)
+    nombres = [e.nombre for e in especificaciones]
+    nombre = argumentos.experimento or nombres[0]
+    if nombre not in nombres:
+        parser.error(f"experimento desconocido: {nombre} (disponibles: {', '.join(nombres)})")
+    especificacion = especificaciones[nombres.index(nombre)]
+    if not especificacion.directorio_monitor:
+        parser.error(f"el experimento '{nombre}' no define directorio_monitor")
+
+    # Extracto del día: se lee sin sidecar ni caché, solo se usa una vez
+    df_lote = cargar_datos(argumentos.lote, especificacion.tipos_columnas(), usar_cache=False,
+                           columnas=especificacion.columnas)
+    for metrica in especificacion.metricas:
+        monitor = especificacion.abrir_monitor(metrica)
+        ingreso = monitor.actualizar(df_lote, guardar=False)
+        estado = monitor.mirar(argumentos.alpha, argumentos.tau)
+        print(f"{metrica}: {ingreso['filas_aceptadas']:,} filas nuevas, mirada {estado['mirada']}, "
+              f"efecto {estado['estimacion']:+.4f} [{estado['ic_inferior']:+.4f}, {estado['ic_superior']:+.4f}], "
+              f"p siempre válido {estado['p_valor']:.4g} -> {estado['decision']}")
+
+if __name__ == '__main__':
+    main()
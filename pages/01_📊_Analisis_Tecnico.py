@@ -7,21 +7,45 @@ import os
 # Agregar directorio src al path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from etl_data.eda import (
-    cargar_datos_test, verificar_valores_faltantes, verificar_duplicados, 
-    obtener_tipos_datos, obtener_resumen_categoricas, obtener_resumen_estadistico
-)
-from etl_data.transformaciones import aplicar_transformacion_log, obtener_estadisticas_comparativas
+from etl_data.eda import perfilar_calidad
+from etl_data.compactacion import reporte_memoria
+from etl_data.especificacion import cargar_especificaciones, cargar_datos_experimento, cargar_datos_pre
+from etl_data.pipeline import analizar_experimento
+from etl_data.transformaciones import agregar_transformaciones
+from etl_data.inferencia import verificacion_no_parametrica
+from etl_data.supuestos import N_MUESTRA_INTERACTIVA, diagnosticar_supuestos
+from etl_data.potencia import curvas_potencia, parametros_simulacion
+from etl_data.efectos_cuantiles import efectos_cuantiles
 from visual_tools.streamlit_plots import (
     mostrar_resumen_valores_faltantes, mostrar_resumen_duplicados,
     mostrar_resumen_estadistico, mostrar_resumen_categoricas,
-    crear_graficos_antes_despues, mostrar_comparacion_estadisticas_simple,
-    crear_boxplots_categoricas
+    mostrar_comparacion_estadisticas_simple, mostrar_tabla_anova, mostrar_comparacion_modelos,
+    mostrar_inferencia_no_parametrica, mostrar_panel_rendimiento, mostrar_reporte_memoria, mostrar_tarea,
+    mostrar_supuestos, mostrar_analisis_secuencial, mostrar_cuped, mostrar_curvas_potencia,
+    mostrar_efectos_cuantiles
 )
+from utils.cache import cacheado, cachear_figura, huella_dataframe
+from utils.instrumentacion import iniciar_ejecucion, finalizar_ejecucion, medir
+from utils.tareas import GestorTareas
+
+# Versiones cacheadas: la clave es la huella de los datos más los parámetros,
+# así que un cambio de pestaña o de sección con los mismos datos es un acierto de caché
+perfilar_calidad_cache = cacheado(perfilar_calidad)
+# Todas las métricas del experimento en una sola pasada (resúmenes, transformaciones, grupos y RCBD)
+analizar_experimento_cache = cacheado(analizar_experimento)
+verificacion_no_parametrica_cache = cacheado(verificacion_no_parametrica)
+diagnosticar_supuestos_cache = cacheado(diagnosticar_supuestos)
+curvas_potencia_cache = cacheado(curvas_potencia)
+efectos_cuantiles_cache = cacheado(efectos_cuantiles)
 
 # Configuración de la página
 st.set_page_config(page_title="Análisis Técnico", page_icon="📊", layout="wide")
 
+# Panel de rendimiento oculto: se habilita agregando ?rendimiento=1 a la URL
+panel_rendimiento = st.query_params.get('rendimiento') == '1'
+if panel_rendimiento:
+    iniciar_ejecucion(perfilar=st.session_state.pop('perfilar_siguiente', False))
+
 st.title("📊 Análisis Técnico - Diseño Experimental")
 st.markdown("---")
 
@@ -29,9 +53,42 @@ st.markdown("---")
 st.sidebar.title("Navegación")
 seccion_analisis = st.sidebar.selectbox(
     "Seleccionar sección:",
-    ["Calidad de Datos", "Análisis Exploratorio", "Análisis RCBD", "Comparación de Modelos"]
+    ["Calidad de Datos", "Análisis Exploratorio", "Análisis RCBD", "Comparación de Modelos", "Análisis Secuencial",
+     "Potencia y Tamaño de Muestra"]
 )
 
+# Experimento y métrica a analizar (config/experimentos.json)
+especificaciones = cargar_especificaciones()
+nombre_experimento = st.sidebar.selectbox("Experimento:", [e.nombre for e in especificaciones])
+especificacion = next(e for e in especificaciones if e.nombre == nombre_experimento)
+metrica = st.sidebar.selectbox("Métrica:", especificacion.metricas)
+columna_log = especificacion.columna_log(metrica)
+etiqueta = metrica.upper()
+etiqueta_log = f"log({etiqueta})"
+
+# Figuras y remuestreos corren en segundo plano; al cambiar de sección, experimento o
+# métrica se cancelan los que todavía estaban en cola. Las claves de las tareas llevan
+# la huella de los datos para no mostrar resultados de un CSV anterior
+gestor_tareas = st.session_state.setdefault('tareas', GestorTareas())
+gestor_tareas.entrar_ambito((seccion_analisis, especificacion.nombre, metrica))
+
+def cargar_experimento():
+    """Carga las columnas del experimento seleccionado o detiene la página con el error"""
+    try:
+        return cargar_datos_experimento(especificacion)
+    except Exception as e:
+        st.error(f"❌ Error al cargar datos: {str(e)}")
+        st.stop()
+
+def analizar(df):
+    """Análisis de todas las métricas, con el ajuste CUPED si el experimento define periodo previo"""
+    try:
+        df_pre = cargar_datos_pre(especificacion)
+    except Exception as e:
+        st.warning(f"⚠️ No se pudo cargar el periodo previo ({especificacion.archivo_pre}): {str(e)}")
+        df_pre = None
+    return analizar_experimento_cache(df, especificacion, df_pre=df_pre)
+
 # =======================================
 # SECCIÓN: CALIDAD DE DATOS
 # =======================================
@@ -40,35 +97,36 @@ if seccion_analisis == "Calidad de Datos":
     st.header("🔍 Verificación de Calidad de Datos")
     
     # Cargar datos
-    try:
-        df_test = cargar_datos_test('data/raw/test.csv')
-        st.success(f"✅ Datos cargados exitosamente: {df_test.shape[0]:,} filas, {df_test.shape[1]} columnas")
-    except Exception as e:
-        st.error(f"❌ Error al cargar datos: {str(e)}")
-        st.stop()
+    df_test = cargar_experimento()
+    st.success(f"✅ Datos cargados exitosamente: {df_test.shape[0]:,} filas, {df_test.shape[1]} columnas")
+    
+    # Perfilado de calidad en una sola pasada por columna
+    with medir("Calidad: perfilado"):
+        perfil_calidad = perfilar_calidad_cache(df_test, especificacion.columna_id, especificacion.categoricas)
     
     # Crear tabs para organizar el análisis
     tab1, tab2, tab3, tab4 = st.tabs(["Valores Faltantes", "Duplicados", "Tipos de Datos", "Variables Categóricas"])
     
-    with tab1:
+    with tab1, medir("Calidad: valores faltantes"):
         st.subheader("📋 Verificación de Valores Faltantes")
-        info_faltantes = verificar_valores_faltantes(df_test)
-        mostrar_resumen_valores_faltantes(info_faltantes)
+        mostrar_resumen_valores_faltantes(perfil_calidad['faltantes'])
     
-    with tab2:
+    with tab2, medir("Calidad: duplicados"):
         st.subheader("🔄 Verificación de Duplicados")
-        info_duplicados = verificar_duplicados(df_test, 'client_id')
-        mostrar_resumen_duplicados(info_duplicados, 'client_id')
+        mostrar_resumen_duplicados(perfil_calidad['duplicados'], especificacion.columna_id)
     
-    with tab3:
+    with tab3, medir("Calidad: tipos de datos"):
         st.subheader("📝 Tipos de Datos")
-        tipos_datos = obtener_tipos_datos(df_test)
-        st.dataframe(pd.DataFrame({'Columna': tipos_datos.index, 'Tipo': tipos_datos.values}), hide_index=True)
+        tipos_datos = perfil_calidad['tipos_datos']
+        st.dataframe(pd.DataFrame({'Columna': tipos_datos.index, 'Tipo': tipos_datos.astype(str).values}), hide_index=True)
+        
+        # Memoria de la representación compacta frente a la que infiere pd.read_csv
+        st.subheader("💾 Uso de Memoria")
+        mostrar_reporte_memoria(reporte_memoria(df_test))
     
-    with tab4:
+    with tab4, medir("Calidad: variables categóricas"):
         st.subheader("🏷️ Variables Categóricas")
-        info_categoricas = obtener_resumen_categoricas(df_test, ['management', 'group'])
-        mostrar_resumen_categoricas(info_categoricas)
+        mostrar_resumen_categoricas(perfil_calidad['categoricas'])
 
 # =======================================
 # SECCIÓN: ANÁLISIS EXPLORATORIO
@@ -77,20 +135,25 @@ if seccion_analisis == "Calidad de Datos":
 elif seccion_analisis == "Análisis Exploratorio":
     st.header("📈 Análisis Exploratorio de Datos")
     
-    # Cargar datos
-    try:
-        df_test = cargar_datos_test('data/raw/test.csv')
-    except Exception as e:
-        st.error(f"❌ Error al cargar datos: {str(e)}")
-        st.stop()
+    # Cargar datos y analizar todas las métricas del experimento
+    df_test = cargar_experimento()
+    huella_datos = huella_dataframe(df_test)
+    with medir("Exploratorio: análisis del experimento"):
+        resultado = analizar(df_test)
+        df_transformado, infos_transformacion = agregar_transformaciones(df_test, list(especificacion.metricas), 'log')
+    
+    # matplotlib se importa solo en esta sección (es la única que dibuja figuras)
+    from visual_tools.figuras import crear_graficos_antes_despues, crear_boxplots_categoricas
+    graficos_antes_despues_png = cachear_figura(crear_graficos_antes_despues)
+    boxplots_categoricas_png = cachear_figura(crear_boxplots_categoricas)
     
     # Crear tabs
     tab1, tab2, tab3 = st.tabs(["Datos Originales", "Transformación Logarítmica", "Análisis Gráfico"])
     
-    with tab1:
-        # Análisis estadístico de HTLS original
-        info_estadisticas = obtener_resumen_estadistico(df_test, 'htls')
-        mostrar_resumen_estadistico(info_estadisticas, 'htls')
+    with tab1, medir("Exploratorio: datos originales"):
+        # Análisis estadístico de la métrica original
+        info_estadisticas = resultado['resumenes'][metrica]
+        mostrar_resumen_estadistico(info_estadisticas, metrica)
         
         # Resumen de hallazgos
         st.markdown("---")
@@ -117,28 +180,32 @@ elif seccion_analisis == "Análisis Exploratorio":
         else:
             st.success(f"{icono_alerta} **Distribución {texto_alerta}**")
         
-        st.markdown("""
+        no_positivos = info_estadisticas['valores_negativos'] + info_estadisticas['valores_cero']
+        st.markdown(f"""
         ### Resumen de Hallazgos
         
-        La variable HTLS presenta una distribución extremadamente asimétrica (asimetría = 16.2) con alta variabilidad (CV = 229.7%) y 921 outliers, violando severamente los supuestos de normalidad y homoscedasticidad requeridos para ANOVA. La ausencia de valores negativos o cero permite implementar transformación logarítmica como estrategia correctiva obligatoria. 
+        La variable {etiqueta} presenta asimetría = {info_estadisticas['asimetria']:.1f}, variabilidad CV = {info_estadisticas['cv_porcentaje']:.1f}% y {info_estadisticas['outliers_superiores']:,} outliers; con asimetría alta se violan los supuestos de normalidad y homoscedasticidad requeridos para ANOVA. {"La ausencia de valores negativos o cero permite implementar la transformación logarítmica como estrategia correctiva." if no_positivos == 0 else f"Hay {no_positivos:,} valores negativos o cero, que quedan fuera de la transformación logarítmica."}
         
-        **Decisión:** Proceder con log(HTLS) para el análisis, validando posteriormente los supuestos mediante pruebas de normalidad y homoscedasticidad, con métodos no paramétricos como contingencia si persisten las violaciones.
+        **Decisión:** Proceder con {etiqueta_log} para el análisis, validando posteriormente los supuestos mediante pruebas de normalidad y homoscedasticidad, con métodos no paramétricos como contingencia si persisten las violaciones.
         """)
     
-    with tab2:
+    with tab2, medir("Exploratorio: transformación logarítmica"):
         st.subheader("🔄 Transformación Logarítmica")
         
-        # Aplicar transformación
-        with st.spinner("Aplicando transformación logarítmica..."):
-            df_transformado = aplicar_transformacion_log(df_test, 'htls')
-            estadisticas_comparativas = obtener_estadisticas_comparativas(df_transformado, 'htls', 'htls_log')
+        # Transformación y comparación ya calculadas para todas las métricas
+        info_transformacion = infos_transformacion[metrica]
+        estadisticas_comparativas = resultado['comparaciones'][metrica]
         
         st.success("✅ Transformación logarítmica aplicada exitosamente")
+        if info_transformacion['invalidos'] > 0:
+            st.warning(f"⚠️ {info_transformacion['invalidos']:,} valores no positivos o faltantes quedaron como NaN")
         
         # Mostrar gráficos comparativos
         st.subheader("📊 Comparación Visual: Antes vs Después")
-        fig_comparacion = crear_graficos_antes_despues(df_transformado, 'htls', 'htls_log')
-        st.pyplot(fig_comparacion)
+        futuro = gestor_tareas.enviar(('antes_despues', huella_datos, metrica), graficos_antes_despues_png,
+                                      df_transformado, metrica, columna_log,
+                                      columna_grupo=especificacion.tratamiento)
+        mostrar_tarea(futuro, st.image, "Generando gráficos comparativos...")
         
         # Mostrar estadísticas comparativas
         mostrar_comparacion_estadisticas_simple(estadisticas_comparativas)
@@ -159,41 +226,32 @@ elif seccion_analisis == "Análisis Exploratorio":
         st.markdown(f"""
         ### 📋 Conclusión de Transformación
         
-        La transformación logarítmica mejora significativamente la distribución de HTLS:
+        La transformación logarítmica mejora significativamente la distribución de {etiqueta}:
         - **Asimetría reducida** de {estadisticas_comparativas['original']['asimetria']:.2f} a {estadisticas_comparativas['transformado']['asimetria']:.2f}
         - **Distribución más simétrica** para análisis ANOVA
         - **Todas las observaciones preservadas**
         
-        **Decisión Final:** Utilizar log(HTLS) para todos los análisis estadísticos posteriores.
+        **Decisión Final:** Utilizar {etiqueta_log} para todos los análisis estadísticos posteriores.
         """)
     
-    with tab3:
+    with tab3, medir("Exploratorio: análisis gráfico"):
         st.subheader("📊 Análisis Gráfico por Variables Categóricas")
         
         # Crear selectbox para elegir qué datos usar
         tipo_datos = st.selectbox(
             "Selecciona los datos a visualizar:",
-            ["Datos Originales (HTLS)", "Datos Transformados (log-HTLS)"],
+            [f"Datos Originales ({etiqueta})", f"Datos Transformados ({etiqueta_log})"],
             index=1
         )
-        
-        if tipo_datos == "Datos Originales (HTLS)":
-            variable_respuesta = 'htls'
-            df_analisis = df_test
-        else:
-            # Aplicar transformación si no existe
-            if 'htls_log' not in df_test.columns:
-                df_analisis = aplicar_transformacion_log(df_test, 'htls')
-            else:
-                df_analisis = df_test
-            variable_respuesta = 'htls_log'
+        variable_respuesta = metrica if tipo_datos == f"Datos Originales ({etiqueta})" else columna_log
         
         # Crear boxplots
         st.write("**Distribución de la variable respuesta por categorías:**")
-        variables_categoricas = ['group', 'management']
+        variables_categoricas = [especificacion.tratamiento, especificacion.bloque]
         
-        fig_boxplots = crear_boxplots_categoricas(df_analisis, variable_respuesta, variables_categoricas)
-        st.pyplot(fig_boxplots)
+        futuro = gestor_tareas.enviar(('boxplots', huella_datos, variable_respuesta), boxplots_categoricas_png,
+                                      df_transformado, variable_respuesta, variables_categoricas)
+        mostrar_tarea(futuro, st.image, "Generando boxplots...")
         
         # Mostrar estadísticas básicas por grupo
         st.subheader("📋 Estadísticas Descriptivas por Grupo")
@@ -201,44 +259,187 @@ elif seccion_analisis == "Análisis Exploratorio":
         col1, col2 = st.columns(2)
         
         with col1:
-            st.write("**Por Tratamiento (Group):**")
-            stats_group = df_analisis.groupby('group')[variable_respuesta].agg([
-                'count', 'mean', 'std', 'min', 'max'
-            ]).round(3)
-            st.dataframe(stats_group)
+            st.write(f"**Por Tratamiento ({especificacion.tratamiento}):**")
+            stats_group = resultado['estadisticas_tratamiento'][variable_respuesta]
+            st.dataframe(stats_group.round(3))
         
         with col2:
-            st.write("**Por Bloque (Management):**")
-            stats_management = df_analisis.groupby('management')[variable_respuesta].agg([
-                'count', 'mean', 'std', 'min', 'max'
-            ]).round(3)
-            st.dataframe(stats_management)
+            st.write(f"**Por Bloque ({especificacion.bloque}):**")
+            stats_management = resultado['estadisticas_bloque'][variable_respuesta]
+            st.dataframe(stats_management.round(3))
         
         # Interpretación rápida
         st.markdown("---")
         st.subheader("💡 Interpretación Visual")
         
         # Análisis automático básico
-        media_test = df_analisis[df_analisis['group'] == 'Test'][variable_respuesta].mean()
-        media_control = df_analisis[df_analisis['group'] == 'Control'][variable_respuesta].mean()
+        media_test = stats_group.loc[especificacion.nivel_tratamiento, 'mean']
+        media_control = stats_group.loc[especificacion.nivel_control, 'mean']
         diferencia = media_test - media_control
         
-  
-        
         st.info(f"""
-        **Observación inicial:** El grupo Test muestra una media ligeramente mayor que el de Control 
+        **Observación inicial:** El grupo {especificacion.nivel_tratamiento} muestra una media {"mayor" if diferencia > 0 else "menor"} que el de {especificacion.nivel_control} 
         (diferencia: {diferencia:.3f}).
         
-        **Variabilidad entre bloques (Management):** Se observan diferencias entre gerencias, 
+        **Variabilidad entre bloques ({especificacion.bloque}):** Se observan diferencias entre gerencias, 
         lo que justifica el uso del diseño de bloques para controlar esta fuente de variación.
         
         **Próximo paso:** Análisis ANOVA formal para determinar significancia estadística.
         """)
 
-elif seccion_analisis == "Análisis RCBD":
-    st.header("🧪 Análisis RCBD")
-    st.info("Sección en desarrollo...")
+elif seccion_analisis in ["Análisis RCBD", "Comparación de Modelos"]:
+    # Cargar datos y ajustar el modelo RCBD sobre el log de cada métrica
+    df_test = cargar_experimento()
+    huella_datos = huella_dataframe(df_test)
+    
+    with medir("RCBD: ajuste del modelo"):
+        resultado_experimento = analizar(df_test)
+        resultado_rcbd = resultado_experimento['rcbd'][metrica]
+    if 'error' in resultado_rcbd:
+        st.error(f"❌ No se pudo ajustar el modelo RCBD para {etiqueta}: {resultado_rcbd['error']}")
+        st.stop()
+    
+    if seccion_analisis == "Análisis RCBD":
+        st.header("🧪 Análisis RCBD")
+        st.markdown(f"**Modelo:** {etiqueta_log} = μ + Bloque ({especificacion.bloque}) + "
+                    f"Tratamiento ({especificacion.tratamiento}) + ε")
+        mostrar_tabla_anova(resultado_rcbd, etiqueta_log)
+        
+        efecto = resultado_rcbd['efecto_tratamiento']
+        cambio_porcentual = (np.exp(efecto['estimacion']) - 1) * 100
+        st.markdown("---")
+        st.subheader("💡 Interpretación")
+        st.info(f"""
+        En escala original, el grupo {especificacion.nivel_tratamiento} presenta un {etiqueta} **{cambio_porcentual:+.1f}%** respecto a {especificacion.nivel_control} 
+        (IC: {(np.exp(efecto['ic_inferior']) - 1) * 100:+.1f}% a {(np.exp(efecto['ic_superior']) - 1) * 100:+.1f}%), 
+        controlando por {especificacion.bloque}.
+        """)
+        
+        # Ajuste por la covariable del periodo previo (solo si el experimento la define)
+        resultado_cuped = resultado_experimento['cuped'].get(metrica)
+        if resultado_cuped is not None:
+            st.markdown("---")
+            st.subheader("📉 Ajuste CUPED (periodo previo)")
+            if 'error' in resultado_cuped:
+                st.error(f"❌ No se pudo calcular el ajuste CUPED para {etiqueta}: {resultado_cuped['error']}")
+            else:
+                mostrar_cuped(resultado_cuped, etiqueta_log)
+        
+        # Validación de supuestos sobre los residuos del modelo (muestreada con muchas filas)
+        st.markdown("---")
+        st.subheader("🔍 Validación de Supuestos")
+        df_transformado, _ = agregar_transformaciones(df_test, list(especificacion.metricas), 'log')
+        diagnostico_completo = st.checkbox(f"Usar todas las filas (por defecto se muestrean {N_MUESTRA_INTERACTIVA:,})",
+                                           value=False)
+        n_muestra = None if diagnostico_completo else N_MUESTRA_INTERACTIVA
+        futuro = gestor_tareas.enviar(
+            ('supuestos', huella_datos, metrica, n_muestra), diagnosticar_supuestos_cache,
+            df_transformado, columna_log,
+            bloque=especificacion.bloque, tratamiento=especificacion.tratamiento,
+            celdas_ajustadas=resultado_rcbd['celdas'], n_muestra=n_muestra, semilla=42
+        )
+        mostrar_tarea(futuro, mostrar_supuestos, "Diagnosticando residuos...")
+        
+        # Verificación no paramétrica (permutación dentro de bloques y bootstrap por celda)
+        st.markdown("---")
+        st.subheader("🎲 Verificación No Paramétrica")
+        n_remuestras = st.select_slider("Número de remuestras:", options=[1_000, 5_000, 10_000], value=1_000)
+        clave_remuestreo = ('remuestreo', huella_datos, metrica, n_remuestras)
+        if st.button("Ejecutar permutación y bootstrap"):
+            gestor_tareas.enviar(
+                clave_remuestreo, verificacion_no_parametrica_cache, df_transformado, columna_log,
+                tratamiento=especificacion.tratamiento, bloque=especificacion.bloque,
+                nivel_tratamiento=especificacion.nivel_tratamiento, nivel_control=especificacion.nivel_control,
+                n_remuestras=n_remuestras, semilla=42
+            )
+        # El resultado sigue visible (o llega) en los reruns posteriores al botón
+        futuro = gestor_tareas.obtener(clave_remuestreo)
+        if futuro is not None:
+            mostrar_tarea(futuro, lambda r: mostrar_inferencia_no_parametrica(r['permutacion'], r['bootstrap']),
+                          "Calculando remuestreos...")
+        
+        # Efectos robustos en la escala original: la media queda dominada por la cola de outliers
+        st.markdown("---")
+        st.subheader("📐 Efectos por Cuantiles y Medias Recortadas")
+        n_remuestras_cuantiles = st.select_slider("Remuestras bootstrap:", options=[1_000, 2_000, 5_000],
+                                                  value=1_000, key='remuestras_cuantiles')
+        futuro = gestor_tareas.enviar(
+            ('cuantiles', huella_datos, metrica, n_remuestras_cuantiles), efectos_cuantiles_cache,
+            df_transformado, metrica,
+            bloque=especificacion.bloque, tratamiento=especificacion.tratamiento,
+            nivel_tratamiento=especificacion.nivel_tratamiento, nivel_control=especificacion.nivel_control,
+            recortes=(0.0, 0.05, 0.1), n_remuestras=n_remuestras_cuantiles, semilla=42
+        )
+        mostrar_tarea(futuro, lambda r: mostrar_efectos_cuantiles(r, etiqueta), "Calculando efectos por cuantiles...")
+    
+    else:
+        st.header("⚖️ Comparación de Modelos")
+        st.markdown(f"**DCA:** {etiqueta_log} = μ + Tratamiento + ε  vs  "
+                    f"**RCBD:** {etiqueta_log} = μ + Bloque + Tratamiento + ε")
+        mostrar_comparacion_modelos(resultado_rcbd)
+
+# =======================================
+# SECCIÓN: ANÁLISIS SECUENCIAL
+# =======================================
+
+elif seccion_analisis == "Análisis Secuencial":
+    st.header("⏱️ Análisis Secuencial")
+    st.markdown(f"Secuencia de confianza siempre válida del efecto en {etiqueta_log}, actualizada con las miradas "
+                "diarias del monitor del experimento")
+    
+    # Solo se lee el estado del monitor (estadísticos por celda): no se carga el CSV
+    if not especificacion.directorio_monitor:
+        st.info("ℹ️ El experimento no define `directorio_monitor` en config/experimentos.json")
+        st.stop()
+    from etl_data.monitor import ARCHIVO_ESTADO
+    if not os.path.exists(os.path.join(especificacion.directorio_monitor, metrica, ARCHIVO_ESTADO)):
+        st.info(f"ℹ️ Todavía no hay miradas para {etiqueta}: ejecutar `python mirada_diaria.py <extracto.csv> "
+                f"--experimento \"{especificacion.nombre}\"` con las filas de cada día")
+        st.stop()
+    
+    monitor = especificacion.abrir_monitor(metrica)
+    if getattr(monitor, 'secuencial', None) is None or not monitor.secuencial.miradas:
+        st.info(f"ℹ️ El monitor de {etiqueta} todavía no registró miradas secuenciales")
+        st.stop()
+    mostrar_analisis_secuencial(monitor.secuencial.historial(), monitor.secuencial.estado(), etiqueta_log)
+
+# =======================================
+# SECCIÓN: POTENCIA Y TAMAÑO DE MUESTRA
+# =======================================
+
+elif seccion_analisis == "Potencia y Tamaño de Muestra":
+    st.header("🎯 Potencia y Tamaño de Muestra")
+    st.markdown(f"Clientes por bloque ({especificacion.bloque}) necesarios para detectar un aumento de {etiqueta}, "
+                f"simulando experimentos RCBD con la asimetría y la variabilidad por bloque observadas en {etiqueta_log}")
+    
+    df_test = cargar_experimento()
+    huella_datos = huella_dataframe(df_test)
+    with medir("Potencia: parámetros observados"):
+        resultado = analizar(df_test)
+        parametros = parametros_simulacion(resultado['resumenes'][columna_log],
+                                           resultado['estadisticas_bloque'][columna_log])
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        # Un aumento de 0 muestra la tasa de falsos positivos del diseño
+        aumentos = st.multiselect("Aumentos a detectar:", [0.0, 0.01, 0.02, 0.05, 0.1, 0.2],
+                                  default=[0.02, 0.05, 0.1], format_func=lambda aumento: f"{aumento:+.0%}")
+    with col2:
+        objetivo = st.select_slider("Potencia objetivo:", options=[0.7, 0.8, 0.9, 0.95], value=0.8)
+    with col3:
+        n_replicas = st.select_slider("Experimentos simulados por punto:", options=[500, 1_000, 2_000, 5_000],
+                                      value=1_000)
+    if not aumentos:
+        st.info("ℹ️ Selecciona al menos un aumento")
+        st.stop()
+    
+    aumentos = sorted(aumentos)
+    futuro = gestor_tareas.enviar(
+        ('potencia', huella_datos, metrica, tuple(aumentos), objetivo, n_replicas), curvas_potencia_cache,
+        parametros, aumentos,
+        n_replicas=n_replicas, objetivo=objetivo, semilla=42, n_workers=os.cpu_count()
+    )
+    mostrar_tarea(futuro, lambda r: mostrar_curvas_potencia(r, etiqueta), "Simulando experimentos...")
 
-elif seccion_analisis == "Comparación de Modelos":
-    st.header("⚖️ Comparación de Modelos")
-    st.info("Sección en desarrollo...")
\ No newline at end of file
+if panel_rendimiento:
+    mostrar_panel_rendimiento(finalizar_ejecucion())
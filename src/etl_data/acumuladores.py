@@ -0,0 +1,307 @@
+import numpy as np
+
+
+class AcumuladorMomentos:
+    """Acumulador combinable de momentos (Welford/Pébay) para una variable numérica.
+
+    Mantiene conteo, media y sumas centradas M2..M4, además de mínimo, máximo
+    y conteos exactos de valores negativos y cero. Dos acumuladores construidos
+    sobre particiones distintas se combinan con ``combinar`` sin perder exactitud.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+        self.negativos = 0
+        self.ceros = 0
+
+    def actualizar(self, valores: np.ndarray) -> "AcumuladorMomentos":
+        """Incorpora un bloque de valores (los NaN se ignoran, como en pandas)"""
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = valores[~np.isnan(valores)]
+        if valores.size == 0:
+            return self
+
+        bloque = AcumuladorMomentos()
+        bloque.n = valores.size
+        bloque.media = float(valores.mean())
+        desvios = valores - bloque.media
+        cuadrados = desvios * desvios
+        bloque.m2 = float(cuadrados.sum())
+        bloque.m3 = float((cuadrados * desvios).sum())
+        bloque.m4 = float((cuadrados * cuadrados).sum())
+        bloque.minimo = float(valores.min())
+        bloque.maximo = float(valores.max())
+        bloque.negativos = int(np.count_nonzero(valores < 0))
+        bloque.ceros = int(np.count_nonzero(valores == 0))
+        return self.combinar(bloque)
+
+    def combinar(self, otro: "AcumuladorMomentos") -> "AcumuladorMomentos":
+        """Combina en este acumulador el estado de otro (fórmulas de Pébay)"""
+        if otro.n == 0:
+            return self
+        if self.n == 0:
+            self.__dict__.update(otro.__dict__)
+            return self
+
+        na, nb = self.n, otro.n
+        n = na + nb
+        delta = otro.media - self.media
+        delta_n = delta / n
+
+        m2 = self.m2 + otro.m2 + delta * delta_n * na * nb
+        m3 = (self.m3 + otro.m3
+              + delta * delta_n ** 2 * na * nb * (na - nb)
+              + 3 * delta_n * (na * otro.m2 - nb * self.m2))
+        m4 = (self.m4 + otro.m4
+              + delta * delta_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+              + 6 * delta_n ** 2 * (na * na * otro.m2 + nb * nb * self.m2)
+              + 4 * delta_n * (na * otro.m3 - nb * self.m3))
+
+        self.media += delta_n * nb
+        self.n, self.m2, self.m3, self.m4 = n, m2, m3, m4
+        self.minimo = min(self.minimo, otro.minimo)
+        self.maximo = max(self.maximo, otro.maximo)
+        self.negativos += otro.negativos
+        self.ceros += otro.ceros
+        return self
+
+    @property
+    def varianza(self) -> float:
+        """Varianza muestral (ddof=1)"""
+        return self.m2 / (self.n - 1) if self.n > 1 else np.nan
+
+    @property
+    def desviacion(self) -> float:
+        """Desviación estándar muestral (ddof=1)"""
+        return float(np.sqrt(self.varianza))
+
+    @property
+    def asimetria(self) -> float:
+        """Asimetría muestral ajustada, equivalente a ``pd.Series.skew``"""
+        n = self.n
+        if n < 3 or self.m2 == 0:
+            return np.nan if n < 3 else 0.0
+        return float(n * np.sqrt(n - 1) / (n - 2) * self.m3 / self.m2 ** 1.5)
+
+    @property
+    def curtosis(self) -> float:
+        """Curtosis en exceso ajustada, equivalente a ``pd.Series.kurtosis``"""
+        n = self.n
+        if n < 4 or self.m2 == 0:
+            return np.nan if n < 4 else 0.0
+        ajuste = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+        return float(n * (n + 1) * (n - 1) * self.m4 / ((n - 2) * (n - 3) * self.m2 ** 2) - ajuste)
+
+
+class SketchCuantiles:
+    """Sketch de cuantiles combinable con error relativo garantizado (estilo DDSketch).
+
+    Cada valor positivo ``x`` cae en la cubeta ``ceil(log_gamma(x))`` con
+    ``gamma = (1 + alpha) / (1 - alpha)``; los negativos se guardan por su valor
+    absoluto y los ceros aparte, igual que los infinitos (``±inf`` ocupan los extremos
+    del orden). Para cualquier cuantil ``q`` el valor devuelto
+    difiere como máximo en un factor relativo ``alpha`` del valor de la muestra
+    que ocupa el rango ``q * (n - 1)``. El número de cubetas solo depende del
+    rango de magnitudes (``log(max / min) / log(gamma)``), no del número de filas,
+    por lo que la memoria queda acotada (unas pocas miles de cubetas para datos
+    en float64 con ``alpha = 0.01``).
+    """
+
+    def __init__(self, error_relativo: float = 0.01):
+        if not 0 < error_relativo < 1:
+            raise ValueError("error_relativo debe estar entre 0 y 1")
+        self.error_relativo = error_relativo
+        self.gamma = (1 + error_relativo) / (1 - error_relativo)
+        self._log_gamma = np.log(self.gamma)
+        self.n = 0
+        self.ceros = 0
+        self.infinitos_negativos = 0
+        self.infinitos_positivos = 0
+        self._positivos = _AlmacenCubetas()
+        self._negativos = _AlmacenCubetas()
+
+    def actualizar(self, valores: np.ndarray) -> "SketchCuantiles":
+        """Incorpora un bloque de valores (los NaN se ignoran)"""
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = valores[~np.isnan(valores)]
+        if valores.size == 0:
+            return self
+
+        infinitos = np.isinf(valores)
+        if infinitos.any():
+            self.infinitos_positivos += int(np.count_nonzero(valores[infinitos] > 0))
+            self.infinitos_negativos += int(np.count_nonzero(valores[infinitos] < 0))
+            self.n += int(np.count_nonzero(infinitos))
+            valores = valores[~infinitos]
+
+        positivos = valores[valores > 0]
+        negativos = -valores[valores < 0]
+        self.ceros += int(valores.size - positivos.size - negativos.size)
+        self._positivos.agregar(self._indices(positivos))
+        self._negativos.agregar(self._indices(negativos))
+        self.n += int(valores.size)
+        return self
+
+    def combinar(self, otro: "SketchCuantiles") -> "SketchCuantiles":
+        """Combina en este sketch el estado de otro con el mismo error relativo"""
+        if otro.gamma != self.gamma:
+            raise ValueError("Solo se pueden combinar sketches con el mismo error relativo")
+        self._positivos.combinar(otro._positivos)
+        self._negativos.combinar(otro._negativos)
+        self.ceros += otro.ceros
+        self.infinitos_negativos += otro.infinitos_negativos
+        self.infinitos_positivos += otro.infinitos_positivos
+        self.n += otro.n
+        return self
+
+    def _indices(self, valores: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(valores) / self._log_gamma).astype(np.int64)
+
+    def _valor_cubeta(self, indices: np.ndarray) -> np.ndarray:
+        return 2 * self.gamma ** indices / (self.gamma + 1)
+
+    def _valores_ordenados(self):
+        """Representantes de cubeta en orden ascendente y sus conteos"""
+        ind_neg, cont_neg = self._negativos.no_vacias()
+        ind_pos, cont_pos = self._positivos.no_vacias()
+        valores = np.concatenate([
+            [-np.inf] if self.infinitos_negativos else [],
+            -self._valor_cubeta(ind_neg[::-1]),
+            [0.0] if self.ceros else [],
+            self._valor_cubeta(ind_pos),
+            [np.inf] if self.infinitos_positivos else []
+        ])
+        conteos = np.concatenate([
+            [self.infinitos_negativos] if self.infinitos_negativos else [],
+            cont_neg[::-1],
+            [self.ceros] if self.ceros else [],
+            cont_pos,
+            [self.infinitos_positivos] if self.infinitos_positivos else []
+        ]).astype(np.int64)
+        return valores, conteos
+
+    def cubetas(self):
+        """Representantes de las cubetas no vacías en orden ascendente y sus conteos"""
+        return self._valores_ordenados()
+
+    def cuantil(self, q: float) -> float:
+        """Estima el cuantil ``q`` (0 <= q <= 1)"""
+        return float(self.cuantiles([q])[0])
+
+    def cuantiles(self, qs) -> np.ndarray:
+        """Estima varios cuantiles con un solo recorrido de las cubetas"""
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        valores, conteos = self._valores_ordenados()
+        acumulado = np.cumsum(conteos)
+        rangos = np.asarray(qs, dtype=np.float64) * (self.n - 1)
+        posiciones = np.searchsorted(acumulado, np.floor(rangos), side='right')
+        return valores[np.minimum(posiciones, len(valores) - 1)]
+
+    def contar_mayores(self, umbral: float) -> int:
+        """Estima cuántos valores superan ``umbral``.
+
+        El error está acotado por el conteo de la única cubeta que contiene al umbral.
+        """
+        valores, conteos = self._valores_ordenados()
+        return int(conteos[valores > umbral].sum())
+
+    def contar_menores(self, umbral: float) -> int:
+        """Estima cuántos valores quedan por debajo de ``umbral`` (misma cota que ``contar_mayores``)"""
+        valores, conteos = self._valores_ordenados()
+        return int(conteos[valores < umbral].sum())
+
+
+class _AlmacenCubetas:
+    """Arreglo denso de conteos por índice de cubeta con desplazamiento dinámico"""
+
+    def __init__(self):
+        self.desplazamiento = 0
+        self.conteos = np.zeros(0, dtype=np.int64)
+
+    def agregar(self, indices: np.ndarray):
+        if indices.size == 0:
+            return
+        minimo, maximo = int(indices.min()), int(indices.max())
+        self._extender(minimo, maximo)
+        self.conteos += np.bincount(indices - self.desplazamiento, minlength=len(self.conteos))
+
+    def combinar(self, otro: "_AlmacenCubetas"):
+        if otro.conteos.size == 0:
+            return
+        self._extender(otro.desplazamiento, otro.desplazamiento + len(otro.conteos) - 1)
+        inicio = otro.desplazamiento - self.desplazamiento
+        self.conteos[inicio:inicio + len(otro.conteos)] += otro.conteos
+
+    def _extender(self, minimo: int, maximo: int):
+        if self.conteos.size == 0:
+            self.desplazamiento = minimo
+            self.conteos = np.zeros(maximo - minimo + 1, dtype=np.int64)
+            return
+        nuevo_min = min(minimo, self.desplazamiento)
+        nuevo_max = max(maximo, self.desplazamiento + len(self.conteos) - 1)
+        if nuevo_min == self.desplazamiento and nuevo_max == self.desplazamiento + len(self.conteos) - 1:
+            return
+        conteos = np.zeros(nuevo_max - nuevo_min + 1, dtype=np.int64)
+        inicio = self.desplazamiento - nuevo_min
+        conteos[inicio:inicio + len(self.conteos)] = self.conteos
+        self.desplazamiento, self.conteos = nuevo_min, conteos
+
+    def no_vacias(self):
+        indices = np.flatnonzero(self.conteos)
+        return indices + self.desplazamiento, self.conteos[indices]
+
+
+class AcumuladorCovarianzas:
+    """Conteos, medias y co-momentos de un par (x, y) por celda, combinables entre lotes.
+
+    Cada ``actualizar`` reduce un lote con ``np.bincount`` (dos pasadas sobre el lote)
+    y lo combina con las fórmulas de Chan, así que el estado es O(celdas) y un
+    archivo de decenas de millones de filas se procesa por trozos.
+    """
+
+    def __init__(self, n_celdas: int):
+        self.n = np.zeros(n_celdas, dtype=np.int64)
+        self.media_x = np.zeros(n_celdas)
+        self.media_y = np.zeros(n_celdas)
+        self.cxx = np.zeros(n_celdas)
+        self.cxy = np.zeros(n_celdas)
+        self.cyy = np.zeros(n_celdas)
+
+    def actualizar(self, celda: np.ndarray, x: np.ndarray, y: np.ndarray) -> "AcumuladorCovarianzas":
+        """Incorpora un lote de pares con su celda (sin faltantes)"""
+        lote = AcumuladorCovarianzas(len(self.n))
+        minimo = len(self.n)
+        lote.n = np.bincount(celda, minlength=minimo)
+        con_datos = lote.n > 0
+        lote.media_x = np.divide(np.bincount(celda, weights=x, minlength=minimo), lote.n,
+                                 out=np.zeros(minimo), where=con_datos)
+        lote.media_y = np.divide(np.bincount(celda, weights=y, minlength=minimo), lote.n,
+                                 out=np.zeros(minimo), where=con_datos)
+        dx = x - lote.media_x[celda]
+        dy = y - lote.media_y[celda]
+        lote.cxx = np.bincount(celda, weights=dx * dx, minlength=minimo)
+        lote.cxy = np.bincount(celda, weights=dx * dy, minlength=minimo)
+        lote.cyy = np.bincount(celda, weights=dy * dy, minlength=minimo)
+        return self.combinar(lote)
+
+    def combinar(self, otro: "AcumuladorCovarianzas") -> "AcumuladorCovarianzas":
+        """Combina en este acumulador el estado de otro, celda por celda"""
+        n = self.n + otro.n
+        peso = np.divide(self.n * otro.n, n, out=np.zeros(len(n)), where=n > 0)
+        fraccion = np.divide(otro.n, n, out=np.zeros(len(n)), where=n > 0)
+        dx = otro.media_x - self.media_x
+        dy = otro.media_y - self.media_y
+        self.cxx += otro.cxx + dx * dx * peso
+        self.cxy += otro.cxy + dx * dy * peso
+        self.cyy += otro.cyy + dy * dy * peso
+        self.media_x += dx * fraccion
+        self.media_y += dy * fraccion
+        self.n = n
+        return self
@@ -0,0 +1,208 @@
+import json
+import os
+import shutil
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from etl_data.compactacion import VERSION_COMPACTACION
+from etl_data.eda import calcular_hash_archivo, cargar_datos
+from etl_data.transformaciones import SUFIJOS_TRANSFORMACION, agregar_transformaciones
+from utils.cache import marcar_huella
+from utils.instrumentacion import instrumentado
+
+# Almacén columnar junto al CSV: un subdirectorio por versión (un .npy por columna más
+# los metadatos) y un puntero a la versión vigente que se reemplaza de forma atómica
+SUFIJO_ALMACEN = '.columnas'
+ARCHIVO_META = 'meta.json'
+ARCHIVO_VERSION = 'VERSION'
+
+# Almacenes abiertos por proceso; solo guardan mapeos, no copias privadas de los datos
+MAX_ALMACENES_ABIERTOS = 4
+
+_almacenes_abiertos: "OrderedDict[Tuple[str, int, int, str], pd.DataFrame]" = OrderedDict()
+
+
+def ruta_almacen(ruta_archivo: str) -> str:
+    return f"{ruta_archivo}{SUFIJO_ALMACEN}"
+
+def _arreglos_columna(serie: pd.Series) -> Tuple[np.ndarray, Optional[list]]:
+    """Arreglo a persistir y niveles: los factores se guardan como códigos enteros"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories.tolist()
+    if pd.api.types.is_numeric_dtype(serie.dtype) or pd.api.types.is_bool_dtype(serie.dtype):
+        return serie.to_numpy(), None
+    codigos, niveles = pd.factorize(serie, sort=True)
+    return codigos.astype(np.int32), niveles.tolist()
+
+def _leer_version(directorio: str) -> Optional[str]:
+    """Nombre del subdirectorio de la versión vigente, o None si no hay almacén"""
+    try:
+        with open(os.path.join(directorio, ARCHIVO_VERSION), encoding='utf-8') as archivo:
+            return archivo.read().strip() or None
+    except OSError:
+        return None
+
+def _marca_version(nombre: str) -> Optional[int]:
+    """Instante de creación (ns) codificado en el nombre ``v<ns>-<pid>`` de una versión"""
+    try:
+        return int(nombre[1:].split('-', 1)[0]) if nombre.startswith('v') else None
+    except ValueError:
+        return None
+
+def _borrar_versiones_viejas(directorio: str, vigente: str, anterior: Optional[str]):
+    """Borra las versiones previas a ``anterior`` y los archivos del formato sin versiones.
+
+    La versión anterior se conserva: un lector que leyó el puntero justo antes del
+    reemplazo todavía puede abrirla. Las creadas después (escrituras concurrentes) no se tocan.
+    """
+    limite = _marca_version(anterior) if anterior else None
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        if nombre in (vigente, anterior, ARCHIVO_VERSION):
+            continue
+        if os.path.isdir(ruta):
+            marca = _marca_version(nombre)
+            if limite is not None and marca is not None and marca < limite:
+                shutil.rmtree(ruta, ignore_errors=True)
+        elif anterior is None and (nombre.endswith('.npy') or nombre == ARCHIVO_META):
+            os.remove(ruta)
+
+def escribir_almacen(df: pd.DataFrame, directorio: str, meta: Dict) -> str:
+    """Escribe las columnas de ``df`` en una versión nueva del almacén y la publica de forma atómica.
+
+    Los archivos van a un subdirectorio nuevo y recién al final se reemplaza el
+    puntero ``VERSION`` con ``os.replace``: otro proceso ve la versión anterior
+    completa o la nueva completa, nunca un almacén a medio escribir o borrar.
+    Las columnas nombradas en ``meta['transformaciones']`` se guardan aparte: no son
+    parte del DataFrame cargado sino de ``agregar_transformaciones``. Devuelve la
+    ruta de la versión escrita.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    anterior = _leer_version(directorio)
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    temporal = os.path.join(directorio, version)
+    os.makedirs(temporal)
+    columnas = []
+    for i, columna in enumerate(df.columns):
+        arreglo, niveles = _arreglos_columna(df[columna])
+        archivo = f"c{i}.npy"
+        np.save(os.path.join(temporal, archivo), np.ascontiguousarray(arreglo))
+        if columna in meta['transformaciones']:
+            meta['transformaciones'][columna]['archivo'] = archivo
+        else:
+            columnas.append({'nombre': columna, 'archivo': archivo, 'niveles': niveles})
+    with open(os.path.join(temporal, ARCHIVO_META), 'w', encoding='utf-8') as archivo:
+        json.dump({**meta, 'n_filas': len(df), 'columnas': columnas}, archivo)
+
+    puntero = os.path.join(directorio, ARCHIVO_VERSION)
+    with open(f"{puntero}.tmp-{os.getpid()}", 'w', encoding='utf-8') as archivo:
+        archivo.write(version)
+    os.replace(f"{puntero}.tmp-{os.getpid()}", puntero)
+    # Quien tenga abierta una versión borrada conserva sus mapeos
+    _borrar_versiones_viejas(directorio, version, anterior)
+    return temporal
+
+def _leer_meta(directorio: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(directorio, ARCHIVO_META), encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+def abrir_almacen(directorio: str, meta: Optional[Dict] = None) -> pd.DataFrame:
+    """DataFrame cuyas columnas son vistas de solo lectura de los .npy de una versión del almacén.
+
+    Las páginas las comparte el caché del sistema operativo entre sesiones y procesos;
+    los factores se reconstruyen como categorías sobre los códigos mapeados. Las
+    transformaciones guardadas quedan indicadas en ``attrs`` para que
+    ``agregar_transformaciones`` las mapee en lugar de calcularlas.
+    """
+    meta = meta or _leer_meta(directorio)
+    datos = {}
+    for columna in meta['columnas']:
+        arreglo = np.load(os.path.join(directorio, columna['archivo']), mmap_mode='r')
+        if columna['niveles'] is not None:
+            arreglo = pd.Categorical.from_codes(arreglo, dtype=pd.CategoricalDtype(columna['niveles']))
+        datos[columna['nombre']] = arreglo
+    df = pd.DataFrame(datos, copy=False)
+    marcar_huella(df, meta['hash'])
+    df.attrs['transformaciones_precalculadas'] = {
+        destino: {**info, 'archivo': os.path.join(directorio, info['archivo'])}
+        for destino, info in meta['transformaciones'].items()
+    }
+    return df
+
+def _meta_vigente(directorio: str, ruta_archivo: str, estado: os.stat_result, esquema: str) -> Optional[Dict]:
+    """Metadatos del almacén si corresponde al contenido actual del CSV y al esquema, o None"""
+    meta = _leer_meta(directorio)
+    if meta is None or meta.get('tamano') != estado.st_size or meta.get('esquema') != esquema:
+        return None
+    if meta.get('mtime_ns') != estado.st_mtime_ns:
+        # El mtime cambió: el almacén sigue sirviendo si el contenido es el mismo
+        if meta.get('hash') != calcular_hash_archivo(ruta_archivo):
+            return None
+        meta['mtime_ns'] = estado.st_mtime_ns
+        ruta_meta = os.path.join(directorio, ARCHIVO_META)
+        try:
+            with open(f"{ruta_meta}.tmp", 'w', encoding='utf-8') as archivo:
+                json.dump(meta, archivo)
+            os.replace(f"{ruta_meta}.tmp", ruta_meta)
+        except OSError:
+            pass
+    return meta
+
+@instrumentado
+def cargar_datos_mapeados(ruta_archivo: str, tipos: Dict[str, str], columnas: Optional[list] = None,
+                          transformar: List[str] = (), metodo: str = 'log') -> pd.DataFrame:
+    """Carga un CSV desde su almacén de columnas mapeadas en memoria (lo construye si hace falta).
+
+    El almacén guarda las columnas leídas, los factores como códigos enteros y las
+    transformaciones de ``transformar`` ya calculadas, que ``agregar_transformaciones``
+    reutiliza sin copiar. Se reconstruye cuando cambia el CSV o el esquema. Si no se
+    puede escribir junto al CSV se devuelve el DataFrame en memoria.
+    """
+    ruta = os.path.abspath(ruta_archivo)
+    estado = os.stat(ruta)
+    esquema = repr((sorted(tipos.items()), None if columnas is None else sorted(columnas),
+                    list(transformar), metodo, VERSION_COMPACTACION))
+    clave = (ruta, estado.st_mtime_ns, estado.st_size, esquema)
+    if clave in _almacenes_abiertos:
+        _almacenes_abiertos.move_to_end(clave)
+        return _almacenes_abiertos[clave]
+
+    directorio = ruta_almacen(ruta)
+    version = _leer_version(directorio)
+    meta = _meta_vigente(os.path.join(directorio, version), ruta, estado, esquema) if version else None
+    if meta is None:
+        # El DataFrame privado solo vive mientras se escribe el almacén
+        df = cargar_datos(ruta, tipos, usar_cache=False, columnas=columnas)
+        df_transformado, infos = agregar_transformaciones(df, list(transformar), metodo)
+        meta = {
+            'mtime_ns': estado.st_mtime_ns,
+            'tamano': estado.st_size,
+            'hash': calcular_hash_archivo(ruta),
+            'esquema': esquema,
+            'transformaciones': {
+                f"{columna}{SUFIJOS_TRANSFORMACION[metodo]}": info for columna, info in infos.items()
+            }
+        }
+        try:
+            ruta_version = escribir_almacen(df_transformado, directorio, meta)
+        except OSError:
+            # Sin permisos de escritura junto al CSV: se sirve la copia en memoria
+            marcar_huella(df, meta['hash'])
+            return df
+        meta = _leer_meta(ruta_version)
+    else:
+        ruta_version = os.path.join(directorio, version)
+
+    df = abrir_almacen(ruta_version, meta)
+    _almacenes_abiertos[clave] = df
+    _almacenes_abiertos.move_to_end(clave)
+    while len(_almacenes_abiertos) > MAX_ALMACENES_ABIERTOS:
+        _almacenes_abiertos.popitem(last=False)
+    return df
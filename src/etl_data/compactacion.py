@@ -0,0 +1,133 @@
+import sys
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional
+
+# Columnas de texto con a lo sumo esta fracción de valores distintos se codifican como categoría
+MAX_FRACCION_CATEGORIAS = 0.5
+
+# Bytes por puntero de una columna object de pandas
+BYTES_PUNTERO = 8
+
+# Versión de las reglas de compactación: forma parte del esquema de los sidecars y
+# almacenes, así que cambiarla los reconstruye con los tipos nuevos
+VERSION_COMPACTACION = 2
+
+
+def _es_texto(serie: pd.Series) -> bool:
+    return pd.api.types.is_object_dtype(serie.dtype) or pd.api.types.is_string_dtype(serie.dtype)
+
+def _enteros_en_flotante(valores: np.ndarray) -> bool:
+    """True si todos los valores no faltantes de una columna flotante son enteros (IDs con faltantes)"""
+    finitos = valores[np.isfinite(valores)]
+    return finitos.size > 0 and bool(np.all(finitos == np.round(finitos)))
+
+def compactar_columna(serie: pd.Series, max_fraccion_categorias: float = MAX_FRACCION_CATEGORIAS,
+                      arrow: bool = False) -> pd.Series:
+    """Representación compacta de una columna.
+
+    - texto de baja cardinalidad -> ``category`` (códigos enteros + diccionario);
+      el resto, con ``arrow``, -> ``string[pyarrow]`` en lugar de objetos de Python
+    - enteros -> el entero con signo más chico que contiene el rango
+    - flotantes -> float32, salvo columnas de enteros con faltantes (IDs), que
+      perderían precisión por encima de 2**24
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie
+    if _es_texto(serie):
+        if len(serie) and serie.nunique(dropna=True) <= max_fraccion_categorias * len(serie):
+            return serie.astype('category')
+        if arrow and serie.dtype != 'string[pyarrow]':
+            try:
+                return serie.astype('string[pyarrow]')
+            except ImportError:
+                # Sin pyarrow se conservan los objetos de Python
+                return serie
+        return serie
+    if pd.api.types.is_bool_dtype(serie.dtype):
+        return serie
+    if pd.api.types.is_integer_dtype(serie.dtype) and isinstance(serie.dtype, np.dtype):
+        compacta = pd.to_numeric(serie, downcast='integer')
+        return serie if compacta.dtype == serie.dtype else compacta
+    if serie.dtype == np.float64 and not _enteros_en_flotante(serie.to_numpy()):
+        return serie.astype(np.float32)
+    return serie
+
+def compactar_dataframe(df: pd.DataFrame, max_fraccion_categorias: float = MAX_FRACCION_CATEGORIAS,
+                        arrow: bool = False, tipos: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """Aplica ``compactar_columna`` a todas las columnas; las que ya son compactas no se copian.
+
+    Las columnas que ya tienen el tipo declarado en ``tipos`` se conservan: el esquema
+    declarado manda (por ejemplo IDs ``int64``) y solo se compacta lo que quedó a la inferencia.
+    """
+    tipos = tipos or {}
+    columnas = {}
+    for columna in df.columns:
+        serie = df[columna]
+        if columna in tipos and str(serie.dtype) == tipos[columna]:
+            continue
+        compacta = compactar_columna(serie, max_fraccion_categorias, arrow)
+        if compacta is not serie:
+            columnas[columna] = compacta
+    if not columnas:
+        return df
+    df_compacto = df.copy(deep=False)
+    for columna, compacta in columnas.items():
+        df_compacto[columna] = compacta
+    return df_compacto
+
+def _memoria_sin_compactar(serie: pd.Series) -> int:
+    """Bytes que ocuparía la columna con los tipos que infiere ``pd.read_csv`` (object, int64, float64).
+
+    Para categorías el valor es exacto (lo mismo que ``memory_usage(deep=True)`` de la
+    columna object) y se calcula sobre el diccionario, sin materializar las cadenas;
+    para cadenas Arrow se estima con el tamaño de un ``str`` ASCII de Python.
+    """
+    n = len(serie)
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        conteos = serie.value_counts(dropna=False)
+        tamanos = np.array([sys.getsizeof(valor) for valor in conteos.index], dtype=np.int64)
+        return int(n * BYTES_PUNTERO + tamanos @ conteos.to_numpy())
+    if _es_texto(serie):
+        if pd.api.types.is_object_dtype(serie.dtype):
+            return int(serie.memory_usage(index=False, deep=True))
+        longitudes = serie.str.len()
+        return int(n * BYTES_PUNTERO + (sys.getsizeof('') + longitudes.fillna(0)).sum()
+                   + longitudes.isna().sum() * (sys.getsizeof(None) - sys.getsizeof('')))
+    if pd.api.types.is_bool_dtype(serie.dtype):
+        return n
+    return n * 8
+
+def reporte_memoria(df: pd.DataFrame, referencia: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Memoria por columna del DataFrame frente a su versión sin compactar.
+
+    Sin ``referencia`` la memoria sin compactar se estima a partir de ``df`` (tipos por
+    defecto de ``pd.read_csv``); con ella se mide la de ``referencia``. La última fila
+    tiene los totales.
+    """
+    filas = []
+    for columna in df.columns:
+        serie = df[columna]
+        if referencia is not None:
+            tipo_original = str(referencia[columna].dtype)
+            bytes_original = int(referencia[columna].memory_usage(index=False, deep=True))
+        else:
+            tipo_original = 'object' if (_es_texto(serie) or isinstance(serie.dtype, pd.CategoricalDtype)) else (
+                'bool' if pd.api.types.is_bool_dtype(serie.dtype) else
+                'int64' if pd.api.types.is_integer_dtype(serie.dtype) else 'float64')
+            bytes_original = _memoria_sin_compactar(serie)
+        filas.append({
+            'columna': columna,
+            'tipo': str(serie.dtype),
+            'tipo_sin_compactar': tipo_original,
+            'memoria_mb': serie.memory_usage(index=False, deep=True) / 2**20,
+            'memoria_sin_compactar_mb': bytes_original / 2**20
+        })
+    reporte = pd.DataFrame(filas)
+    total = {'columna': 'Total', 'tipo': '', 'tipo_sin_compactar': '',
+             'memoria_mb': reporte['memoria_mb'].sum(),
+             'memoria_sin_compactar_mb': reporte['memoria_sin_compactar_mb'].sum()}
+    reporte = pd.concat([reporte, pd.DataFrame([total])], ignore_index=True)
+    reporte['ahorro_porcentaje'] = (1 - reporte['memoria_mb'] / reporte['memoria_sin_compactar_mb']) * 100
+    return reporte
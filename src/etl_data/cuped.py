@@ -0,0 +1,136 @@
+import pandas as pd
+import numpy as np
+from typing import Callable, Dict, List, Optional
+
+from etl_data.acumuladores import AcumuladorCovarianzas
+from etl_data.eda import factorizar_columna
+from etl_data.rcbd import _efecto_con_ic
+from utils.instrumentacion import instrumentado
+
+# Filas por lote al acumular: acota los temporales con decenas de millones de clientes
+FILAS_POR_LOTE = 2_000_000
+
+
+def _log1p_no_negativo(valores: np.ndarray) -> np.ndarray:
+    """log(1 + x) de la covariable; conserva los clientes sin actividad previa (x = 0)"""
+    with np.errstate(invalid='ignore'):
+        return np.log1p(np.where(valores >= 0, valores, np.nan))
+
+
+class TablaCovariables:
+    """Covariables del periodo previo con los IDs enteros ordenados y sin repetir.
+
+    La unión con el experimento es una búsqueda binaria de cada ID sobre el arreglo
+    ordenado (``searchsorted``), sin ``pd.merge`` ni claves object; un ID repetido en
+    el periodo previo conserva su primera fila.
+    """
+
+    def __init__(self, ids: np.ndarray, valores: Dict[str, np.ndarray]):
+        self.ids, primeras = np.unique(np.asarray(ids, dtype=np.int64), return_index=True)
+        self.valores = {columna: np.asarray(v, dtype=np.float64)[primeras] for columna, v in valores.items()}
+
+    @classmethod
+    def desde_dataframe(cls, df: pd.DataFrame, columna_id: str, columnas: List[str],
+                        transformar: Optional[Callable[[np.ndarray], np.ndarray]] = _log1p_no_negativo
+                        ) -> "TablaCovariables":
+        """Tabla a partir del DataFrame del periodo previo (por defecto en escala log1p)"""
+        transformar = transformar or (lambda valores: valores)
+        return cls(df[columna_id].to_numpy(),
+                   {columna: transformar(df[columna].to_numpy(dtype=np.float64)) for columna in columnas})
+
+    def unir(self, ids: np.ndarray, columna: str) -> np.ndarray:
+        """Covariable alineada con ``ids`` (NaN para los IDs sin periodo previo)"""
+        ids = np.asarray(ids, dtype=np.int64)
+        resultado = np.full(len(ids), np.nan)
+        if len(self.ids) == 0:
+            return resultado
+        posiciones = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        encontrados = self.ids[posiciones] == ids
+        resultado[encontrados] = self.valores[columna][posiciones[encontrados]]
+        return resultado
+
+
+@instrumentado
+def efecto_cuped(df: pd.DataFrame, respuesta: str, covariable: np.ndarray, bloque: str = 'management',
+                 tratamiento: str = 'group', nivel_tratamiento: str = 'Test', nivel_control: str = 'Control',
+                 alpha: float = 0.05, filas_por_lote: int = FILAS_POR_LOTE) -> Dict:
+    """Efecto Tratamiento - Control ajustado por una covariable previa (CUPED / ANCOVA por bloque).
+
+    Por celda (bloque, grupo) se acumulan medias y co-momentos de (covariable,
+    respuesta) por lotes. La pendiente θ es la regresión dentro de celdas combinada y
+    el efecto de cada bloque es la diferencia de medias menos θ por la diferencia de
+    medias de la covariable; el efecto total pondera los bloques por tamaño, igual que
+    la diferencia estratificada de ``inferencia``. Los clientes sin covariable reciben
+    la media observada, así que no aportan ajuste. La reducción de varianza indica
+    cuánta menos muestra hace falta para la misma precisión.
+    """
+    codigos_bloque, niveles_bloque = factorizar_columna(df[bloque])
+    codigos_trat, niveles_trat = factorizar_columna(df[tratamiento])
+    if nivel_tratamiento not in niveles_trat or nivel_control not in niveles_trat:
+        raise ValueError(f"Se requieren los niveles '{nivel_tratamiento}' y '{nivel_control}' en {tratamiento}")
+    brazo = np.full(len(niveles_trat), -1, dtype=np.int64)
+    brazo[niveles_trat.get_loc(nivel_control)] = 0
+    brazo[niveles_trat.get_loc(nivel_tratamiento)] = 1
+
+    y_total = df[respuesta].to_numpy()
+    covariable = np.asarray(covariable, dtype=np.float64)
+    con_covariable = ~np.isnan(covariable)
+    media_covariable = float(covariable[con_covariable].mean()) if con_covariable.any() else 0.0
+
+    n_bloques = len(niveles_bloque)
+    acumulador = AcumuladorCovarianzas(n_bloques * 2)
+    for inicio in range(0, len(df), filas_por_lote):
+        lote = slice(inicio, inicio + filas_por_lote)
+        y = y_total[lote].astype(np.float64)
+        x = np.where(con_covariable[lote], covariable[lote], media_covariable)
+        codigos_b, codigos_t = codigos_bloque[lote].astype(np.int64), codigos_trat[lote]
+        brazo_lote = np.where(codigos_t >= 0, brazo[codigos_t], -1)
+        validos = (codigos_b >= 0) & (brazo_lote >= 0) & ~np.isnan(y)
+        acumulador.actualizar((codigos_b * 2 + brazo_lote)[validos], x[validos], y[validos])
+
+    # Celdas como matrices (bloque, [control, tratamiento]); solo bloques con ambos grupos
+    n, media_x, media_y = (a.reshape(n_bloques, 2) for a in (acumulador.n, acumulador.media_x, acumulador.media_y))
+    cxx, cxy, cyy = (a.reshape(n_bloques, 2) for a in (acumulador.cxx, acumulador.cxy, acumulador.cyy))
+    usados = (n > 1).all(axis=1)
+    if not usados.any():
+        raise ValueError(f"Ningún bloque de {bloque} tiene observaciones de ambos grupos")
+    n, media_x, media_y, cxx, cxy, cyy = (a[usados] for a in (n, media_x, media_y, cxx, cxy, cyy))
+
+    theta = float(cxy.sum() / cxx.sum()) if cxx.sum() > 0 else 0.0
+    diferencia = media_y[:, 1] - media_y[:, 0]
+    diferencia_ajustada = diferencia - theta * (media_x[:, 1] - media_x[:, 0])
+    varianza = (cyy / (n - 1) / n).sum(axis=1)
+    residual = np.maximum(cyy - 2 * theta * cxy + theta ** 2 * cxx, 0.0)
+    varianza_ajustada = (residual / (n - 1) / n).sum(axis=1)
+
+    n_bloque = n.sum(axis=1)
+    pesos = n_bloque / n_bloque.sum()
+    n_total = int(n_bloque.sum())
+    gl = n_total - 2 * len(n_bloque) - 1
+    sin_ajuste = _efecto_con_ic(float(pesos @ diferencia), float(pesos ** 2 @ varianza), gl, alpha)
+    ajustado = _efecto_con_ic(float(pesos @ diferencia_ajustada), float(pesos ** 2 @ varianza_ajustada), gl, alpha)
+
+    por_bloque = pd.DataFrame({
+        'n_control': n[:, 0],
+        'n_tratados': n[:, 1],
+        'diferencia': diferencia,
+        'error_estandar': np.sqrt(varianza),
+        'diferencia_ajustada': diferencia_ajustada,
+        'error_estandar_ajustado': np.sqrt(varianza_ajustada)
+    }, index=pd.Index(niveles_bloque[usados], name=bloque))
+
+    reduccion = 1 - ajustado['error_estandar'] ** 2 / sin_ajuste['error_estandar'] ** 2
+    return {
+        'efecto_ajustado': ajustado,
+        'efecto_sin_ajuste': sin_ajuste,
+        'theta': theta,
+        'correlacion': float(cxy.sum() / np.sqrt(cxx.sum() * cyy.sum())) if cxx.sum() > 0 else np.nan,
+        'reduccion_varianza': float(reduccion),
+        # Observaciones que necesitaría el análisis sin ajuste para la misma precisión, por cada una ajustada
+        'factor_muestra': float(1 / (1 - reduccion)) if reduccion < 1 else np.inf,
+        'cobertura_covariable': float(con_covariable.mean()) if len(covariable) else 0.0,
+        'por_bloque': por_bloque,
+        'n_observaciones': n_total,
+        'nivel_tratamiento': nivel_tratamiento,
+        'nivel_control': nivel_control
+    }
@@ -1,10 +1,169 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
+
+from etl_data.acumuladores import AcumuladorMomentos, SketchCuantiles
+from etl_data.compactacion import VERSION_COMPACTACION, compactar_dataframe
+from utils.cache import marcar_huella
+from utils.instrumentacion import instrumentado
+
+# Tipos explícitos para el CSV de test: evita la inferencia de pandas y las columnas object
+TIPOS_DATOS_TEST = {
+    'client_id': 'int64',
+    'management': 'category',
+    'group': 'category',
+    'htls': 'float32'
+}
+
+# Número máximo de archivos que se mantienen cargados en memoria (política LRU)
+MAX_ARCHIVOS_EN_MEMORIA = 2
+
+_datos_en_memoria: "OrderedDict[Tuple[str, int, int, str], pd.DataFrame]" = OrderedDict()
+
+def calcular_hash_archivo(ruta_archivo: str, tamano_bloque: int = 1 << 20) -> str:
+    """Calcula el hash BLAKE2b del contenido de un archivo leyéndolo por bloques"""
+    hash_archivo = hashlib.blake2b(digest_size=16)
+    with open(ruta_archivo, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(tamano_bloque), b''):
+            hash_archivo.update(bloque)
+    return hash_archivo.hexdigest()
+
+def _leer_csv(ruta_archivo: str, tipos: Dict[str, str], columnas: Optional[list] = None,
+              arrow: bool = False) -> pd.DataFrame:
+    """Lee un CSV con tipos explícitos (y solo ``columnas``, si se indican) y lo compacta"""
+    try:
+        df = pd.read_csv(ruta_archivo, dtype=tipos, usecols=columnas)
+    except (ValueError, TypeError):
+        # Columnas enteras con faltantes o valores no numéricos: se dejan a la inferencia
+        categoricas = {col: tipo for col, tipo in tipos.items() if tipo == 'category'}
+        df = pd.read_csv(ruta_archivo, dtype=categoricas, usecols=columnas)
+    # Lo que quedó a la inferencia (texto, float64, enteros sin tipo) a tipos compactos;
+    # las columnas leídas con su tipo declarado no se tocan
+    return compactar_dataframe(df, arrow=arrow, tipos=tipos)
+
+def _esquema_lectura(tipos: Dict[str, str], columnas: Optional[list], arrow: bool = False) -> str:
+    """Identifica tipos, columnas y compactación: un sidecar solo sirve para el mismo esquema"""
+    return repr((sorted(tipos.items()), None if columnas is None else sorted(columnas),
+                 ('compacto', VERSION_COMPACTACION), arrow))
+
+def _rutas_sidecar(ruta_archivo: str) -> Tuple[str, str]:
+    """Devuelve las rutas del sidecar Parquet y de sus metadatos"""
+    return f"{ruta_archivo}.parquet", f"{ruta_archivo}.parquet.json"
+
+def _hash_sidecar_vigente(ruta_archivo: str, estado: os.stat_result, esquema: str) -> Optional[str]:
+    """Devuelve el hash del CSV si el sidecar corresponde a su contenido actual, o None"""
+    ruta_parquet, ruta_meta = _rutas_sidecar(ruta_archivo)
+    if not (os.path.exists(ruta_parquet) and os.path.exists(ruta_meta)):
+        return None
+    try:
+        with open(ruta_meta, encoding='utf-8') as archivo:
+            meta = json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get('tamano') != estado.st_size or meta.get('esquema') != esquema:
+        return None
+    if meta.get('mtime_ns') == estado.st_mtime_ns:
+        return meta.get('hash')
+
+    # El mtime cambió: solo se reconstruye si también cambió el contenido
+    if meta.get('hash') != calcular_hash_archivo(ruta_archivo):
+        return None
+    meta['mtime_ns'] = estado.st_mtime_ns
+    _escribir_json_atomico(ruta_meta, meta)
+    return meta['hash']
+
+def _escribir_json_atomico(ruta: str, contenido: Dict):
+    """Escribe un JSON reemplazando el archivo de forma atómica"""
+    ruta_temporal = f"{ruta}.tmp"
+    with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(contenido, archivo)
+    os.replace(ruta_temporal, ruta)
+
+def _escribir_sidecar(df: pd.DataFrame, ruta_archivo: str, estado: os.stat_result, hash_archivo: str,
+                      esquema: str):
+    """Guarda el DataFrame como sidecar Parquet junto al CSV de origen"""
+    ruta_parquet, ruta_meta = _rutas_sidecar(ruta_archivo)
+    meta = {
+        'mtime_ns': estado.st_mtime_ns,
+        'tamano': estado.st_size,
+        'hash': hash_archivo,
+        'esquema': esquema
+    }
+    try:
+        df.to_parquet(f"{ruta_parquet}.tmp", index=False)
+        os.replace(f"{ruta_parquet}.tmp", ruta_parquet)
+        _escribir_json_atomico(ruta_meta, meta)
+    except (ImportError, OSError):
+        # Sin pyarrow o sin permisos de escritura: se sigue sirviendo desde memoria
+        pass
+
+def _memorizar(clave: Tuple[str, int, int, str], df: pd.DataFrame):
+    """Guarda el DataFrame en la memoria del proceso expulsando el menos usado"""
+    _datos_en_memoria[clave] = df
+    _datos_en_memoria.move_to_end(clave)
+    while len(_datos_en_memoria) > MAX_ARCHIVOS_EN_MEMORIA:
+        _datos_en_memoria.popitem(last=False)
+
+def limpiar_cache_datos():
+    """Vacía la copia de los datos mantenida en memoria del proceso"""
+    _datos_en_memoria.clear()
 
-def cargar_datos_test(ruta_archivo: str) -> pd.DataFrame:
-    """Carga los datos de test desde archivo CSV"""
-    return pd.read_csv(ruta_archivo)
+@instrumentado
+def cargar_datos(ruta_archivo: str, tipos: Dict[str, str], usar_cache: bool = True,
+                 columnas: Optional[list] = None, arrow: bool = False) -> pd.DataFrame:
+    """Carga un CSV con tipos explícitos y compactos, leyendo solo ``columnas`` si se indican.
+
+    Las columnas de ``tipos`` conservan el tipo declarado; el resto se compacta
+    (factores como categorías, enteros en el ancho mínimo y métricas en float32, ver
+    ``compactacion.compactar_dataframe``). Con ``arrow`` el texto de alta
+    cardinalidad se guarda como ``string[pyarrow]``.
+
+    Con ``usar_cache`` el CSV se parsea una sola vez: las cargas siguientes se sirven
+    desde la copia en memoria del proceso o desde el sidecar Parquet, que se reconstruye
+    cuando cambia el CSV o el esquema de lectura. El DataFrame devuelto es compartido y
+    no debe modificarse; su ``attrs['huella']`` guarda el hash del CSV y sirve de clave
+    para cachear resultados.
+    """
+    if not usar_cache:
+        return _leer_csv(ruta_archivo, tipos, columnas, arrow)
+
+    ruta = os.path.abspath(ruta_archivo)
+    estado = os.stat(ruta)
+    esquema = _esquema_lectura(tipos, columnas, arrow)
+    clave = (ruta, estado.st_mtime_ns, estado.st_size, esquema)
+
+    if clave in _datos_en_memoria:
+        _datos_en_memoria.move_to_end(clave)
+        return _datos_en_memoria[clave]
+
+    df: Optional[pd.DataFrame] = None
+    hash_archivo = _hash_sidecar_vigente(ruta, estado, esquema)
+    if hash_archivo is not None:
+        try:
+            df = pd.read_parquet(_rutas_sidecar(ruta)[0])
+            if arrow:
+                # Parquet devuelve el texto como string de Python: se vuelve a pasar a Arrow
+                df = compactar_dataframe(df, arrow=True, tipos=tipos)
+        except (ImportError, OSError, ValueError):
+            df = None
+    if df is None:
+        df = _leer_csv(ruta, tipos, columnas, arrow)
+        hash_archivo = calcular_hash_archivo(ruta)
+        _escribir_sidecar(df, ruta, estado, hash_archivo, esquema)
+
+    marcar_huella(df, hash_archivo)
+    _memorizar(clave, df)
+    return df
+
+def cargar_datos_test(ruta_archivo: str, usar_cache: bool = True) -> pd.DataFrame:
+    """Carga los datos de test desde archivo CSV (ver ``cargar_datos``)"""
+    return cargar_datos(ruta_archivo, TIPOS_DATOS_TEST, usar_cache)
 
 def verificar_valores_faltantes(df: pd.DataFrame) -> Dict:
     """Verifica valores faltantes en el DataFrame"""
@@ -49,6 +208,103 @@ def obtener_resumen_categoricas(df: pd.DataFrame, columnas_categoricas: list) ->
             resumen[col] = sorted(df[col].unique())
     return resumen
 
+def factorizar_columna(serie: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Devuelve códigos enteros (-1 para faltantes) y valores únicos de una columna"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories
+    codigos, valores = pd.factorize(serie, use_na_sentinel=True)
+    return codigos, pd.Index(valores)
+
+@instrumentado
+def perfilar_calidad(df: pd.DataFrame, columna_id: str, categoricas: list,
+                     max_filas_duplicadas: int = 1000) -> Dict:
+    """Perfila la calidad de los datos recorriendo cada columna una sola vez.
+
+    Devuelve juntos los resultados de ``verificar_valores_faltantes``,
+    ``verificar_duplicados``, ``obtener_tipos_datos`` y ``obtener_resumen_categoricas``.
+    La muestra de filas duplicadas se limita a ``max_filas_duplicadas`` filas
+    (grupos de ID completos) y solo se ordena esa muestra. Como las funciones que
+    reemplaza, lanza ``KeyError`` si ``columna_id`` o alguna categórica no está en ``df``.
+    """
+    ausentes = [col for col in [columna_id, *categoricas] if col not in df.columns]
+    if ausentes:
+        raise KeyError(f"Columnas ausentes en los datos: {', '.join(map(str, ausentes))}")
+
+    total_filas = len(df)
+    faltantes = {}
+    resumen_categoricas = {}
+    info_duplicados = None
+
+    for col in df.columns:
+        serie = df[col]
+        if col != columna_id and col not in categoricas:
+            faltantes[col] = int(serie.isna().sum())
+            continue
+
+        # Una factorización por columna da faltantes, conteos y valores únicos
+        codigos, valores = factorizar_columna(serie)
+        validos = codigos >= 0
+        faltantes[col] = int(total_filas - np.count_nonzero(validos))
+        conteos = np.bincount(codigos[validos], minlength=len(valores))
+        presentes = conteos > 0
+
+        if col in categoricas:
+            resumen_categoricas[col] = sorted(valores[presentes])
+
+        if col == columna_id:
+            ids_unicos = int(np.count_nonzero(presentes))
+            cantidad_duplicados = total_filas - ids_unicos
+            info_duplicados = {
+                'total_filas': total_filas,
+                'ids_unicos': ids_unicos,
+                'cantidad_duplicados': cantidad_duplicados,
+                'tiene_duplicados': cantidad_duplicados > 0
+            }
+            if info_duplicados['tiene_duplicados']:
+                info_duplicados.update(
+                    _muestrear_duplicados(df, columna_id, codigos, conteos, max_filas_duplicadas)
+                )
+
+    faltantes_por_columna = pd.Series(faltantes, dtype='int64')
+    total_faltantes = int(faltantes_por_columna.sum())
+    total_celdas = df.size
+
+    return {
+        'faltantes': {
+            'faltantes_por_columna': faltantes_por_columna,
+            'total_faltantes': total_faltantes,
+            'porcentaje': (total_faltantes / total_celdas) * 100 if total_celdas > 0 else 0,
+            'tiene_faltantes': total_faltantes > 0
+        },
+        'duplicados': info_duplicados,
+        'tipos_datos': df.dtypes,
+        'categoricas': resumen_categoricas
+    }
+
+def _muestrear_duplicados(df: pd.DataFrame, columna_id: str, codigos: np.ndarray,
+                          conteos: np.ndarray, max_filas: int) -> Dict:
+    """Extrae una muestra acotada de filas con ID duplicado, conservando grupos completos"""
+    ids_repetidos = np.flatnonzero(conteos > 1)
+    filas_acumuladas = np.cumsum(conteos[ids_repetidos])
+    n_ids = max(1, int(np.searchsorted(filas_acumuladas, max_filas, side='right')))
+
+    seleccion = np.zeros(len(conteos) + 1, dtype=bool)
+    seleccion[ids_repetidos[:n_ids]] = True
+    # El índice -1 (faltantes) cae en la última posición, que queda en False
+    posiciones = np.flatnonzero(seleccion[codigos])
+
+    return {
+        'filas_duplicadas': df.iloc[posiciones].sort_values(columna_id, kind='stable'),
+        'filas_duplicadas_totales': int(filas_acumuladas[-1]),
+        'muestra_truncada': n_ids < len(ids_repetidos)
+    }
+
+@instrumentado
+def obtener_estadisticas_por_grupo(df: pd.DataFrame, columna_numerica: str, columna_grupo: str) -> pd.DataFrame:
+    """Conteo, media, desviación, mínimo y máximo de una columna numérica por grupo"""
+    return obtener_estadisticas_por_grupo_multiple(df, [columna_numerica], columna_grupo)[columna_numerica]
+
+@instrumentado
 def obtener_resumen_estadistico(df: pd.DataFrame, columna_numerica: str) -> Dict:
     """Genera resumen estadístico completo para una columna numérica"""
     serie = df[columna_numerica]
@@ -80,4 +336,114 @@ def obtener_resumen_estadistico(df: pd.DataFrame, columna_numerica: str) -> Dict
         'valores_cero': valores_cero,
         'outliers_superiores': outliers_superiores,
         'percentiles_extremos': percentiles_extremos
-    }
\ No newline at end of file
+    }
+
+@instrumentado
+def obtener_estadisticas_por_grupo_multiple(df: pd.DataFrame, columnas_numericas: list,
+                                            columna_grupo: str) -> Dict[str, pd.DataFrame]:
+    """``obtener_estadisticas_por_grupo`` para varias columnas sobre el índice de grupos.
+
+    El índice (posiciones ordenadas por grupo) se construye una vez por DataFrame y
+    factor; cada columna se reordena una vez y se reduce por rebanadas contiguas.
+    """
+    from etl_data.indice_grupos import obtener_indice_grupos
+
+    indice = obtener_indice_grupos(df, [columna_grupo])
+    return {columna: indice.estadisticas(columna) for columna in columnas_numericas}
+
+@instrumentado
+def obtener_resumen_estadistico_multiple(df: pd.DataFrame, columnas_numericas: list) -> Dict[str, Dict]:
+    """``obtener_resumen_estadistico`` para varias columnas a la vez.
+
+    Cada estadístico se calcula con una operación de pandas sobre el bloque de
+    columnas (describe, asimetría, curtosis, cuantiles y conteos), no con un
+    recorrido completo por métrica.
+    """
+    bloque = df[list(columnas_numericas)]
+    estadisticas = bloque.describe()
+    asimetria = bloque.skew()
+    curtosis = bloque.kurtosis()
+
+    riq = estadisticas.loc['75%'] - estadisticas.loc['25%']
+    outliers_superiores = (bloque > estadisticas.loc['75%'] + 1.5 * riq).sum()
+    valores_negativos = (bloque < 0).sum()
+    valores_cero = (bloque == 0).sum()
+
+    percentiles = [0.01, 0.05, 0.10, 0.90, 0.95, 0.99]
+    cuantiles = bloque.quantile(percentiles)
+
+    resumenes = {}
+    for columna in columnas_numericas:
+        descriptivas = estadisticas[columna]
+        resumenes[columna] = {
+            'estadisticas_descriptivas': descriptivas,
+            'asimetria': asimetria[columna],
+            'curtosis': curtosis[columna],
+            'cv_porcentaje': (descriptivas['std'] / descriptivas['mean']) * 100,
+            'rango': descriptivas['max'] - descriptivas['min'],
+            'riq': riq[columna],
+            'valores_negativos': valores_negativos[columna],
+            'valores_cero': valores_cero[columna],
+            'outliers_superiores': outliers_superiores[columna],
+            'percentiles_extremos': {f"{p*100:.1f}%": cuantiles.loc[p, columna] for p in percentiles}
+        }
+    return resumenes
+
+def construir_resumen_estadistico(momentos: AcumuladorMomentos, sketch: SketchCuantiles,
+                                  nombre_columna: Optional[str] = None) -> Dict:
+    """Arma el resumen de ``obtener_resumen_estadistico`` a partir de acumuladores combinables.
+
+    Media, desviación, asimetría, curtosis, extremos, negativos y ceros son exactos.
+    Cuartiles y percentiles tienen el error relativo del sketch, y el conteo de
+    outliers solo puede fallar en las observaciones de la cubeta que contiene el umbral.
+    """
+    q1, mediana, q3 = sketch.cuantiles([0.25, 0.50, 0.75])
+    estadisticas = pd.Series({
+        'count': float(momentos.n),
+        'mean': momentos.media,
+        'std': momentos.desviacion,
+        'min': momentos.minimo,
+        '25%': q1,
+        '50%': mediana,
+        '75%': q3,
+        'max': momentos.maximo
+    }, name=nombre_columna)
+
+    riq = q3 - q1
+    percentiles = [0.01, 0.05, 0.10, 0.90, 0.95, 0.99]
+    valores_percentiles = sketch.cuantiles(percentiles)
+    percentiles_extremos = {f"{p*100:.1f}%": v for p, v in zip(percentiles, valores_percentiles)}
+
+    return {
+        'estadisticas_descriptivas': estadisticas,
+        'asimetria': momentos.asimetria,
+        'curtosis': momentos.curtosis,
+        'cv_porcentaje': (estadisticas['std'] / estadisticas['mean']) * 100,
+        'rango': estadisticas['max'] - estadisticas['min'],
+        'riq': riq,
+        'valores_negativos': momentos.negativos,
+        'valores_cero': momentos.ceros,
+        'outliers_superiores': sketch.contar_mayores(q3 + 1.5 * riq),
+        'percentiles_extremos': percentiles_extremos
+    }
+
+@instrumentado
+def obtener_resumen_estadistico_streaming(ruta_archivo: str, columna_numerica: str,
+                                          tamano_bloque: int = 1_000_000,
+                                          error_relativo: float = 0.01) -> Dict:
+    """Genera el resumen estadístico leyendo el CSV por bloques, con memoria acotada.
+
+    Devuelve las mismas claves que ``obtener_resumen_estadistico``. Solo se mantiene
+    en memoria un bloque de ``tamano_bloque`` filas de la columna y el estado de los
+    acumuladores; los cuantiles tienen un error relativo de ``error_relativo``.
+    """
+    momentos = AcumuladorMomentos()
+    sketch = SketchCuantiles(error_relativo)
+    lector = pd.read_csv(ruta_archivo, usecols=[columna_numerica],
+                         dtype={columna_numerica: 'float64'}, chunksize=tamano_bloque)
+    with lector:
+        for bloque in lector:
+            valores = bloque[columna_numerica].to_numpy()
+            momentos.actualizar(valores)
+            sketch.actualizar(valores)
+    return construir_resumen_estadistico(momentos, sketch, columna_numerica)
\ No newline at end of file
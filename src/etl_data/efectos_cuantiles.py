@@ -0,0 +1,166 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+from etl_data.acumuladores import SketchCuantiles
+from etl_data.indice_grupos import obtener_indice_grupos
+from utils.instrumentacion import instrumentado
+
+# Cuantiles y proporciones recortadas por cola que se reportan por defecto
+CUANTILES = (0.5, 0.9, 0.99)
+RECORTES = (0.05, 0.1)
+
+# Memoria máxima (bytes) de las matrices de conteos remuestreados de un lote
+MAX_BYTES_LOTE = 256 * 1024 ** 2
+
+# Desde este conteo una cubeta se remuestrea con la aproximación normal de la Poisson
+MIN_CONTEO_NORMAL = 30
+
+
+def _nombres_estadisticos(cuantiles: Sequence[float], recortes: Sequence[float]) -> List[str]:
+    return ([f"P{q * 100:g}" for q in cuantiles]
+            + [f"media recortada {p:.0%}" if p > 0 else "media" for p in recortes])
+
+def _estadisticos_exactos(valores: np.ndarray, cuantiles: Sequence[float], recortes: Sequence[float]) -> np.ndarray:
+    """Cuantiles (interpolación lineal, como ``np.quantile``) y medias recortadas (como
+    ``scipy.stats.trim_mean``) de una celda con un solo ``np.partition``, sin ordenar"""
+    n = len(valores)
+    posiciones = np.asarray(cuantiles, dtype=np.float64) * (n - 1)
+    abajo = np.floor(posiciones).astype(np.int64)
+    arriba = np.minimum(abajo + 1, n - 1)
+    cortes = np.array([int(p * n) for p in recortes], dtype=np.int64)
+    kth = np.unique(np.concatenate([abajo, arriba, cortes, n - cortes - 1]))
+    particion = np.partition(valores, kth)
+
+    fraccion = posiciones - abajo
+    resultado = list(particion[abajo] * (1 - fraccion) + particion[arriba] * fraccion)
+    resultado += [particion[corte:n - corte].mean() for corte in cortes]
+    return np.array(resultado)
+
+def _conteos_poisson(rng: np.random.Generator, conteos: np.ndarray, n_replicas: int) -> np.ndarray:
+    """Conteos de ``n_replicas`` réplicas del bootstrap de Poisson, con forma (réplicas, cubetas).
+
+    Se devuelven en float64 (enteros exactos) para acumularlos sin conversiones. La
+    aproximación normal se recorta en cero: un conteo negativo rompería los acumulados
+    crecientes de ``_estadisticos_conteos``.
+    """
+    media = conteos.astype(np.float64)
+    resultado = np.rint(media + np.sqrt(media) * rng.standard_normal((n_replicas, len(media))))
+    np.maximum(resultado, 0, out=resultado)
+    pequenas = np.flatnonzero(media < MIN_CONTEO_NORMAL)
+    if len(pequenas):
+        resultado[:, pequenas] = rng.poisson(media[pequenas], size=(n_replicas, len(pequenas)))
+    return resultado
+
+def _estadisticos_conteos(representantes: np.ndarray, conteos: np.ndarray, cuantiles: Sequence[float],
+                          recortes: Sequence[float]) -> np.ndarray:
+    """Los mismos estadísticos sobre cubetas de un sketch, para cada fila de ``conteos``.
+
+    ``conteos`` tiene forma (réplicas, cubetas). Los acumulados de todas las filas se
+    desplazan para formar un solo arreglo creciente, así que cada rango de todas las
+    réplicas se ubica con un ``searchsorted``: O(cubetas) por réplica y no O(filas).
+    """
+    n_replicas, n_cubetas = conteos.shape
+    acumulado = np.cumsum(conteos, axis=1)
+    n = acumulado[:, -1]
+    filas = np.arange(n_replicas)
+    desplazamiento = filas * (n.max() + 1)
+    plano = (acumulado + desplazamiento[:, None]).ravel()
+    sumas = np.cumsum(conteos * representantes, axis=1).ravel()
+    acumulado = acumulado.ravel()
+
+    def cubetas_completas(rangos: np.ndarray) -> np.ndarray:
+        """Cubetas de cada fila cuyo acumulado no supera ``rangos``"""
+        return np.searchsorted(plano, rangos + desplazamiento, side='right') - filas * n_cubetas
+
+    def suma_menores(rangos: np.ndarray) -> np.ndarray:
+        """Suma de los ``rangos`` valores más chicos de cada fila"""
+        completas = cubetas_completas(rangos)
+        ultima = filas * n_cubetas + completas - 1
+        previa = np.where(completas > 0, sumas[ultima], 0.0)
+        resto = rangos - np.where(completas > 0, acumulado[ultima], 0)
+        return previa + resto * representantes[np.minimum(completas, n_cubetas - 1)]
+
+    resultado = [representantes[np.minimum(cubetas_completas(np.floor(q * (n - 1))), n_cubetas - 1)]
+                 for q in cuantiles]
+    for p in recortes:
+        corte = np.floor(p * n)
+        resultado.append((suma_menores(n - corte) - suma_menores(corte)) / (n - 2 * corte))
+    return np.column_stack(resultado)
+
+@instrumentado
+def efectos_cuantiles(df: pd.DataFrame, respuesta: str, bloque: str = 'management', tratamiento: str = 'group',
+                      nivel_tratamiento: str = 'Test', nivel_control: str = 'Control',
+                      cuantiles: Sequence[float] = CUANTILES, recortes: Sequence[float] = RECORTES,
+                      n_remuestras: int = 1_000, alpha: float = 0.05, semilla: Optional[int] = None,
+                      error_relativo: float = 0.01, max_bytes_lote: int = MAX_BYTES_LOTE) -> Dict:
+    """Efectos Tratamiento - Control en cuantiles y medias recortadas, estratificados por bloque.
+
+    En cada celda (bloque, grupo) los estadísticos observados son exactos y salen de
+    un ``np.partition`` sobre la rebanada del índice de grupos. El efecto de cada
+    bloque es la diferencia de estadísticos y el total pondera los bloques por tamaño,
+    como la diferencia estratificada de ``inferencia``.
+
+    El bootstrap no reordena filas. Cada celda se resume en un ``SketchCuantiles``
+    (combinable, con ``error_relativo`` sobre los valores) y cada réplica es un
+    bootstrap de Poisson sobre los conteos de sus cubetas (normal en las cubetas con
+    al menos ``MIN_CONTEO_NORMAL`` conteos). El IC es percentil: se
+    toman las desviaciones de las réplicas respecto al estadístico del propio sketch
+    y se suman al efecto exacto.
+    """
+    indice = obtener_indice_grupos(df, [bloque, tratamiento])
+    y = indice.valores(respuesta).astype(np.float64, copy=False)
+    codigos = [indice.niveles[1].get_loc(nivel) for nivel in (nivel_control, nivel_tratamiento)]
+    nombres = _nombres_estadisticos(cuantiles, recortes)
+
+    celdas, bloques = [], []
+    for b, nivel_bloque in enumerate(indice.niveles[0]):
+        valores = [y[indice.rango(b, codigo)] for codigo in codigos]
+        valores = [v[np.isfinite(v)] for v in valores]
+        if all(len(v) for v in valores):
+            celdas.append(valores)
+            bloques.append(nivel_bloque)
+    if not celdas:
+        raise ValueError(f"Ningún bloque de {bloque} tiene observaciones de ambos grupos")
+
+    n = np.array([[len(v) for v in par] for par in celdas])
+    pesos = n.sum(axis=1) / n.sum()
+    exactos = np.array([[_estadisticos_exactos(v, cuantiles, recortes) for v in par] for par in celdas])
+    diferencias = exactos[:, 1] - exactos[:, 0]
+    estimacion = pesos @ diferencias
+
+    rng = np.random.default_rng(semilla)
+    replicas = np.zeros((n_remuestras, len(nombres)))
+    for peso, par in zip(pesos, celdas):
+        for signo, valores in zip((-1, 1), par):
+            representantes, conteos = SketchCuantiles(error_relativo).actualizar(valores).cubetas()
+            centro = _estadisticos_conteos(representantes, conteos[None, :], cuantiles, recortes)[0]
+            tamano_lote = max(1, max_bytes_lote // (24 * len(conteos)))
+            for desde in range(0, n_remuestras, tamano_lote):
+                hasta = min(n_remuestras, desde + tamano_lote)
+                remuestreados = _conteos_poisson(rng, conteos, hasta - desde)
+                replicas[desde:hasta] += signo * peso * (
+                    _estadisticos_conteos(representantes, remuestreados, cuantiles, recortes) - centro)
+
+    desvio_inferior, desvio_superior = np.quantile(replicas, [alpha / 2, 1 - alpha / 2], axis=0)
+    efectos = pd.DataFrame({
+        'control': pesos @ exactos[:, 0],
+        'tratamiento': pesos @ exactos[:, 1],
+        'estimacion': estimacion,
+        'error_estandar': replicas.std(axis=0, ddof=1),
+        'ic_inferior': estimacion + desvio_inferior,
+        'ic_superior': estimacion + desvio_superior
+    }, index=pd.Index(nombres, name='estadistico'))
+
+    por_bloque = pd.DataFrame(diferencias, columns=nombres, index=pd.Index(bloques, name=bloque))
+    return {
+        'efectos': efectos,
+        'por_bloque': por_bloque,
+        'n_control': int(n[:, 0].sum()),
+        'n_tratados': int(n[:, 1].sum()),
+        'n_remuestras': n_remuestras,
+        'nivel_confianza': 1 - alpha,
+        'error_relativo': error_relativo,
+        'nivel_tratamiento': nivel_tratamiento,
+        'nivel_control': nivel_control
+    }
@@ -0,0 +1,112 @@
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from etl_data.eda import cargar_datos
+
+# Archivo con las especificaciones de los experimentos (relativo a la raíz del proyecto)
+ARCHIVO_EXPERIMENTOS = os.path.join('config', 'experimentos.json')
+
+
+@dataclass(frozen=True)
+class EspecificacionExperimento:
+    """Descripción declarativa de un experimento RCBD: archivo, columnas, niveles y métricas"""
+
+    nombre: str
+    archivo: str
+    columna_id: str = 'client_id'
+    bloque: str = 'management'
+    tratamiento: str = 'group'
+    nivel_tratamiento: str = 'Test'
+    nivel_control: str = 'Control'
+    metricas: Tuple[str, ...] = ('htls',)
+    # Servir las columnas desde un almacén .npy mapeado en memoria (extractos pesados)
+    memoria_mapeada: bool = False
+    # Estado del monitor del experimento en curso (un subdirectorio por métrica) para el análisis secuencial
+    directorio_monitor: Optional[str] = None
+    # CSV del periodo previo (ID y las mismas métricas) para el ajuste CUPED
+    archivo_pre: Optional[str] = None
+
+    def __post_init__(self):
+        # Acepta listas (JSON) pero guarda una tupla: la especificación es inmutable y sirve como clave de caché
+        object.__setattr__(self, 'metricas', tuple(self.metricas))
+        if not self.metricas:
+            raise ValueError(f"El experimento '{self.nombre}' no define métricas")
+
+    @property
+    def categoricas(self) -> List[str]:
+        return [self.bloque, self.tratamiento]
+
+    @property
+    def columnas(self) -> List[str]:
+        """Columnas que se leen del archivo"""
+        return [self.columna_id, *self.categoricas, *self.metricas]
+
+    def tipos_columnas(self) -> Dict[str, str]:
+        """Tipos explícitos de lectura: ID entero, factores categóricos y métricas float32"""
+        tipos = {self.columna_id: 'int64', self.bloque: 'category', self.tratamiento: 'category'}
+        tipos.update({metrica: 'float32' for metrica in self.metricas})
+        return tipos
+
+    @staticmethod
+    def columna_log(metrica: str) -> str:
+        return f"{metrica}_log"
+
+    def abrir_monitor(self, metrica: str):
+        """Monitor incremental de ``metrica`` en ``directorio_monitor`` (se crea si no existe)"""
+        from etl_data.monitor import MonitorExperimento
+        return MonitorExperimento.abrir(os.path.join(self.directorio_monitor, metrica), respuesta=metrica,
+                                        columna_id=self.columna_id, bloque=self.bloque,
+                                        tratamiento=self.tratamiento, nivel_tratamiento=self.nivel_tratamiento,
+                                        nivel_control=self.nivel_control)
+
+    @classmethod
+    def desde_dict(cls, datos: Dict) -> "EspecificacionExperimento":
+        return cls(**datos)
+
+    def a_dict(self) -> Dict:
+        datos = asdict(self)
+        datos['metricas'] = list(self.metricas)
+        return datos
+
+
+# Experimento de la prueba técnica (el que usaba la página antes de las especificaciones)
+EXPERIMENTO_TEST = EspecificacionExperimento(nombre='Prueba técnica (HTLS)', archivo='data/raw/test.csv')
+
+def cargar_especificaciones(ruta: str = ARCHIVO_EXPERIMENTOS) -> List[EspecificacionExperimento]:
+    """Lee las especificaciones de un JSON (lista o ``{"experimentos": [...]}``).
+
+    Las rutas de archivo relativas se interpretan respecto del directorio de trabajo.
+    Si el archivo no existe se devuelve solo el experimento de la prueba técnica.
+    """
+    if not os.path.exists(ruta):
+        return [EXPERIMENTO_TEST]
+    with open(ruta, encoding='utf-8') as archivo:
+        contenido = json.load(archivo)
+    experimentos = contenido['experimentos'] if isinstance(contenido, dict) else contenido
+    return [EspecificacionExperimento.desde_dict(datos) for datos in experimentos]
+
+def cargar_datos_experimento(especificacion: EspecificacionExperimento, usar_cache: bool = True) -> pd.DataFrame:
+    """Carga solo las columnas del experimento, con los tipos de la especificación.
+
+    Con ``memoria_mapeada`` (y ``usar_cache``) las columnas y el log de las métricas se
+    sirven desde el almacén mapeado en memoria, compartido entre sesiones y procesos.
+    """
+    if especificacion.memoria_mapeada and usar_cache:
+        from etl_data.almacen_mmap import cargar_datos_mapeados
+        return cargar_datos_mapeados(especificacion.archivo, especificacion.tipos_columnas(),
+                                     especificacion.columnas, list(especificacion.metricas), 'log')
+    return cargar_datos(especificacion.archivo, especificacion.tipos_columnas(), usar_cache,
+                        columnas=especificacion.columnas)
+
+def cargar_datos_pre(especificacion: EspecificacionExperimento, usar_cache: bool = True) -> Optional[pd.DataFrame]:
+    """Carga el ID y las métricas del periodo previo, o None si el experimento no define ``archivo_pre``"""
+    if not especificacion.archivo_pre:
+        return None
+    tipos = {columna: tipo for columna, tipo in especificacion.tipos_columnas().items()
+             if columna == especificacion.columna_id or columna in especificacion.metricas}
+    return cargar_datos(especificacion.archivo_pre, tipos, usar_cache,
+                        columnas=[especificacion.columna_id, *especificacion.metricas])
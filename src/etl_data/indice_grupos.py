@@ -0,0 +1,160 @@
+import weakref
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Tuple
+
+from etl_data.eda import factorizar_columna
+from utils.instrumentacion import instrumentado
+
+_indices_en_memoria: Dict[Tuple, Tuple[weakref.ref, "IndiceGrupos"]] = {}
+
+
+class IndiceGrupos:
+    """Posiciones de las filas ordenadas por los factores, con desplazamientos por grupo.
+
+    Con factores ``[bloque, tratamiento]`` las filas de cada celda quedan contiguas y
+    también las de cada bloque (prefijo de los factores), así que cualquier grupo es
+    una rebanada ``orden[inicio:fin]`` sin máscaras booleanas. El índice solo guarda
+    posiciones: las columnas se reordenan al pedirlas (``valores`` o, por grupo,
+    ``valores_grupo``) y la copia vive lo que la use quien la pidió, así que un
+    DataFrame mapeado en memoria no queda duplicado mientras el índice exista. Las
+    filas con algún factor faltante quedan fuera del índice.
+    """
+
+    def __init__(self, df: pd.DataFrame, factores: List[str]):
+        self.factores = list(factores)
+        codigos, self.niveles = [], []
+        for factor in self.factores:
+            codigos_factor, niveles = factorizar_columna(df[factor])
+            codigos.append(codigos_factor)
+            self.niveles.append(niveles)
+        self.forma = tuple(len(niveles) for niveles in self.niveles)
+
+        validos = np.logical_and.reduce([c >= 0 for c in codigos])
+        plano = np.ravel_multi_index([np.where(validos, c, 0) for c in codigos], self.forma)
+        n_grupos = int(np.prod(self.forma))
+        # Con pocos grupos el ordenamiento estable de numpy sobre enteros chicos es un radix sort O(n)
+        plano = plano.astype(np.min_scalar_type(max(n_grupos - 1, 0)))
+        posiciones = np.flatnonzero(validos) if not validos.all() else None
+        if posiciones is None:
+            orden = np.argsort(plano, kind='stable')
+        else:
+            orden = posiciones[np.argsort(plano[posiciones], kind='stable')]
+        self.orden = orden.astype(np.int32 if len(df) < 2**31 else np.int64)
+
+        conteos = np.bincount(plano[validos], minlength=n_grupos)
+        self.conteos = conteos.reshape(self.forma)
+        self.desplazamientos = np.concatenate([[0], np.cumsum(conteos)])
+        self.n_filas = len(df)
+        self._df = weakref.ref(df)
+
+    def codigos(self, *niveles) -> Tuple[int, ...]:
+        """Códigos de los niveles de los primeros factores"""
+        return tuple(int(self.niveles[i].get_loc(nivel)) for i, nivel in enumerate(niveles))
+
+    def rango(self, *codigos: int) -> slice:
+        """Rebanada del índice de un grupo dado por los códigos de un prefijo de los factores"""
+        resto = int(np.prod(self.forma[len(codigos):]))
+        primero = int(np.ravel_multi_index(codigos, self.forma[:len(codigos)])) * resto if codigos else 0
+        return slice(int(self.desplazamientos[primero]), int(self.desplazamientos[primero + resto]))
+
+    def posiciones(self, *niveles) -> np.ndarray:
+        """Posiciones (vista del índice) de las filas del grupo con esos niveles"""
+        return self.orden[self.rango(*self.codigos(*niveles))]
+
+    def _columna(self, columna: str) -> np.ndarray:
+        df = self._df()
+        if df is None:
+            raise ReferenceError("El DataFrame del índice ya no existe")
+        return df[columna].to_numpy()
+
+    def valores(self, columna: str) -> np.ndarray:
+        """Columna completa reordenada según el índice (copia nueva, no se guarda en el índice)"""
+        return self._columna(columna)[self.orden]
+
+    def valores_grupo(self, columna: str, *codigos: int) -> np.ndarray:
+        """Valores de ``columna`` en el grupo dado por los códigos de un prefijo de los factores"""
+        return self._columna(columna)[self.orden[self.rango(*codigos)]]
+
+    def grupos(self, columna: str, n_factores: int = None) -> Dict:
+        """Valores de ``columna`` por grupo de los primeros ``n_factores`` factores (no vacíos).
+
+        Con un solo factor las claves son los niveles; con varios, tuplas de niveles.
+        """
+        n_factores = len(self.factores) if n_factores is None else n_factores
+        columna_completa = self._columna(columna)
+        resultado = {}
+        for codigos in np.ndindex(*self.forma[:n_factores]):
+            rango = self.rango(*codigos)
+            if rango.stop > rango.start:
+                niveles = tuple(self.niveles[i][c] for i, c in enumerate(codigos))
+                resultado[niveles[0] if n_factores == 1 else niveles] = columna_completa[self.orden[rango]]
+        return resultado
+
+    def conteos_por(self, n_factores: int = 1) -> pd.Series:
+        """Filas por grupo de los primeros ``n_factores`` factores"""
+        conteos = self.conteos.reshape(self.forma[:n_factores] + (-1,)).sum(axis=-1)
+        if n_factores == 1:
+            indice = pd.Index(self.niveles[0], name=self.factores[0])
+        else:
+            indice = pd.MultiIndex.from_product(self.niveles[:n_factores], names=self.factores[:n_factores])
+        return pd.Series(conteos.ravel(), index=indice)
+
+    def estadisticas(self, columna: str, n_factores: int = 1) -> pd.DataFrame:
+        """Conteo, media, desviación, mínimo y máximo por grupo con ``reduceat`` sobre las rebanadas.
+
+        Mismo formato que ``obtener_estadisticas_por_grupo`` (solo grupos con filas); los
+        NaN de la respuesta se ignoran como en pandas.
+        """
+        valores = self.valores(columna).astype(np.float64, copy=False)
+        resto = int(np.prod(self.forma[n_factores:]))
+        limites = self.desplazamientos[::resto]
+        inicios, tamanos = limites[:-1], np.diff(limites)
+        con_filas = tamanos > 0
+        inicios = inicios[con_filas]
+
+        faltantes = np.isnan(valores)
+        if faltantes.any():
+            ceros = np.where(faltantes, 0.0, valores)
+            n = tamanos[con_filas] - np.add.reduceat(faltantes.astype(np.int64), inicios)
+        else:
+            ceros = valores
+            n = tamanos[con_filas]
+        suma = np.add.reduceat(ceros, inicios)
+        media = np.divide(suma, n, out=np.full(len(n), np.nan), where=n > 0)
+        grupo = np.repeat(np.arange(len(n)), tamanos[con_filas])
+        desvios = np.where(faltantes, 0.0, valores - media[grupo])
+        sc = np.add.reduceat(desvios * desvios, inicios)
+        std = np.sqrt(np.divide(sc, n - 1, out=np.full(len(n), np.nan), where=n > 1))
+
+        indice = self.conteos_por(n_factores).index[con_filas]
+        return pd.DataFrame({
+            'count': n,
+            'mean': media,
+            'std': std,
+            'min': np.fmin.reduceat(valores, inicios),
+            'max': np.fmax.reduceat(valores, inicios)
+        }, index=indice)
+
+
+def _olvidar_indice(clave: Tuple):
+    _indices_en_memoria.pop(clave, None)
+
+@instrumentado
+def obtener_indice_grupos(df: pd.DataFrame, factores: List[str]) -> IndiceGrupos:
+    """Índice de grupos de ``df`` por ``factores``, construido una vez por DataFrame.
+
+    Se memoriza por (DataFrame, factores) como ``agregar_transformaciones``; la entrada
+    se libera cuando el DataFrame deja de existir. Los DataFrames cargados son
+    compartidos e inmutables, así que el índice sigue siendo válido.
+    """
+    clave = (id(df), tuple(factores))
+    en_memoria = _indices_en_memoria.get(clave)
+    if en_memoria is not None and en_memoria[0]() is df:
+        return en_memoria[1]
+
+    indice = IndiceGrupos(df, factores)
+    _indices_en_memoria[clave] = (weakref.ref(df), indice)
+    weakref.finalize(df, _olvidar_indice, clave)
+    return indice
@@ -0,0 +1,221 @@
+import multiprocessing
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from etl_data.indice_grupos import obtener_indice_grupos
+from utils.instrumentacion import instrumentado
+
+# Memoria máxima (bytes) de las matrices de remuestreo de un lote
+MAX_BYTES_LOTE = 256 * 1024 ** 2
+
+# Con claves aleatorias cada permutación cuesta ~26 ns por fila en un núcleo (medido:
+# 200k filas × 1000 permutaciones ≈ 5.2 s; 2M filas × 10k permutaciones ≈ 9 min), así
+# que desde este número de filas × réplicas se reparten en el pool de procesos
+MIN_ELEMENTOS_PARALELO = 200_000_000
+
+# Bloques (o celdas) con a lo sumo esta fracción de valores distintos se remuestrean
+# sobre los conteos de cada valor, en O(valores distintos) por réplica en lugar de O(filas)
+MAX_FRACCION_DISTINTOS = 0.1
+
+def preparar_estratos(df: pd.DataFrame, respuesta: str, tratamiento: str = 'group', bloque: str = 'management',
+                      nivel_tratamiento: str = 'Test', nivel_control: str = 'Control') -> Dict:
+    """Ordena la respuesta por (bloque, tratamiento) para remuestrear con rebanadas contiguas.
+
+    Solo se conservan los bloques con observaciones en ambos grupos. Dentro de cada
+    bloque quedan primero las filas de control y después las de tratamiento. Las
+    celdas salen como rebanadas del índice de grupos (bloque, tratamiento), que se
+    comparte con las demás funciones que agrupan el mismo DataFrame.
+    """
+    indice = obtener_indice_grupos(df, [bloque, tratamiento])
+    y = indice.valores(respuesta)
+    codigo_control = indice.niveles[1].get_loc(nivel_control)
+    codigo_tratado = indice.niveles[1].get_loc(nivel_tratamiento)
+
+    partes, conteos, bloques = [], [], []
+    for b, nivel_bloque in enumerate(indice.niveles[0]):
+        control = y[indice.rango(b, codigo_control)]
+        tratados = y[indice.rango(b, codigo_tratado)]
+        control, tratados = control[~np.isnan(control)], tratados[~np.isnan(tratados)]
+        if len(control) and len(tratados):
+            partes += [control, tratados]
+            conteos.append((len(control), len(tratados)))
+            bloques.append(nivel_bloque)
+    conteos = np.array(conteos, dtype=np.int64).reshape(-1, 2)
+
+    n_bloque = conteos.sum(axis=1)
+    return {
+        'valores': np.concatenate(partes).astype(np.float64) if partes else np.empty(0),
+        'n_control': conteos[:, 0],
+        'n_tratados': conteos[:, 1],
+        'inicios': np.concatenate([[0], np.cumsum(n_bloque)[:-1]]),
+        'pesos': n_bloque / n_bloque.sum(),
+        'bloques': bloques
+    }
+
+def _diferencia_estratificada(suma_tratados: np.ndarray, suma_control: np.ndarray, estratos: Dict) -> np.ndarray:
+    """Diferencia de medias Tratamiento - Control ponderada por tamaño de bloque"""
+    diferencias = suma_tratados / estratos['n_tratados'] - suma_control / estratos['n_control']
+    return diferencias @ estratos['pesos']
+
+def _sumas_por_bloque(valores: np.ndarray, estratos: Dict):
+    """Sumas observadas de control y tratamiento por bloque"""
+    suma_control, suma_tratados = [], []
+    for inicio, n_c, n_t in zip(estratos['inicios'], estratos['n_control'], estratos['n_tratados']):
+        suma_control.append(valores[inicio:inicio + n_c].sum())
+        suma_tratados.append(valores[inicio + n_c:inicio + n_c + n_t].sum())
+    return np.array(suma_tratados), np.array(suma_control)
+
+def _conteos_valores(y: np.ndarray):
+    """Valores distintos y sus conteos si son pocos frente a las filas; (None, None) si no"""
+    distintos, conteos = np.unique(y, return_counts=True)
+    if len(distintos) > MAX_FRACCION_DISTINTOS * len(y):
+        return None, None
+    return distintos, conteos
+
+def _replicas(valores: np.ndarray, estratos: Dict, tipo: str, n_replicas: int,
+              semilla: np.random.SeedSequence, max_bytes: int) -> np.ndarray:
+    """Genera ``n_replicas`` del estadístico en lotes vectorizados de memoria acotada.
+
+    ``permutacion`` baraja las etiquetas dentro de cada bloque y reduce con un
+    producto matricial etiquetas @ valores; ``bootstrap`` remuestrea con reemplazo
+    dentro de cada celda (bloque, grupo). Si el bloque o la celda tiene pocos valores
+    distintos (``MAX_FRACCION_DISTINTOS``), la réplica se sortea sobre los conteos de
+    cada valor: hipergeométrica multivariada para la permutación y multinomial para
+    el bootstrap, con la misma distribución exacta.
+    """
+    rng = np.random.default_rng(semilla)
+    n_bloques = len(estratos['inicios'])
+    suma_tratados = np.empty((n_replicas, n_bloques))
+    suma_control = np.empty((n_replicas, n_bloques))
+
+    for b, (inicio, n_c, n_t) in enumerate(zip(estratos['inicios'], estratos['n_control'], estratos['n_tratados'])):
+        y_bloque = valores[inicio:inicio + n_c + n_t]
+        if tipo == 'permutacion':
+            total = y_bloque.sum()
+            distintos, conteos = _conteos_valores(y_bloque)
+            if distintos is not None:
+                tamano_lote = max(1, max_bytes // (8 * len(distintos)))
+                for desde in range(0, n_replicas, tamano_lote):
+                    hasta = min(n_replicas, desde + tamano_lote)
+                    tratados = rng.multivariate_hypergeometric(conteos, n_t, size=hasta - desde, method='marginals')
+                    suma_tratados[desde:hasta, b] = tratados @ distintos
+                suma_control[:, b] = total - suma_tratados[:, b]
+                continue
+            tamano_lote = max(1, max_bytes // (17 * len(y_bloque)))
+            for desde in range(0, n_replicas, tamano_lote):
+                hasta = min(n_replicas, desde + tamano_lote)
+                # Claves uniformes: las n_t menores de cada fila son una permutación uniforme
+                # de las etiquetas. Un partition O(n) por fila es más barato que Fisher-Yates.
+                claves = rng.random((hasta - desde, len(y_bloque)))
+                umbral = np.partition(claves, n_t - 1, axis=1)[:, n_t - 1:n_t]
+                suma_tratados[desde:hasta, b] = (claves <= umbral) @ y_bloque
+                suma_control[desde:hasta, b] = total - suma_tratados[desde:hasta, b]
+        else:
+            for columna, y_celda in ((suma_control, y_bloque[:n_c]), (suma_tratados, y_bloque[n_c:])):
+                distintos, conteos = _conteos_valores(y_celda)
+                if distintos is not None:
+                    tamano_lote = max(1, max_bytes // (8 * len(distintos)))
+                    for desde in range(0, n_replicas, tamano_lote):
+                        hasta = min(n_replicas, desde + tamano_lote)
+                        sorteo = rng.multinomial(len(y_celda), conteos / len(y_celda), size=hasta - desde)
+                        columna[desde:hasta, b] = sorteo @ distintos
+                    continue
+                tamano_lote = max(1, max_bytes // (16 * len(y_celda)))
+                for desde in range(0, n_replicas, tamano_lote):
+                    hasta = min(n_replicas, desde + tamano_lote)
+                    indices = rng.integers(0, len(y_celda), size=(hasta - desde, len(y_celda)))
+                    columna[desde:hasta, b] = y_celda[indices].sum(axis=1)
+
+    return _diferencia_estratificada(suma_tratados, suma_control, estratos)
+
+def _replicas_compartidas(descriptor, estratos: Dict, tipo: str, n_replicas: int,
+                          semilla: np.random.SeedSequence, max_bytes: int) -> np.ndarray:
+    """Tarea de un worker: réplicas sobre la respuesta publicada en memoria compartida"""
+    from etl_data.paralelo import abrir_arreglo_compartido
+
+    with abrir_arreglo_compartido(descriptor) as valores:
+        return _replicas(valores, estratos, tipo, n_replicas, semilla, max_bytes)
+
+def _generar_replicas(estratos: Dict, tipo: str, n_replicas: int, semilla: Optional[int],
+                      n_workers: Optional[int], max_bytes: int) -> np.ndarray:
+    """Reparte las réplicas entre procesos (o las calcula aquí con ``n_workers=1``).
+
+    Con ``n_workers=None`` se usan todos los núcleos desde ``MIN_ELEMENTOS_PARALELO``
+    filas × réplicas y uno solo por debajo (o dentro de un worker, sin pools anidados).
+    """
+    if n_workers is None:
+        grande = estratos['valores'].size * n_replicas >= MIN_ELEMENTOS_PARALELO
+        n_workers = (os.cpu_count() or 1) if grande and multiprocessing.parent_process() is None else 1
+    n_workers = n_workers or os.cpu_count() or 1
+    semillas = np.random.SeedSequence(semilla).spawn(n_workers)
+    if n_workers == 1:
+        return _replicas(estratos['valores'], estratos, tipo, n_replicas, semillas[0], max_bytes)
+
+    from etl_data.paralelo import arreglo_compartido, dividir_rangos, obtener_pool
+
+    metadatos = {k: v for k, v in estratos.items() if k != 'valores'}
+    with arreglo_compartido(estratos['valores']) as descriptor:
+        pool = obtener_pool(n_workers)
+        futuros = [pool.submit(_replicas_compartidas, descriptor, metadatos, tipo, fin - inicio, s, max_bytes)
+                   for (inicio, fin), s in zip(dividir_rangos(n_replicas, n_workers), semillas)]
+        return np.concatenate([futuro.result() for futuro in futuros])
+
+@instrumentado
+def prueba_permutacion_estratificada(df: pd.DataFrame, respuesta: str, tratamiento: str = 'group',
+                                     bloque: str = 'management', nivel_tratamiento: str = 'Test',
+                                     nivel_control: str = 'Control', n_permutaciones: int = 10_000,
+                                     semilla: Optional[int] = None, n_workers: Optional[int] = None,
+                                     max_bytes_lote: int = MAX_BYTES_LOTE) -> Dict:
+    """Prueba de permutación de la diferencia Tratamiento - Control, permutando dentro de cada bloque.
+
+    El estadístico es la diferencia de medias por bloque ponderada por el tamaño del
+    bloque; el p-valor es bilateral con la corrección (1 + b) / (1 + B).
+    """
+    estratos = preparar_estratos(df, respuesta, tratamiento, bloque, nivel_tratamiento, nivel_control)
+    observado = float(_diferencia_estratificada(*_sumas_por_bloque(estratos['valores'], estratos), estratos))
+    distribucion = _generar_replicas(estratos, 'permutacion', n_permutaciones, semilla, n_workers, max_bytes_lote)
+    extremos = np.count_nonzero(np.abs(distribucion) >= abs(observado))
+
+    return {
+        'estadistico_observado': observado,
+        'p_valor': (1 + extremos) / (1 + n_permutaciones),
+        'n_permutaciones': n_permutaciones,
+        'distribucion': distribucion
+    }
+
+@instrumentado
+def bootstrap_estratificado_diferencia(df: pd.DataFrame, respuesta: str, tratamiento: str = 'group',
+                                       bloque: str = 'management', nivel_tratamiento: str = 'Test',
+                                       nivel_control: str = 'Control', n_remuestras: int = 10_000,
+                                       alpha: float = 0.05, semilla: Optional[int] = None,
+                                       n_workers: Optional[int] = None, max_bytes_lote: int = MAX_BYTES_LOTE) -> Dict:
+    """IC bootstrap percentil de la diferencia Tratamiento - Control, remuestreando dentro de cada celda"""
+    estratos = preparar_estratos(df, respuesta, tratamiento, bloque, nivel_tratamiento, nivel_control)
+    estimacion = float(_diferencia_estratificada(*_sumas_por_bloque(estratos['valores'], estratos), estratos))
+    distribucion = _generar_replicas(estratos, 'bootstrap', n_remuestras, semilla, n_workers, max_bytes_lote)
+    ic_inferior, ic_superior = np.quantile(distribucion, [alpha / 2, 1 - alpha / 2])
+
+    return {
+        'estimacion': estimacion,
+        'error_estandar': float(distribucion.std(ddof=1)),
+        'ic_inferior': float(ic_inferior),
+        'ic_superior': float(ic_superior),
+        'nivel_confianza': 1 - alpha,
+        'n_remuestras': n_remuestras,
+        'distribucion': distribucion
+    }
+
+def verificacion_no_parametrica(df: pd.DataFrame, respuesta: str, tratamiento: str = 'group',
+                                bloque: str = 'management', nivel_tratamiento: str = 'Test',
+                                nivel_control: str = 'Control', n_remuestras: int = 10_000,
+                                semilla: Optional[int] = None, n_workers: Optional[int] = None) -> Dict:
+    """Permutación estratificada y bootstrap por celda con las mismas remuestras (una sola tarea)"""
+    factores = dict(tratamiento=tratamiento, bloque=bloque, nivel_tratamiento=nivel_tratamiento,
+                    nivel_control=nivel_control, semilla=semilla, n_workers=n_workers)
+    return {
+        'permutacion': prueba_permutacion_estratificada(df, respuesta, n_permutaciones=n_remuestras, **factores),
+        'bootstrap': bootstrap_estratificado_diferencia(df, respuesta, n_remuestras=n_remuestras, **factores)
+    }
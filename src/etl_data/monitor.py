@@ -0,0 +1,239 @@
+import os
+import pickle
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from etl_data.acumuladores import AcumuladorMomentos, SketchCuantiles
+from etl_data.eda import construir_resumen_estadistico, factorizar_columna
+from etl_data.rcbd import anova_rcbd_desde_celdas
+from etl_data.secuencial import TAU_MEZCLA, PruebaSecuencial
+
+ARCHIVO_ESTADO = 'estado.pkl'
+
+# Versión del estado persistido; ``MonitorExperimento.__setstate__`` actualiza los anteriores
+VERSION_ESTADO = 1
+
+
+class IndiceIds:
+    """Índice persistente de IDs como tramos ordenados de int64 (estilo LSM).
+
+    Cada lote agrega un tramo ordenado; cuando el último tramo alcanza el tamaño
+    del anterior se fusionan, así que hay O(log n) tramos y cada ID se reescribe
+    O(log n) veces en total. Los tramos se guardan como ``.npy`` y se abren con
+    ``mmap``, de modo que consultar no exige cargar el historial completo. Los tramos
+    reemplazados por una fusión se borran recién con ``borrar_reemplazados``, después
+    de guardar el estado que ya no los referencia.
+    """
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        self.tramos: List[str] = []
+        self.reemplazados: List[str] = []
+        self._siguiente = 0
+
+    def _abrir(self, nombre: str) -> np.ndarray:
+        return np.load(os.path.join(self.directorio, nombre), mmap_mode='r')
+
+    def __len__(self) -> int:
+        return sum(len(self._abrir(nombre)) for nombre in self.tramos)
+
+    def contiene(self, ids: np.ndarray) -> np.ndarray:
+        """Máscara de los ``ids`` que ya están en el índice (búsqueda binaria por tramo)"""
+        presentes = np.zeros(len(ids), dtype=bool)
+        for nombre in self.tramos:
+            tramo = self._abrir(nombre)
+            posiciones = np.searchsorted(tramo, ids)
+            en_rango = posiciones < len(tramo)
+            presentes[en_rango] |= tramo[posiciones[en_rango]] == ids[en_rango]
+        return presentes
+
+    def agregar(self, ids_ordenados: np.ndarray):
+        """Agrega un tramo de IDs nuevos (ordenados y sin repetir) y compacta si corresponde"""
+        if len(ids_ordenados) == 0:
+            return
+        self.tramos.append(self._guardar(ids_ordenados))
+        while len(self.tramos) > 1 and len(self._abrir(self.tramos[-1])) >= len(self._abrir(self.tramos[-2])):
+            ultimo, penultimo = self.tramos.pop(), self.tramos.pop()
+            fusionado = np.concatenate([self._abrir(penultimo), self._abrir(ultimo)])
+            fusionado.sort(kind='stable')
+            self.tramos.append(self._guardar(fusionado))
+            # El estado guardado todavía puede referenciarlos: se borran tras el próximo guardado
+            self.reemplazados += [ultimo, penultimo]
+
+    def borrar_reemplazados(self):
+        """Borra los tramos fusionados; llamar solo con un estado guardado que ya no los referencia"""
+        for nombre in self.reemplazados:
+            try:
+                os.remove(os.path.join(self.directorio, nombre))
+            except FileNotFoundError:
+                pass
+        self.reemplazados = []
+
+    def _guardar(self, ids: np.ndarray) -> str:
+        nombre = f"ids_{self._siguiente:06d}.npy"
+        self._siguiente += 1
+        np.save(os.path.join(self.directorio, nombre), np.asarray(ids, dtype=np.int64))
+        return nombre
+
+
+class MonitorExperimento:
+    """Estado incremental de un experimento en curso, persistido en disco.
+
+    Mantiene por celda (bloque, tratamiento) acumuladores de momentos y sketches
+    de cuantiles de la respuesta original y de su logaritmo, más un índice de IDs
+    para rechazar duplicados. Cada ``actualizar`` cuesta O(lote), no O(historial), y
+    cada ``mirar`` O(celdas). El estado se guarda con ``VERSION_ESTADO``; los guardados
+    con versiones anteriores se actualizan al cargarlos, en ``__setstate__``.
+    """
+
+    def __init__(self, directorio: str, respuesta: str = 'htls', columna_id: str = 'client_id',
+                 bloque: str = 'management', tratamiento: str = 'group',
+                 nivel_tratamiento: str = 'Test', nivel_control: str = 'Control',
+                 error_relativo: float = 0.01):
+        self.directorio = directorio
+        self.respuesta = respuesta
+        self.columna_id = columna_id
+        self.bloque = bloque
+        self.tratamiento = tratamiento
+        self.nivel_tratamiento = nivel_tratamiento
+        self.nivel_control = nivel_control
+        self.error_relativo = error_relativo
+        self.celdas: Dict[Tuple, Dict[str, Tuple[AcumuladorMomentos, SketchCuantiles]]] = {}
+        self.indice_ids = IndiceIds(directorio)
+        self.lotes = 0
+        self.secuencial: Optional[PruebaSecuencial] = None
+        self.version_estado = VERSION_ESTADO
+
+    def __setstate__(self, estado: Dict):
+        """Restaura el estado guardado y lo lleva a ``VERSION_ESTADO``"""
+        if estado.get('version_estado', 0) < 1:
+            # Sin versión: según cuándo se guardó puede faltar la prueba secuencial, la
+            # lista de tramos pendientes de borrar o el conteo de infinitos de los sketches
+            estado.setdefault('secuencial', None)
+            vars(estado['indice_ids']).setdefault('reemplazados', [])
+            for acumuladores in estado['celdas'].values():
+                for _, sketch in acumuladores.values():
+                    vars(sketch).setdefault('infinitos_negativos', 0)
+                    vars(sketch).setdefault('infinitos_positivos', 0)
+        estado['version_estado'] = VERSION_ESTADO
+        self.__dict__.update(estado)
+
+    @classmethod
+    def abrir(cls, directorio: str, **configuracion) -> "MonitorExperimento":
+        """Carga el estado guardado en ``directorio`` o crea uno nuevo con la configuración dada"""
+        ruta = os.path.join(directorio, ARCHIVO_ESTADO)
+        if os.path.exists(ruta):
+            with open(ruta, 'rb') as archivo:
+                monitor = pickle.load(archivo)
+            monitor.directorio = monitor.indice_ids.directorio = directorio
+            return monitor
+        os.makedirs(directorio, exist_ok=True)
+        return cls(directorio, **configuracion)
+
+    def guardar(self):
+        """Persiste el estado de forma atómica (los tramos de IDs ya están en disco).
+
+        Los tramos reemplazados por fusiones se borran solo después de reemplazar el
+        archivo de estado: si el proceso se interrumpe antes, el estado anterior sigue
+        apuntando a archivos existentes.
+        """
+        ruta = os.path.join(self.directorio, ARCHIVO_ESTADO)
+        with open(f"{ruta}.tmp", 'wb') as archivo:
+            pickle.dump(self, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{ruta}.tmp", ruta)
+        self.indice_ids.borrar_reemplazados()
+
+    def _acumuladores(self, celda: Tuple) -> Dict[str, Tuple[AcumuladorMomentos, SketchCuantiles]]:
+        if celda not in self.celdas:
+            self.celdas[celda] = {
+                escala: (AcumuladorMomentos(), SketchCuantiles(self.error_relativo))
+                for escala in ('original', 'log')
+            }
+        return self.celdas[celda]
+
+    def actualizar(self, df_lote: pd.DataFrame, guardar: bool = True) -> Dict:
+        """Incorpora un lote de filas nuevas, rechazando IDs repetidos en el lote o en el historial"""
+        ids = df_lote[self.columna_id].to_numpy(dtype=np.int64)
+        ids_unicos, primeras = np.unique(ids, return_index=True)
+        nuevos = ~self.indice_ids.contiene(ids_unicos)
+        posiciones = np.sort(primeras[nuevos])
+        aceptadas = df_lote.iloc[posiciones]
+
+        codigos_bloque, niveles_bloque = factorizar_columna(aceptadas[self.bloque])
+        codigos_trat, niveles_trat = factorizar_columna(aceptadas[self.tratamiento])
+        y = aceptadas[self.respuesta].to_numpy(dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            y_log = np.where(y > 0, np.log(np.where(y > 0, y, 1.0)), np.nan)
+
+        celda = codigos_bloque.astype(np.int64) * len(niveles_trat) + codigos_trat
+        celda[(codigos_bloque < 0) | (codigos_trat < 0)] = -1
+        orden = np.argsort(celda, kind='stable')
+        codigos, inicios = np.unique(celda[orden], return_index=True)
+        finales = np.append(inicios[1:], len(orden))
+        for codigo, inicio, fin in zip(codigos, inicios, finales):
+            if codigo < 0:
+                continue
+            filas = orden[inicio:fin]
+            clave = (niveles_bloque[codigo // len(niveles_trat)], niveles_trat[codigo % len(niveles_trat)])
+            acumuladores = self._acumuladores(clave)
+            for escala, valores in (('original', y[filas]), ('log', y_log[filas])):
+                momentos, sketch = acumuladores[escala]
+                momentos.actualizar(valores)
+                sketch.actualizar(valores)
+
+        self.indice_ids.agregar(ids_unicos[nuevos])
+        self.lotes += 1
+        if guardar:
+            self.guardar()
+
+        return {
+            'filas_recibidas': len(df_lote),
+            'filas_aceptadas': len(aceptadas),
+            'duplicados_rechazados': len(df_lote) - len(aceptadas)
+        }
+
+    def _combinar(self, escala: str) -> Tuple[AcumuladorMomentos, SketchCuantiles]:
+        momentos = AcumuladorMomentos()
+        sketch = SketchCuantiles(self.error_relativo)
+        for acumuladores in self.celdas.values():
+            momentos.combinar(acumuladores[escala][0])
+            sketch.combinar(acumuladores[escala][1])
+        return momentos, sketch
+
+    def estadisticas_celdas(self, escala: str = 'log') -> pd.DataFrame:
+        """Estadísticos suficientes por celda con el formato de ``rcbd.calcular_estadisticas_celdas``"""
+        filas = []
+        for clave, acumuladores in self.celdas.items():
+            momentos = acumuladores[escala][0]
+            if momentos.n > 0:
+                filas.append((*clave, momentos.n, momentos.media * momentos.n, momentos.media, momentos.m2))
+        celdas = pd.DataFrame(filas, columns=[self.bloque, self.tratamiento, 'n', 'suma', 'media', 'sc_dentro'])
+        return celdas.set_index([self.bloque, self.tratamiento]).sort_index()
+
+    def mirar(self, alpha: float = 0.05, tau: float = TAU_MEZCLA, guardar: bool = True) -> Dict:
+        """Mirada secuencial al efecto en log con el estado acumulado (típicamente una por día).
+
+        ``alpha`` y ``tau`` se fijan en la primera mirada: cambiarlos después
+        invalidaría la cobertura de la secuencia de confianza.
+        """
+        if self.secuencial is None:
+            self.secuencial = PruebaSecuencial(alpha, tau)
+        rcbd = anova_rcbd_desde_celdas(self.estadisticas_celdas('log'), self.nivel_tratamiento, self.nivel_control)
+        self.secuencial.registrar(rcbd['efecto_tratamiento'], rcbd['n_observaciones'])
+        if guardar:
+            self.guardar()
+        return self.secuencial.estado()
+
+    def resumen(self) -> Dict:
+        """Resumen estadístico (original y log) y efecto del tratamiento con el estado acumulado"""
+        nombre_log = f"{self.respuesta}_log"
+        return {
+            'resumen_original': construir_resumen_estadistico(*self._combinar('original'), self.respuesta),
+            'resumen_log': construir_resumen_estadistico(*self._combinar('log'), nombre_log),
+            'rcbd': anova_rcbd_desde_celdas(self.estadisticas_celdas('log'),
+                                            self.nivel_tratamiento, self.nivel_control),
+            'n_ids': len(self.indice_ids),
+            'lotes': self.lotes
+        }
@@ -0,0 +1,165 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from etl_data.acumuladores import AcumuladorMomentos, SketchCuantiles
+from etl_data.eda import construir_resumen_estadistico, obtener_resumen_estadistico
+from etl_data.transformaciones import obtener_estadisticas_comparativas
+from utils.instrumentacion import instrumentado
+
+# Por debajo de este número de filas el costo de repartir supera al de calcular en un solo proceso
+MIN_FILAS_PARALELO = 2_000_000
+
+_pool: Optional[ProcessPoolExecutor] = None
+_workers_pool = 0
+_candado_pool = threading.Lock()
+
+def obtener_pool(n_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Devuelve un pool de procesos reutilizable entre llamadas (y reruns de Streamlit)"""
+    global _pool, _workers_pool
+    n_workers = n_workers or os.cpu_count() or 1
+    # Las tareas en segundo plano de varias sesiones pueden pedir el pool a la vez
+    with _candado_pool:
+        if _pool is None or _workers_pool != n_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # 'spawn' evita hacer fork de un servidor con hilos (Streamlit)
+            _pool = ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn'))
+            _workers_pool = n_workers
+        return _pool
+
+def dividir_rangos(n_filas: int, n_partes: int) -> List[Tuple[int, int]]:
+    """Divide ``n_filas`` en ``n_partes`` rangos contiguos [inicio, fin)"""
+    limites = np.linspace(0, n_filas, max(1, n_partes) + 1).astype(np.int64)
+    return [(int(a), int(b)) for a, b in zip(limites[:-1], limites[1:]) if b > a]
+
+def _archivo_mapeado(valores: np.ndarray) -> Optional[Tuple[str, int]]:
+    """Archivo y desplazamiento en bytes si ``valores`` es una vista contigua de un ``np.memmap``"""
+    base = valores
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    if base is None or base.filename is None or not valores.flags['C_CONTIGUOUS']:
+        return None
+    desplazamiento = valores.__array_interface__['data'][0] - base.__array_interface__['data'][0]
+    return base.filename, base.offset + desplazamiento
+
+@contextmanager
+def arreglo_compartido(valores: np.ndarray):
+    """Copia un arreglo a memoria compartida y entrega un descriptor que los procesos pueden abrir.
+
+    Si el arreglo ya está mapeado desde un archivo (almacén en memoria mapeada) no se
+    copia: el descriptor apunta al archivo y los workers lo mapean directamente.
+    """
+    archivo = _archivo_mapeado(valores)
+    if archivo is not None:
+        yield (None, valores.shape, valores.dtype.str, *archivo)
+        return
+    valores = np.ascontiguousarray(valores)
+    memoria = shared_memory.SharedMemory(create=True, size=max(1, valores.nbytes))
+    try:
+        np.ndarray(valores.shape, dtype=valores.dtype, buffer=memoria.buf)[...] = valores
+        yield (memoria.name, valores.shape, valores.dtype.str)
+    finally:
+        memoria.close()
+        memoria.unlink()
+
+@contextmanager
+def abrir_arreglo_compartido(descriptor: tuple):
+    """Abre (sin copiar) un arreglo publicado con ``arreglo_compartido``"""
+    nombre, forma, tipo, *archivo = descriptor
+    if archivo:
+        ruta, desplazamiento = archivo
+        yield np.memmap(ruta, dtype=np.dtype(tipo), mode='r', offset=desplazamiento, shape=forma)
+        return
+    # Los workers comparten el resource tracker del proceso que creó el segmento,
+    # así que adjuntarse no lo registra dos veces ni provoca que se borre antes de tiempo
+    memoria = shared_memory.SharedMemory(name=nombre)
+    arreglo = np.ndarray(forma, dtype=np.dtype(tipo), buffer=memoria.buf)
+    try:
+        yield arreglo
+    finally:
+        del arreglo
+        memoria.close()
+
+def _acumular_particion(descriptor: tuple, inicio: int, fin: int,
+                        error_relativo: Optional[float]):
+    """Tarea de un worker: acumula momentos (y sketch) de una partición del arreglo compartido"""
+    with abrir_arreglo_compartido(descriptor) as valores:
+        parte = valores[inicio:fin]
+        momentos = AcumuladorMomentos().actualizar(parte)
+        sketch = SketchCuantiles(error_relativo).actualizar(parte) if error_relativo else None
+    return momentos, sketch
+
+def acumular_en_paralelo(valores: np.ndarray, n_workers: Optional[int] = None,
+                         error_relativo: Optional[float] = 0.01
+                         ) -> Tuple[AcumuladorMomentos, Optional[SketchCuantiles]]:
+    """Acumula momentos y sketch de cuantiles repartiendo particiones entre procesos.
+
+    El arreglo se publica una vez en memoria compartida; cada worker recibe solo
+    el rango que le toca y devuelve acumuladores pequeños que se combinan al final.
+    Con ``error_relativo=None`` no se construye sketch.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    rangos = dividir_rangos(len(valores), n_workers)
+    momentos = AcumuladorMomentos()
+    sketch = SketchCuantiles(error_relativo) if error_relativo else None
+
+    with arreglo_compartido(valores) as descriptor:
+        pool = obtener_pool(n_workers)
+        futuros = [pool.submit(_acumular_particion, descriptor, inicio, fin, error_relativo)
+                   for inicio, fin in rangos]
+        for futuro in futuros:
+            momentos_parte, sketch_parte = futuro.result()
+            momentos.combinar(momentos_parte)
+            if sketch is not None:
+                sketch.combinar(sketch_parte)
+    return momentos, sketch
+
+@instrumentado
+def obtener_resumen_estadistico_paralelo(df: pd.DataFrame, columna_numerica: str,
+                                         n_workers: Optional[int] = None,
+                                         error_relativo: float = 0.01,
+                                         min_filas: int = MIN_FILAS_PARALELO) -> Dict:
+    """Versión multiproceso de ``obtener_resumen_estadistico``.
+
+    Los momentos coinciden con la versión secuencial salvo redondeo; cuartiles,
+    percentiles y outliers tienen el error relativo del sketch. Con menos de
+    ``min_filas`` filas se usa directamente la versión secuencial exacta.
+    """
+    if len(df) < min_filas or n_workers == 1:
+        return obtener_resumen_estadistico(df, columna_numerica)
+    momentos, sketch = acumular_en_paralelo(df[columna_numerica].to_numpy(), n_workers, error_relativo)
+    return construir_resumen_estadistico(momentos, sketch, columna_numerica)
+
+def _estadisticas_basicas(momentos: AcumuladorMomentos) -> Dict:
+    """Estadísticas de ``obtener_estadisticas_comparativas`` a partir de un acumulador"""
+    return {
+        'media': momentos.media,
+        'std': momentos.desviacion,
+        'asimetria': momentos.asimetria,
+        'curtosis': momentos.curtosis,
+        'min': momentos.minimo,
+        'max': momentos.maximo
+    }
+
+@instrumentado
+def obtener_estadisticas_comparativas_paralelo(df: pd.DataFrame, columna_original: str,
+                                               columna_transformada: str,
+                                               n_workers: Optional[int] = None,
+                                               min_filas: int = MIN_FILAS_PARALELO) -> Dict:
+    """Versión multiproceso de ``obtener_estadisticas_comparativas`` (solo momentos, sin sketch)"""
+    if len(df) < min_filas or n_workers == 1:
+        return obtener_estadisticas_comparativas(df, columna_original, columna_transformada)
+    original, _ = acumular_en_paralelo(df[columna_original].to_numpy(), n_workers, None)
+    transformado, _ = acumular_en_paralelo(df[columna_transformada].to_numpy(), n_workers, None)
+    return {
+        'original': _estadisticas_basicas(original),
+        'transformado': _estadisticas_basicas(transformado)
+    }
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import as_completed
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from etl_data.compactacion import reporte_memoria
+from etl_data.cuped import TablaCovariables, efecto_cuped
+from etl_data.eda import (
+    perfilar_calidad, obtener_estadisticas_por_grupo_multiple, obtener_resumen_estadistico_multiple
+)
+from etl_data.especificacion import EspecificacionExperimento, cargar_datos_experimento, cargar_datos_pre
+from etl_data.paralelo import MIN_FILAS_PARALELO, obtener_pool, obtener_resumen_estadistico_paralelo
+from etl_data.transformaciones import agregar_transformaciones, estadisticas_comparativas_desde_resumenes
+from etl_data.rcbd import anova_rcbd_desde_celdas, calcular_estadisticas_celdas_multiples
+from utils.instrumentacion import instrumentado
+
+ARCHIVO_RESULTADOS = 'resultados.json'
+ARCHIVO_INDICE = 'indice'
+
+
+def a_json(valor):
+    """Convierte recursivamente resultados con tipos de numpy/pandas a tipos serializables en JSON"""
+    if isinstance(valor, dict):
+        return {str(clave): a_json(v) for clave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [a_json(v) for v in valor]
+    if isinstance(valor, pd.DataFrame):
+        return a_json(valor.reset_index().to_dict(orient='records'))
+    if isinstance(valor, pd.Series):
+        return a_json(valor.to_dict())
+    if isinstance(valor, np.ndarray):
+        return a_json(valor.tolist())
+    if isinstance(valor, np.generic):
+        return a_json(valor.item())
+    if isinstance(valor, float) and not np.isfinite(valor):
+        return None
+    if valor is None or isinstance(valor, (str, int, float, bool)):
+        return valor
+    return str(valor)
+
+@instrumentado
+def analizar_experimento(df: pd.DataFrame, especificacion: EspecificacionExperimento,
+                         alpha: float = 0.05, df_pre: Optional[pd.DataFrame] = None,
+                         paralelo: bool = True) -> Dict:
+    """Ejecuta el análisis completo de la página para todas las métricas del experimento.
+
+    Calidad, memoria de la representación compacta, resumen estadístico (original y log), comparación de la transformación,
+    estadísticas por tratamiento y por bloque, y RCBD sobre cada métrica en log. Las
+    métricas se procesan juntas: una copia con todas las columnas log, un resumen
+    sobre el bloque de columnas, un groupby por factor y una acumulación de celdas.
+    Los resultados por métrica quedan en diccionarios indexados por nombre de columna.
+    Con ``df_pre`` (periodo previo) se agrega el efecto ajustado por CUPED. Con
+    ``paralelo=False`` (dentro de un worker del lote) no se abre un pool propio.
+    """
+    metricas = list(especificacion.metricas)
+    columnas_log = [especificacion.columna_log(metrica) for metrica in metricas]
+    columnas = metricas + columnas_log
+    df_transformado, infos = agregar_transformaciones(df, metricas, 'log')
+
+    if paralelo and len(df) >= MIN_FILAS_PARALELO:
+        # Con muchas filas conviene la pasada en paralelo sobre memoria compartida
+        resumenes = {columna: obtener_resumen_estadistico_paralelo(df_transformado, columna) for columna in columnas}
+    else:
+        resumenes = obtener_resumen_estadistico_multiple(df_transformado, columnas)
+
+    celdas = calcular_estadisticas_celdas_multiples(df_transformado, columnas_log,
+                                                    especificacion.bloque, especificacion.tratamiento)
+    rcbd = {}
+    for metrica, columna_log in zip(metricas, columnas_log):
+        try:
+            rcbd[metrica] = anova_rcbd_desde_celdas(celdas[columna_log], especificacion.nivel_tratamiento,
+                                                    especificacion.nivel_control, alpha)
+        except (KeyError, ValueError, np.linalg.LinAlgError) as error:
+            # Un extracto sin ambos grupos o sin bloques completos no invalida el resto del reporte
+            rcbd[metrica] = {'error': f"{type(error).__name__}: {error}"}
+
+    cuped = {}
+    if df_pre is not None:
+        tabla_pre = TablaCovariables.desde_dataframe(df_pre, especificacion.columna_id, metricas)
+        ids = df[especificacion.columna_id].to_numpy()
+        for metrica, columna_log in zip(metricas, columnas_log):
+            try:
+                cuped[metrica] = efecto_cuped(df_transformado, columna_log, tabla_pre.unir(ids, metrica),
+                                              especificacion.bloque, especificacion.tratamiento,
+                                              especificacion.nivel_tratamiento, especificacion.nivel_control, alpha)
+            except (KeyError, ValueError) as error:
+                cuped[metrica] = {'error': f"{type(error).__name__}: {error}"}
+
+    return {
+        'calidad': perfilar_calidad(df, especificacion.columna_id, especificacion.categoricas),
+        'memoria': reporte_memoria(df),
+        'transformaciones': infos,
+        'resumenes': resumenes,
+        'comparaciones': {
+            metrica: estadisticas_comparativas_desde_resumenes(resumenes[metrica], resumenes[columna_log])
+            for metrica, columna_log in zip(metricas, columnas_log)
+        },
+        'estadisticas_tratamiento': obtener_estadisticas_por_grupo_multiple(df_transformado, columnas,
+                                                                             especificacion.tratamiento),
+        'estadisticas_bloque': obtener_estadisticas_por_grupo_multiple(df_transformado, columnas,
+                                                                       especificacion.bloque),
+        'rcbd': rcbd,
+        'cuped': cuped
+    }
+
+def _guardar_figuras(df_transformado: pd.DataFrame, especificacion: EspecificacionExperimento, directorio: str):
+    """Renderiza las figuras de la página como PNG por métrica (backend sin pantalla)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from utils.cache import figura_a_bytes
+    from visual_tools.figuras import crear_graficos_antes_despues, crear_boxplots_categoricas
+
+    for metrica in especificacion.metricas:
+        columna_log = especificacion.columna_log(metrica)
+        figuras = {
+            f'antes_despues_{metrica}.png': crear_graficos_antes_despues(
+                df_transformado, metrica, columna_log, columna_grupo=especificacion.tratamiento),
+            f'boxplots_{metrica}.png': crear_boxplots_categoricas(
+                df_transformado, columna_log, [especificacion.tratamiento, especificacion.bloque])
+        }
+        for nombre, figura in figuras.items():
+            with open(os.path.join(directorio, nombre), 'wb') as archivo:
+                archivo.write(figura_a_bytes(figura))
+
+def _filas_indice(resultados: Dict, especificacion: EspecificacionExperimento) -> List[Dict]:
+    """Métricas clave por (experimento, métrica) para decidir cuáles revisar en la interfaz"""
+    calidad = resultados['calidad']
+    filas = []
+    for metrica in especificacion.metricas:
+        rcbd = resultados['rcbd'][metrica]
+        efecto = rcbd.get('efecto_tratamiento', {})
+        filas.append({
+            'metrica': metrica,
+            'filas': calidad['duplicados']['total_filas'],
+            'duplicados': calidad['duplicados']['cantidad_duplicados'],
+            'faltantes': calidad['faltantes']['faltantes_por_columna'][metrica],
+            'invalidos_log': resultados['transformaciones'][metrica]['invalidos'],
+            'asimetria': resultados['resumenes'][metrica]['asimetria'],
+            'asimetria_log': resultados['resumenes'][especificacion.columna_log(metrica)]['asimetria'],
+            'efecto_log': efecto.get('estimacion'),
+            'ic_inferior': efecto.get('ic_inferior'),
+            'ic_superior': efecto.get('ic_superior'),
+            'p_valor': efecto.get('p_valor'),
+            'eficiencia_relativa': rcbd.get('eficiencia_relativa'),
+            'error_rcbd': rcbd.get('error'),
+            'efecto_cuped': resultados['cuped'].get(metrica, {}).get('efecto_ajustado', {}).get('estimacion'),
+            'reduccion_varianza_cuped': resultados['cuped'].get(metrica, {}).get('reduccion_varianza')
+        })
+    return filas
+
+def _tabla_larga(tablas: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Une tablas por métrica en una sola, con la métrica como primer nivel del índice"""
+    return pd.concat(tablas, names=['metrica'])
+
+def analizar_archivo(especificacion: EspecificacionExperimento, directorio_salida: str, figuras: bool = True,
+                     usar_cache: bool = True, paralelo: bool = True) -> List[Dict]:
+    """Analiza un experimento y escribe sus resultados en ``directorio_salida``.
+
+    Escribe ``resultados.json``, las tablas (estadísticas por grupo, ANOVA y la muestra
+    de duplicados) en Parquet con una fila por métrica y, con ``figuras``, los gráficos
+    en PNG. Devuelve las filas del índice del lote (una por métrica); un error en el
+    archivo se reporta en la fila en lugar de propagarse. ``paralelo`` se pasa a
+    ``analizar_experimento``.
+    """
+    inicio = time.perf_counter()
+    base = {'experimento': especificacion.nombre, 'archivo': os.path.abspath(especificacion.archivo),
+            'salida': directorio_salida, 'estado': 'ok', 'error': None}
+    try:
+        os.makedirs(directorio_salida, exist_ok=True)
+        df = cargar_datos_experimento(especificacion, usar_cache)
+        resultados = analizar_experimento(df, especificacion, df_pre=cargar_datos_pre(especificacion, usar_cache),
+                                          paralelo=paralelo)
+
+        tablas = {
+            'estadisticas_tratamiento.parquet': _tabla_larga(resultados['estadisticas_tratamiento']),
+            'estadisticas_bloque.parquet': _tabla_larga(resultados['estadisticas_bloque'])
+        }
+        anovas = {metrica: rcbd['tabla_anova'] for metrica, rcbd in resultados['rcbd'].items() if 'tabla_anova' in rcbd}
+        if anovas:
+            tablas['anova.parquet'] = _tabla_larga(anovas)
+        cuped_por_bloque = {metrica: cuped['por_bloque'] for metrica, cuped in resultados['cuped'].items()
+                            if 'por_bloque' in cuped}
+        if cuped_por_bloque:
+            tablas['cuped_por_bloque.parquet'] = _tabla_larga(cuped_por_bloque)
+        duplicados = resultados['calidad']['duplicados'].pop('filas_duplicadas', None)
+        if duplicados is not None:
+            tablas['filas_duplicadas.parquet'] = duplicados
+        for nombre, tabla in tablas.items():
+            tabla.to_parquet(os.path.join(directorio_salida, nombre))
+
+        if figuras:
+            df_transformado, _ = agregar_transformaciones(df, list(especificacion.metricas), 'log')
+            _guardar_figuras(df_transformado, especificacion, directorio_salida)
+
+        with open(os.path.join(directorio_salida, ARCHIVO_RESULTADOS), 'w', encoding='utf-8') as archivo:
+            json.dump(a_json({'especificacion': especificacion.a_dict(), **resultados}),
+                      archivo, indent=2, ensure_ascii=False)
+        filas = [{**base, **fila} for fila in _filas_indice(resultados, especificacion)]
+    except Exception as error:
+        filas = [{**base, 'estado': 'error', 'error': f"{type(error).__name__}: {error}"}]
+    duracion = time.perf_counter() - inicio
+    return [a_json({**fila, 'duracion_s': duracion}) for fila in filas]
+
+def _nombres_salida(especificaciones: List[EspecificacionExperimento]) -> List[str]:
+    """Nombre de carpeta por experimento: el nombre del archivo, desambiguado si se repite en el lote"""
+    bases = [os.path.splitext(os.path.basename(e.archivo))[0] for e in especificaciones]
+    repetidos = {base for base in bases if bases.count(base) > 1}
+    return [
+        f"{base}_{hashlib.blake2b(repr((e.nombre, os.path.abspath(e.archivo))).encode(), digest_size=4).hexdigest()}"
+        if base in repetidos else base
+        for base, e in zip(bases, especificaciones)
+    ]
+
+def analizar_lote(especificaciones: List[EspecificacionExperimento], directorio_salida: str,
+                  n_workers: Optional[int] = None, figuras: bool = True, usar_cache: bool = True,
+                  al_terminar: Optional[Callable[[List[Dict]], None]] = None) -> pd.DataFrame:
+    """Analiza muchos experimentos en paralelo (uno por tarea) y escribe el índice del lote.
+
+    Cada worker carga su archivo una sola vez y todos los pasos y métricas reutilizan
+    ese DataFrame; el índice (``indice.json`` e ``indice.parquet``) resume las métricas
+    clave de cada experimento para elegir cuáles abrir en la interfaz. Con varios
+    workers cada archivo se analiza en un solo proceso: los resúmenes en paralelo de
+    cada worker multiplicarían los procesos por ``cpu_count``.
+    """
+    os.makedirs(directorio_salida, exist_ok=True)
+    destinos = [os.path.join(directorio_salida, nombre) for nombre in _nombres_salida(especificaciones)]
+    n_workers = min(n_workers or os.cpu_count() or 1, max(1, len(especificaciones)))
+
+    filas = []
+    if n_workers == 1:
+        for especificacion, destino in zip(especificaciones, destinos):
+            filas_archivo = analizar_archivo(especificacion, destino, figuras, usar_cache)
+            filas.extend(filas_archivo)
+            if al_terminar:
+                al_terminar(filas_archivo)
+    else:
+        pool = obtener_pool(n_workers)
+        futuros = [pool.submit(analizar_archivo, especificacion, destino, figuras, usar_cache, False)
+                   for especificacion, destino in zip(especificaciones, destinos)]
+        for futuro in as_completed(futuros):
+            filas_archivo = futuro.result()
+            filas.extend(filas_archivo)
+            if al_terminar:
+                al_terminar(filas_archivo)
+
+    indice = pd.DataFrame(filas).sort_values(['archivo', 'experimento'], kind='stable').reset_index(drop=True)
+    with open(os.path.join(directorio_salida, f"{ARCHIVO_INDICE}.json"), 'w', encoding='utf-8') as archivo:
+        json.dump(a_json(indice), archivo, indent=2, ensure_ascii=False)
+    indice.to_parquet(os.path.join(directorio_salida, f"{ARCHIVO_INDICE}.parquet"), index=False)
+    return indice
@@ -0,0 +1,191 @@
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentacion import instrumentado
+
+# Hasta este tamaño de celda se simulan las observaciones; por encima, sus estadísticos suficientes
+MAX_N_DIRECTO = 200
+
+# Memoria máxima (bytes) de la matriz de observaciones simuladas de un lote
+MAX_BYTES_LOTE = 256 * 1024 ** 2
+
+# La normal asimétrica solo alcanza asimetrías |γ| < 0.995
+MAX_ASIMETRIA = 0.99
+
+_RAIZ_2_PI = np.sqrt(2 / np.pi)
+
+
+def parametros_simulacion(resumen_log: Dict, estadisticas_bloque: pd.DataFrame) -> Dict:
+    """Parámetros del simulador a partir de la respuesta en log observada.
+
+    ``resumen_log`` es ``obtener_resumen_estadistico`` de la columna log (aporta la
+    asimetría) y ``estadisticas_bloque`` sus estadísticas por bloque (media y
+    desviación de cada bloque).
+    """
+    asimetria = float(np.clip(resumen_log['asimetria'], -MAX_ASIMETRIA, MAX_ASIMETRIA))
+    return {
+        'bloques': [str(b) for b in estadisticas_bloque.index],
+        'medias_bloque': estadisticas_bloque['mean'].to_numpy(dtype=np.float64),
+        'desviaciones_bloque': estadisticas_bloque['std'].to_numpy(dtype=np.float64),
+        'asimetria': asimetria,
+        'asimetria_observada': float(resumen_log['asimetria'])
+    }
+
+def _delta_normal_asimetrica(asimetria: float) -> float:
+    """δ de la normal asimétrica con esa asimetría (método de momentos)"""
+    g = abs(asimetria) ** (2 / 3)
+    delta = np.sqrt(np.pi / 2 * g / (g + ((4 - np.pi) / 2) ** (2 / 3)))
+    return float(np.sign(asimetria) * delta)
+
+def _errores(rng: np.random.Generator, forma: tuple, delta: float) -> np.ndarray:
+    """Errores estandarizados (media 0, varianza 1) con distribución normal asimétrica"""
+    z = rng.standard_normal(forma)
+    if delta == 0:
+        return z
+    return ((delta * np.abs(rng.standard_normal(forma)) + np.sqrt(1 - delta ** 2) * z - delta * _RAIZ_2_PI)
+            / np.sqrt(1 - (delta * _RAIZ_2_PI) ** 2))
+
+def _curtosis_exceso(delta: float) -> float:
+    m = delta * _RAIZ_2_PI
+    return 2 * (np.pi - 3) * m ** 4 / (1 - m ** 2) ** 2
+
+def _celdas_simuladas(rng: np.random.Generator, parametros: Dict, efecto_log: float, n_celda: int,
+                      n_replicas: int, max_bytes: int):
+    """Medias y SC dentro de cada celda simulada, con forma (réplicas, bloques, 2)"""
+    medias_bloque = parametros['medias_bloque']
+    sigma = parametros['desviaciones_bloque'][None, :, None]
+    delta = _delta_normal_asimetrica(parametros['asimetria'])
+    n_bloques = len(medias_bloque)
+    centros = medias_bloque[None, :, None] + np.array([0.0, efecto_log])[None, None, :]
+
+    if n_celda <= MAX_N_DIRECTO:
+        medias = np.empty((n_replicas, n_bloques, 2))
+        sc = np.empty((n_replicas, n_bloques, 2))
+        tamano_lote = max(1, max_bytes // (3 * 8 * n_bloques * 2 * n_celda))
+        for desde in range(0, n_replicas, tamano_lote):
+            hasta = min(n_replicas, desde + tamano_lote)
+            errores = _errores(rng, (hasta - desde, n_bloques, 2, n_celda), delta)
+            media_errores = errores.mean(axis=-1)
+            desvios = errores - media_errores[..., None]
+            medias[desde:hasta] = centros + sigma * media_errores
+            sc[desde:hasta] = sigma ** 2 * np.einsum('...i,...i->...', desvios, desvios)
+        return medias, sc
+
+    # Celdas grandes: media normal y SC gamma con la varianza de la varianza muestral
+    forma = (n_replicas, n_bloques, 2)
+    medias = centros + sigma / np.sqrt(n_celda) * rng.standard_normal(forma)
+    esperanza = (n_celda - 1) * sigma ** 2
+    varianza = (n_celda - 1) ** 2 * sigma ** 4 * (2 / (n_celda - 1) + _curtosis_exceso(delta) / n_celda)
+    sc = rng.gamma(esperanza ** 2 / varianza, varianza / esperanza, forma)
+    return medias, sc
+
+def _p_valores_rcbd(medias: np.ndarray, sc: np.ndarray, n_celda: int) -> np.ndarray:
+    """p-valor bilateral del efecto del tratamiento en el RCBD balanceado de cada réplica.
+
+    Con n observaciones por celda el efecto es el promedio entre bloques de las
+    diferencias de medias y el error suma la SC dentro y la interacción bloque ×
+    tratamiento de las medias de celda (modelo aditivo).
+    """
+    from scipy import stats
+
+    n_bloques = medias.shape[1]
+    residuos = (medias - medias.mean(axis=2, keepdims=True) - medias.mean(axis=1, keepdims=True)
+                + medias.mean(axis=(1, 2), keepdims=True))
+    gl_error = 2 * n_bloques * n_celda - n_bloques - 1
+    cm_error = (sc.sum(axis=(1, 2)) + n_celda * (residuos ** 2).sum(axis=(1, 2))) / gl_error
+    efecto = (medias[:, :, 1] - medias[:, :, 0]).mean(axis=1)
+    t_valor = efecto / np.sqrt(cm_error * 2 / (n_bloques * n_celda))
+    return 2 * stats.t.sf(np.abs(t_valor), gl_error)
+
+def simular_potencia(parametros: Dict, efecto_log: float, n_por_bloque: int, n_replicas: int = 2000,
+                     alpha: float = 0.05, semilla=None, max_bytes: int = MAX_BYTES_LOTE) -> float:
+    """Potencia del RCBD con ``n_por_bloque`` clientes por bloque (mitad por grupo) y ese efecto en log"""
+    rng = np.random.default_rng(semilla)
+    n_celda = max(2, n_por_bloque // 2)
+    medias, sc = _celdas_simuladas(rng, parametros, efecto_log, n_celda, n_replicas, max_bytes)
+    return float(np.mean(_p_valores_rcbd(medias, sc, n_celda) < alpha))
+
+def _potencia_puntos(parametros: Dict, puntos: List[tuple], n_replicas: int, alpha: float, semillas: List) -> List[float]:
+    """Tarea de un worker: potencia de varios puntos (efecto, tamaño) de la grilla"""
+    return [simular_potencia(parametros, efecto, n, n_replicas, alpha, semilla)
+            for (efecto, n), semilla in zip(puntos, semillas)]
+
+# Grilla de tamaños por bloque cuando ningún aumento tiene tamaño normal finito (solo aumento 0)
+TAMANOS_POR_DEFECTO = (10, 10_000)
+
+def tamano_muestra_normal(parametros: Dict, efecto_log: float, potencia: float = 0.8,
+                          alpha: float = 0.05) -> Optional[int]:
+    """Clientes por bloque según la aproximación normal (referencia y centro de la grilla por defecto).
+
+    Sin efecto no hay tamaño que alcance la potencia: devuelve None.
+    """
+    from scipy import stats
+
+    if efecto_log == 0:
+        return None
+
+    n_bloques = len(parametros['medias_bloque'])
+    varianza = float(np.mean(parametros['desviaciones_bloque'] ** 2))
+    z = stats.norm.ppf(1 - alpha / 2) + stats.norm.ppf(potencia)
+    n_celda = 2 * varianza * z ** 2 / (n_bloques * efecto_log ** 2)
+    return int(2 * np.ceil(n_celda))
+
+@instrumentado
+def curvas_potencia(parametros: Dict, aumentos: List[float], tamanos: Optional[List[int]] = None,
+                    n_replicas: int = 2000, alpha: float = 0.05, objetivo: float = 0.8,
+                    semilla: Optional[int] = None, n_workers: int = 1) -> Dict:
+    """Curvas de potencia sobre una grilla de aumentos relativos de la métrica y tamaños por bloque.
+
+    Un aumento de 0.05 (+5% en la métrica) es un efecto log(1.05) en la escala log
+    que analiza el RCBD. Cada punto simula ``n_replicas`` experimentos completos en
+    arreglos de NumPy; los puntos se reparten entre procesos con ``n_workers > 1``.
+    Sin ``tamanos`` se usa una grilla geométrica alrededor de la aproximación normal.
+    Devuelve la potencia (filas: tamaños, columnas: aumentos), su error Monte Carlo,
+    el menor tamaño de la grilla que alcanza ``objetivo`` y la aproximación normal.
+    Un aumento de 0 estima la tasa de falsos positivos (potencia ≈ ``alpha``).
+    """
+    efectos = {aumento: float(np.log1p(aumento)) for aumento in aumentos}
+    normal = pd.Series({aumento: tamano_muestra_normal(parametros, efecto, objetivo, alpha)
+                        for aumento, efecto in efectos.items()}, name='tamano_normal', dtype=object)
+    if tamanos is None:
+        finitos = normal.dropna()
+        if len(finitos):
+            minimo, maximo = finitos.min() / 4, finitos.max() * 2
+        else:
+            minimo, maximo = TAMANOS_POR_DEFECTO
+        tamanos = np.unique(np.geomspace(max(minimo, 4), max(maximo, 8), 12).round(-1).astype(int) + 2)
+    tamanos = sorted(int(n) for n in tamanos)
+
+    puntos = [(efectos[aumento], n) for n in tamanos for aumento in aumentos]
+    semillas = np.random.SeedSequence(semilla).spawn(len(puntos))
+    n_workers = n_workers or os.cpu_count() or 1
+    if n_workers == 1:
+        valores = _potencia_puntos(parametros, puntos, n_replicas, alpha, semillas)
+    else:
+        from etl_data.paralelo import dividir_rangos, obtener_pool
+
+        pool = obtener_pool(n_workers)
+        futuros = [pool.submit(_potencia_puntos, parametros, puntos[inicio:fin], n_replicas, alpha,
+                               semillas[inicio:fin])
+                   for inicio, fin in dividir_rangos(len(puntos), n_workers)]
+        valores = [valor for futuro in futuros for valor in futuro.result()]
+
+    potencia = pd.DataFrame(np.array(valores).reshape(len(tamanos), len(aumentos)),
+                            index=pd.Index(tamanos, name='n_por_bloque'), columns=list(aumentos))
+    alcanzado = potencia >= objetivo
+    requerido = pd.Series({aumento: (int(alcanzado.index[alcanzado[aumento]][0]) if alcanzado[aumento].any() else None)
+                           for aumento in aumentos}, name='tamano_requerido', dtype=object)
+    return {
+        'potencia': potencia,
+        'error_mc': np.sqrt(potencia * (1 - potencia) / n_replicas),
+        'tamano_requerido': requerido,
+        'tamano_normal': normal,
+        'n_bloques': len(parametros['medias_bloque']),
+        'n_replicas': n_replicas,
+        'alpha': alpha,
+        'objetivo': objetivo,
+        'parametros': parametros
+    }
@@ -0,0 +1,198 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+from etl_data.eda import factorizar_columna
+from utils.instrumentacion import instrumentado
+
+def calcular_estadisticas_celdas(df: pd.DataFrame, respuesta: str, bloque: str = 'management',
+                                 tratamiento: str = 'group') -> pd.DataFrame:
+    """Calcula los estadísticos suficientes por celda (bloque, tratamiento).
+
+    Devuelve, para cada celda con datos, el conteo ``n``, la ``suma``, la ``media`` y
+    la suma de cuadrados dentro de la celda ``sc_dentro``. Se usan códigos enteros y
+    ``np.bincount`` (dos pasadas O(n), sin ordenar); los NaN de la respuesta se ignoran.
+    """
+    return calcular_estadisticas_celdas_multiples(df, [respuesta], bloque, tratamiento)[respuesta]
+
+def calcular_estadisticas_celdas_multiples(df: pd.DataFrame, respuestas: list, bloque: str = 'management',
+                                           tratamiento: str = 'group') -> Dict[str, pd.DataFrame]:
+    """``calcular_estadisticas_celdas`` para varias respuestas con una sola factorización.
+
+    Las respuestas se apilan en una matriz n × m y cada ``np.bincount`` acumula todas
+    a la vez sobre el índice combinado (celda, respuesta); los NaN se descartan por
+    respuesta, así que cada una conserva sus propios conteos.
+    """
+    codigos_bloque, niveles_bloque = factorizar_columna(df[bloque])
+    codigos_trat, niveles_trat = factorizar_columna(df[tratamiento])
+    Y = df[list(respuestas)].to_numpy(dtype=np.float64)
+
+    n_resp = len(respuestas)
+    n_trat = len(niveles_trat)
+    n_celdas = len(niveles_bloque) * n_trat
+    celda = codigos_bloque.astype(np.int64) * n_trat + codigos_trat
+    indice = celda[:, None] * n_resp + np.arange(n_resp)
+    validos = ((codigos_bloque >= 0) & (codigos_trat >= 0))[:, None] & ~np.isnan(Y)
+    if not validos.all():
+        indice, Y = indice[validos], Y[validos]
+    else:
+        indice, Y = indice.ravel(), Y.ravel()
+
+    n = np.bincount(indice, minlength=n_celdas * n_resp)
+    suma = np.bincount(indice, weights=Y, minlength=n_celdas * n_resp)
+    media = np.divide(suma, n, out=np.zeros(n_celdas * n_resp), where=n > 0)
+    desvios = Y - media[indice]
+    sc_dentro = np.bincount(indice, weights=desvios * desvios, minlength=n_celdas * n_resp)
+
+    indice_celdas = pd.MultiIndex.from_product([niveles_bloque, niveles_trat], names=[bloque, tratamiento])
+    resultados = {}
+    for j, respuesta in enumerate(respuestas):
+        celdas = pd.DataFrame({
+            'n': n[j::n_resp],
+            'suma': suma[j::n_resp],
+            'media': media[j::n_resp],
+            'sc_dentro': sc_dentro[j::n_resp]
+        }, index=indice_celdas)
+        resultados[respuesta] = celdas[celdas['n'] > 0]
+    return resultados
+
+def _disenio_celdas(codigos_bloque: np.ndarray, codigos_trat: np.ndarray, n_bloques: int,
+                    n_trat: int, con_bloque: bool, con_trat: bool) -> np.ndarray:
+    """Matriz de diseño a nivel de celda: intercepto y dummies (el nivel 0 es la referencia)"""
+    columnas = [np.ones(len(codigos_bloque))]
+    if con_bloque:
+        columnas += [(codigos_bloque == k).astype(float) for k in range(1, n_bloques)]
+    if con_trat:
+        columnas += [(codigos_trat == k).astype(float) for k in range(1, n_trat)]
+    return np.column_stack(columnas)
+
+def _ajustar_celdas(X: np.ndarray, pesos: np.ndarray, medias: np.ndarray,
+                    sc_dentro: float) -> Tuple[float, np.ndarray, np.ndarray, np.ndarray]:
+    """Mínimos cuadrados ponderados sobre medias de celda.
+
+    Como el diseño es constante dentro de cada celda, el ajuste es idéntico al de
+    OLS sobre las observaciones individuales: SCE = SC dentro + SC de las medias
+    de celda alrededor de los valores ajustados.
+    """
+    xtwx = X.T @ (X * pesos[:, None])
+    inversa = np.linalg.pinv(xtwx)
+    beta = inversa @ (X.T @ (pesos * medias))
+    ajustados = X @ beta
+    sce = sc_dentro + float(np.sum(pesos * (medias - ajustados) ** 2))
+    return sce, beta, inversa, ajustados
+
+def anova_rcbd_desde_celdas(celdas: pd.DataFrame, nivel_tratamiento: str = 'Test',
+                            nivel_control: str = 'Control', alpha: float = 0.05) -> Dict:
+    """ANOVA de dos vías bloque × tratamiento (modelo aditivo) a partir de estadísticos de celda.
+
+    ``celdas`` debe tener un MultiIndex (bloque, tratamiento) y columnas ``n``, ``media``
+    y ``sc_dentro``. Las sumas de cuadrados son de tipo II (cada factor ajustado por el
+    otro), exactas también con celdas desbalanceadas. La eficiencia relativa compara
+    el cuadrado medio del error contra el de un diseño completamente aleatorizado
+    (DCA), con la corrección de Fisher por grados de libertad.
+    """
+    from scipy import stats
+
+    nombre_bloque, nombre_trat = celdas.index.names
+    bloques = celdas.index.get_level_values(0)
+    tratamientos = celdas.index.get_level_values(1)
+
+    # El control va primero para que el coeficiente del tratamiento sea Test - Control
+    niveles_trat = [nivel_control] + [t for t in pd.unique(tratamientos) if t != nivel_control]
+    niveles_bloque = list(pd.unique(bloques))
+    if nivel_control not in set(tratamientos) or nivel_tratamiento not in set(tratamientos):
+        raise ValueError(f"Se requieren los niveles '{nivel_tratamiento}' y '{nivel_control}' en {nombre_trat}")
+
+    codigos_bloque = pd.Index(niveles_bloque).get_indexer(bloques)
+    codigos_trat = pd.Index(niveles_trat).get_indexer(tratamientos)
+    pesos = celdas['n'].to_numpy(dtype=np.float64)
+    medias = celdas['media'].to_numpy(dtype=np.float64)
+    sc_dentro = float(celdas['sc_dentro'].sum())
+
+    n_total = pesos.sum()
+    n_bloques, n_trat = len(niveles_bloque), len(niveles_trat)
+    media_global = float(np.sum(pesos * medias) / n_total)
+    sc_total = sc_dentro + float(np.sum(pesos * (medias - media_global) ** 2))
+
+    def ajustar(con_bloque: bool, con_trat: bool):
+        X = _disenio_celdas(codigos_bloque, codigos_trat, n_bloques, n_trat, con_bloque, con_trat)
+        return _ajustar_celdas(X, pesos, medias, sc_dentro)
+
+    sce_completo, beta, inversa, ajustados = ajustar(True, True)
+    sce_solo_bloque = ajustar(True, False)[0]
+    sce_crd, beta_crd, inversa_crd, _ = ajustar(False, True)
+
+    gl_trat, gl_bloque = n_trat - 1, n_bloques - 1
+    gl_error = int(n_total) - n_bloques - n_trat + 1
+    gl_crd = int(n_total) - n_trat
+    cm_error = sce_completo / gl_error
+    cm_crd = sce_crd / gl_crd
+
+    sc_trat = sce_solo_bloque - sce_completo
+    sc_bloque = sce_crd - sce_completo
+    filas = {
+        f'Tratamiento ({nombre_trat})': (sc_trat, gl_trat),
+        f'Bloque ({nombre_bloque})': (sc_bloque, gl_bloque)
+    }
+    tabla = pd.DataFrame(
+        [[sc, gl, sc / gl, (sc / gl) / cm_error, stats.f.sf((sc / gl) / cm_error, gl, gl_error)]
+         for sc, gl in filas.values()],
+        index=list(filas.keys()), columns=['SC', 'gl', 'CM', 'F', 'p_valor']
+    )
+    tabla.loc['Error'] = [sce_completo, gl_error, cm_error, np.nan, np.nan]
+    tabla.loc['Total'] = [sc_total, int(n_total) - 1, np.nan, np.nan, np.nan]
+
+    # Coeficiente del nivel de tratamiento (posición tras intercepto y dummies de bloque)
+    j_trat = 1 + gl_bloque + niveles_trat.index(nivel_tratamiento) - 1
+    j_trat_crd = niveles_trat.index(nivel_tratamiento)
+    efecto = _efecto_con_ic(beta[j_trat], cm_error * inversa[j_trat, j_trat], gl_error, alpha)
+    efecto_crd = _efecto_con_ic(beta_crd[j_trat_crd], cm_crd * inversa_crd[j_trat_crd, j_trat_crd], gl_crd, alpha)
+
+    correccion = ((gl_error + 1) * (gl_crd + 3)) / ((gl_error + 3) * (gl_crd + 1))
+    celdas_ajustadas = celdas.assign(ajustado=ajustados, residuo_media=medias - ajustados)
+
+    return {
+        'tabla_anova': tabla,
+        'efecto_tratamiento': efecto,
+        'eficiencia_relativa': correccion * cm_crd / cm_error,
+        'modelo_crd': {
+            'sc_error': sce_crd,
+            'gl_error': gl_crd,
+            'cm_error': cm_crd,
+            'efecto_tratamiento': efecto_crd
+        },
+        'celdas': celdas_ajustadas,
+        'media_global': media_global,
+        'n_observaciones': int(n_total),
+        'n_bloques': n_bloques,
+        'n_tratamientos': n_trat,
+        'balanceado': bool(np.unique(pesos).size == 1 and len(pesos) == n_bloques * n_trat),
+        'nivel_tratamiento': nivel_tratamiento,
+        'nivel_control': nivel_control
+    }
+
+def _efecto_con_ic(estimacion: float, varianza: float, gl: int, alpha: float) -> Dict:
+    """Estimación puntual, error estándar, IC t y p-valor bilateral de un coeficiente"""
+    from scipy import stats
+
+    error_estandar = float(np.sqrt(varianza))
+    t_critico = stats.t.ppf(1 - alpha / 2, gl)
+    t_valor = estimacion / error_estandar if error_estandar > 0 else np.nan
+    return {
+        'estimacion': float(estimacion),
+        'error_estandar': error_estandar,
+        'ic_inferior': float(estimacion - t_critico * error_estandar),
+        'ic_superior': float(estimacion + t_critico * error_estandar),
+        'nivel_confianza': 1 - alpha,
+        't_valor': float(t_valor),
+        'p_valor': float(2 * stats.t.sf(abs(t_valor), gl))
+    }
+
+@instrumentado
+def anova_rcbd(df: pd.DataFrame, respuesta: str, bloque: str = 'management', tratamiento: str = 'group',
+               nivel_tratamiento: str = 'Test', nivel_control: str = 'Control',
+               alpha: float = 0.05, celdas: Optional[pd.DataFrame] = None) -> Dict:
+    """ANOVA RCBD en O(n): un agrupamiento a estadísticos de celda y un ajuste de tamaño (bloques × tratamientos)"""
+    if celdas is None:
+        celdas = calcular_estadisticas_celdas(df, respuesta, bloque, tratamiento)
+    return anova_rcbd_desde_celdas(celdas, nivel_tratamiento, nivel_control, alpha)
@@ -0,0 +1,90 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List
+
+# Desviación de la mezcla normal sobre el efecto en log: 0.1 concentra la potencia en efectos de ~±10%
+TAU_MEZCLA = 0.1
+
+
+def log_razon_mezcla(estimacion: float, varianza: float, tau: float = TAU_MEZCLA) -> float:
+    """log Λ del mSPRT con mezcla N(0, τ²) sobre el efecto, para un estimador aproximadamente normal"""
+    tau2 = tau ** 2
+    return 0.5 * np.log(varianza / (varianza + tau2)) + tau2 * estimacion ** 2 / (2 * varianza * (varianza + tau2))
+
+def radio_secuencia_confianza(varianza: float, tau: float = TAU_MEZCLA, alpha: float = 0.05) -> float:
+    """Semiancho de la secuencia de confianza de mezcla normal (inversión del mSPRT).
+
+    A diferencia del IC de horizonte fijo, cubre el efecto con probabilidad 1 - α
+    simultáneamente en todas las miradas, así que se puede consultar cada día.
+    """
+    tau2 = tau ** 2
+    return float(np.sqrt(2 * varianza * (varianza + tau2) / tau2
+                         * (np.log(1 / alpha) + 0.5 * np.log((varianza + tau2) / varianza))))
+
+
+class PruebaSecuencial:
+    """Secuencia de confianza siempre válida para el efecto Tratamiento - Control.
+
+    Cada mirada recibe el efecto RCBD estimado con los estadísticos de celda
+    acumulados (``MonitorExperimento``), así que cuesta O(celdas) y no relee el
+    historial. El intervalo publicado es la intersección de los intervalos de todas
+    las miradas y el p-valor siempre válido es el mínimo de 1/Λ; el experimento se
+    puede detener en cuanto el intervalo excluye el cero, sin inflar la tasa de
+    falsos positivos por mirar repetidamente.
+    """
+
+    def __init__(self, alpha: float = 0.05, tau: float = TAU_MEZCLA):
+        self.alpha = alpha
+        self.tau = tau
+        self.miradas: List[Dict] = []
+
+    def registrar(self, efecto: Dict, n_observaciones: int) -> Dict:
+        """Agrega una mirada con ``efecto`` (formato de ``efecto_tratamiento`` del RCBD)"""
+        estimacion, error_estandar = efecto['estimacion'], efecto['error_estandar']
+        varianza = error_estandar ** 2
+        radio = radio_secuencia_confianza(varianza, self.tau, self.alpha)
+        p_valor = float(min(1.0, np.exp(-log_razon_mezcla(estimacion, varianza, self.tau))))
+        ic_inferior, ic_superior = estimacion - radio, estimacion + radio
+        if self.miradas:
+            anterior = self.miradas[-1]
+            ic_inferior = max(ic_inferior, anterior['ic_inferior'])
+            ic_superior = min(ic_superior, anterior['ic_superior'])
+            p_valor = min(p_valor, anterior['p_valor'])
+
+        detenida = self.detenida
+        if not detenida and (ic_inferior > 0 or ic_superior < 0):
+            detenida = True
+        mirada = {
+            'mirada': len(self.miradas) + 1,
+            'n_observaciones': int(n_observaciones),
+            'estimacion': float(estimacion),
+            'error_estandar': float(error_estandar),
+            'z': float(estimacion / error_estandar),
+            'limite_z': radio / error_estandar,
+            'ic_inferior': float(ic_inferior),
+            'ic_superior': float(ic_superior),
+            'p_valor': p_valor,
+            'detener': detenida
+        }
+        self.miradas.append(mirada)
+        return mirada
+
+    @property
+    def detenida(self) -> bool:
+        return bool(self.miradas) and self.miradas[-1]['detener']
+
+    def historial(self) -> pd.DataFrame:
+        return pd.DataFrame(self.miradas).set_index('mirada') if self.miradas else pd.DataFrame()
+
+    def estado(self) -> Dict:
+        """Última mirada con la decisión: 'continuar', 'detener: efecto positivo' o 'detener: efecto negativo'"""
+        if not self.miradas:
+            return {'decision': 'sin miradas', 'alpha': self.alpha, 'tau': self.tau}
+        ultima = self.miradas[-1]
+        if not ultima['detener']:
+            decision = 'continuar'
+        else:
+            decision = 'detener: efecto positivo' if ultima['ic_inferior'] > 0 else 'detener: efecto negativo'
+        primera_detencion = next((m['mirada'] for m in self.miradas if m['detener']), None)
+        return {**ultima, 'decision': decision, 'mirada_detencion': primera_detencion,
+                'alpha': self.alpha, 'tau': self.tau}
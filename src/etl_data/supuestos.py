@@ -0,0 +1,189 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional
+
+from etl_data.indice_grupos import obtener_indice_grupos
+from utils.instrumentacion import instrumentado
+
+# Tamaño de muestra por defecto del modo interactivo (la página muestrea por encima de este número)
+N_MUESTRA_INTERACTIVA = 200_000
+
+# Desvíos contra los que se declara la potencia del diagnóstico
+ASIMETRIA_MINIMA = 0.5
+RAZON_DESVIACIONES_MINIMA = 1.5
+
+# E|Z| y Var|Z| para Z normal estándar (desviaciones absolutas de Brown-Forsythe)
+_MEDIA_ABS_NORMAL = np.sqrt(2 / np.pi)
+_VARIANZA_ABS_NORMAL = 1 - 2 / np.pi
+
+
+def _cuantil_por_celda(ordenados: np.ndarray, inicios: np.ndarray, n: np.ndarray, q: float) -> np.ndarray:
+    """Cuantil ``q`` (interpolación lineal, como ``np.quantile``) de cada tramo ordenado"""
+    posicion = q * (n - 1)
+    abajo = np.floor(posicion).astype(np.int64)
+    arriba = np.minimum(abajo + 1, n - 1)
+    fraccion = posicion - abajo
+    return ordenados[inicios + abajo] * (1 - fraccion) + ordenados[inicios + arriba] * fraccion
+
+def _anova_una_via(z: np.ndarray, celda: np.ndarray, n: np.ndarray) -> Dict:
+    """F de una vía de ``z`` entre celdas con ``np.bincount`` (base de Levene y Brown-Forsythe)"""
+    from scipy import stats
+
+    k, n_total = len(n), len(z)
+    media_celda = np.bincount(celda, weights=z, minlength=k) / n
+    media_global = z.mean()
+    sc_entre = float(np.sum(n * (media_celda - media_global) ** 2))
+    desvios = z - media_celda[celda]
+    sc_dentro = float(desvios @ desvios)
+    gl_entre, gl_dentro = k - 1, n_total - k
+    estadistico = (sc_entre / gl_entre) / (sc_dentro / gl_dentro) if sc_dentro > 0 else np.nan
+    return {
+        'estadistico': estadistico,
+        'gl': (gl_entre, gl_dentro),
+        'p_valor': float(stats.f.sf(estadistico, gl_entre, gl_dentro))
+    }
+
+def potencia_asimetria(n: int, asimetria: float = ASIMETRIA_MINIMA, alpha: float = 0.05) -> float:
+    """Potencia de la prueba de asimetría (parte de D'Agostino) para detectar ``|asimetría|``.
+
+    Usa el error estándar asintótico de la asimetría muestral, sqrt(6 / n).
+    """
+    from scipy import stats
+
+    desplazamiento = abs(asimetria) / np.sqrt(6 / n)
+    critico = stats.norm.ppf(1 - alpha / 2)
+    return float(stats.norm.cdf(desplazamiento - critico) + stats.norm.cdf(-desplazamiento - critico))
+
+def potencia_brown_forsythe(n_celda: int, n_celdas: int, razon: float = RAZON_DESVIACIONES_MINIMA,
+                            alpha: float = 0.05) -> float:
+    """Potencia de Brown-Forsythe para detectar una celda con desviación ``razon`` veces la del resto.
+
+    Aproximación normal con ``n_celda`` observaciones en cada una de las ``n_celdas``
+    celdas (con la celda más chica es una cota conservadora): el F no central tiene
+    λ = n (2/π) (r - 1)² (k - 1) / k / (1 - 2/π).
+    """
+    from scipy import stats
+
+    if n_celdas < 2:
+        return np.nan
+    gl_entre, gl_dentro = n_celdas - 1, n_celdas * n_celda - n_celdas
+    no_centralidad = (n_celda * _MEDIA_ABS_NORMAL ** 2 * (razon - 1) ** 2 * (n_celdas - 1) / n_celdas
+                      / _VARIANZA_ABS_NORMAL)
+    critico = stats.f.ppf(1 - alpha, gl_entre, gl_dentro)
+    return float(stats.ncf.sf(critico, gl_entre, gl_dentro, no_centralidad))
+
+@instrumentado
+def diagnosticar_supuestos(df: pd.DataFrame, respuesta: str, bloque: str = 'management', tratamiento: str = 'group',
+                           celdas_ajustadas: Optional[pd.DataFrame] = None, nivel_tratamiento: str = 'Test',
+                           nivel_control: str = 'Control', alpha: float = 0.05, n_muestra: Optional[int] = None,
+                           semilla: Optional[int] = None, asimetria_minima: float = ASIMETRIA_MINIMA,
+                           razon_desviaciones_minima: float = RAZON_DESVIACIONES_MINIMA) -> Dict:
+    """Diagnóstico de los residuos del modelo aditivo bloque + tratamiento.
+
+    Normalidad con D'Agostino-Pearson y Anderson-Darling, homocedasticidad entre
+    celdas con Brown-Forsythe (centrado en la mediana) y Levene (centrado en la media),
+    y un resumen de residuos contra ajustados por celda. Todo sale de arreglos
+    ordenados por celda (``IndiceGrupos``) con ``bincount`` y un solo ordenamiento,
+    sin bucles por celda. ``celdas_ajustadas`` es ``anova_rcbd(...)['celdas']``; si
+    falta se ajusta el modelo.
+
+    Con ``n_muestra`` se usa una muestra estratificada por celda de ese tamaño
+    aproximado, y se informa la potencia con la que esa muestra detecta una asimetría
+    de ``asimetria_minima`` o una celda con ``razon_desviaciones_minima`` veces la
+    desviación del resto.
+    """
+    from scipy import stats
+
+    if celdas_ajustadas is None:
+        from etl_data.rcbd import anova_rcbd
+        celdas_ajustadas = anova_rcbd(df, respuesta, bloque, tratamiento, nivel_tratamiento,
+                                      nivel_control, alpha)['celdas']
+
+    indice = obtener_indice_grupos(df, [bloque, tratamiento])
+    y = indice.valores(respuesta).astype(np.float64, copy=False)
+    n_celdas = int(np.prod(indice.forma))
+    celda = np.repeat(np.arange(n_celdas), indice.conteos.ravel())
+    ajustado_celda = (celdas_ajustadas['ajustado']
+                      .reindex(pd.MultiIndex.from_product(indice.niveles, names=[bloque, tratamiento]))
+                      .to_numpy(dtype=np.float64))
+    validos = ~np.isnan(y) & ~np.isnan(ajustado_celda[celda])
+    n_residuos = int(validos.sum())
+
+    muestreado = n_muestra is not None and n_residuos > n_muestra
+    if muestreado:
+        # Bernoulli por fila con probabilidad por celda: cada celda aporta a lo sumo su cupo
+        n_por_celda = np.bincount(celda[validos], minlength=n_celdas)
+        cupo = np.ceil(n_muestra / np.count_nonzero(n_por_celda))
+        probabilidad = np.minimum(1.0, cupo / np.maximum(n_por_celda, 1))
+        validos &= np.random.default_rng(semilla).random(len(y)) < probabilidad[celda]
+
+    # Celdas con residuos, renumeradas de forma contigua
+    n_por_celda = np.bincount(celda[validos], minlength=n_celdas)
+    con_datos = n_por_celda > 0
+    renumeracion = np.cumsum(con_datos) - 1
+    celda = renumeracion[celda[validos]]
+    n = n_por_celda[con_datos]
+    ajustados = ajustado_celda[con_datos]
+    residuos = y[validos] - ajustados[celda]
+
+    # Un ordenamiento (celda, residuo) da medianas y cuartiles de todas las celdas
+    ordenados = residuos[np.lexsort((residuos, celda))]
+    inicios = np.concatenate([[0], np.cumsum(n)[:-1]])
+    mediana = _cuantil_por_celda(ordenados, inicios, n, 0.5)
+    media = np.bincount(celda, weights=residuos) / n
+    desvios = residuos - media[celda]
+    desviacion = np.sqrt(np.divide(np.bincount(celda, weights=desvios * desvios), n - 1,
+                                   out=np.full(len(n), np.nan), where=n > 1))
+
+    brown_forsythe = _anova_una_via(np.abs(residuos - mediana[celda]), celda, n)
+    levene = _anova_una_via(np.abs(desvios), celda, n)
+
+    dagostino = stats.normaltest(residuos)
+    anderson = stats.anderson(residuos, dist='norm')
+    i_alpha = int(np.argmin(np.abs(anderson.significance_level - alpha * 100)))
+    asimetria = float(stats.skew(residuos))
+
+    abs_residuos = np.abs(residuos)
+    ajustados_fila = ajustados[celda]
+    correlacion = (float(np.corrcoef(abs_residuos, ajustados_fila)[0, 1])
+                   if np.ptp(ajustados_fila) > 0 else np.nan)
+
+    niveles = pd.MultiIndex.from_product(indice.niveles, names=[bloque, tratamiento])[con_datos]
+    residuos_por_celda = pd.DataFrame({
+        'ajustado': ajustados,
+        'n': n,
+        'media_residuo': media,
+        'desviacion_residuo': desviacion,
+        'mediana_residuo': mediana,
+        'q1_residuo': _cuantil_por_celda(ordenados, inicios, n, 0.25),
+        'q3_residuo': _cuantil_por_celda(ordenados, inicios, n, 0.75)
+    }, index=niveles).sort_values('ajustado')
+
+    return {
+        'n_residuos': n_residuos,
+        'n_usados': len(residuos),
+        'muestreado': muestreado,
+        'alpha': alpha,
+        'normalidad': {
+            'asimetria': asimetria,
+            'curtosis_exceso': float(stats.kurtosis(residuos)),
+            'dagostino': {'estadistico': float(dagostino.statistic), 'p_valor': float(dagostino.pvalue)},
+            'anderson_darling': {
+                'estadistico': float(anderson.statistic),
+                'valor_critico': float(anderson.critical_values[i_alpha]),
+                'nivel_significancia': float(anderson.significance_level[i_alpha]) / 100,
+                'rechaza': bool(anderson.statistic > anderson.critical_values[i_alpha])
+            },
+            'asimetria_minima': asimetria_minima,
+            'potencia': potencia_asimetria(len(residuos), asimetria_minima, alpha)
+        },
+        'homocedasticidad': {
+            'brown_forsythe': brown_forsythe,
+            'levene': levene,
+            'razon_desviaciones': float(np.nanmax(desviacion) / np.nanmin(desviacion)),
+            'razon_desviaciones_minima': razon_desviaciones_minima,
+            'potencia': potencia_brown_forsythe(int(n.min()), len(n), razon_desviaciones_minima, alpha)
+        },
+        'residuos_por_celda': residuos_por_celda,
+        'correlacion_abs_residuo_ajustado': correlacion
+    }
@@ -1,13 +1,116 @@
+import weakref
+
 import pandas as pd
 import numpy as np
-from typing import Dict
+from typing import Dict, Optional, Tuple
+
+from utils.cache import huella_confiable, marcar_huella
+from utils.instrumentacion import instrumentado
+
+# Sufijo de la columna derivada para cada transformación soportada
+SUFIJOS_TRANSFORMACION = {
+    'log': '_log',
+    'log1p': '_log1p',
+    'boxcox': '_boxcox'
+}
+
+# Tamaño máximo de la muestra usada para estimar lambda de Box-Cox
+MAX_MUESTRA_BOXCOX = 100_000
+
+_transformaciones_en_memoria: Dict[Tuple, Tuple[weakref.ref, pd.DataFrame, Dict[str, Dict]]] = {}
+
+def calcular_transformacion(valores: np.ndarray, metodo: str = 'log',
+                            lmbda: Optional[float] = None) -> Tuple[np.ndarray, Dict]:
+    """Calcula una transformación en float32 y cuenta las entradas inválidas en la misma pasada.
+
+    Las entradas fuera del dominio (<= 0 para log y Box-Cox, <= -1 para log1p, o
+    faltantes) quedan como NaN; la máscara de validez es la misma que usa el ``where``
+    del ufunc, por lo que el conteo no requiere recorrer de nuevo el resultado.
+    """
+    if metodo not in SUFIJOS_TRANSFORMACION:
+        raise ValueError(f"Transformación no soportada: {metodo}")
+
+    valores = np.asarray(valores)
+    resultado = np.full(valores.shape, np.nan, dtype=np.float32)
+    validos = valores > -1 if metodo == 'log1p' else valores > 0
+
+    if metodo == 'log':
+        np.log(valores, out=resultado, where=validos)
+    elif metodo == 'log1p':
+        np.log1p(valores, out=resultado, where=validos)
+    else:
+        if lmbda is None:
+            from scipy import stats
+            muestra = valores[validos]
+            if muestra.size > MAX_MUESTRA_BOXCOX:
+                muestra = np.random.default_rng(0).choice(muestra, MAX_MUESTRA_BOXCOX, replace=False)
+            lmbda = float(stats.boxcox_normmax(muestra.astype(np.float64), method='mle'))
+        if abs(lmbda) < 1e-8:
+            np.log(valores, out=resultado, where=validos)
+        else:
+            np.power(valores, lmbda, out=resultado, where=validos)
+            resultado -= 1
+            resultado /= lmbda
+
+    return resultado, {
+        'metodo': metodo,
+        'lmbda': lmbda,
+        'invalidos': int(valores.size - np.count_nonzero(validos))
+    }
+
+def _olvidar_transformacion(clave: Tuple):
+    _transformaciones_en_memoria.pop(clave, None)
+
+@instrumentado
+def agregar_transformaciones(df: pd.DataFrame, columnas: list, metodo: str = 'log',
+                             lmbda: Optional[float] = None) -> Tuple[pd.DataFrame, Dict[str, Dict]]:
+    """Agrega las columnas transformadas de ``columnas`` sin copiar las existentes.
+
+    El resultado se memoriza por (DataFrame de origen, columnas, transformación), así
+    que llamadas repetidas sobre el mismo DataFrame devuelven el mismo objeto. La
+    entrada se libera cuando el DataFrame de origen deja de existir. Las columnas ya
+    calculadas en disco (``attrs['transformaciones_precalculadas']``, del almacén
+    mapeado en memoria) se mapean en lugar de calcularse y quedan como vistas de solo lectura.
+    """
+    clave = (id(df), tuple(columnas), metodo, lmbda)
+    en_memoria = _transformaciones_en_memoria.get(clave)
+    if en_memoria is not None and en_memoria[0]() is df:
+        return en_memoria[1], en_memoria[2]
+
+    precalculadas = df.attrs.get('transformaciones_precalculadas', {})
+    nuevas, infos = {}, {}
+    for columna in columnas:
+        destino = f'{columna}{SUFIJOS_TRANSFORMACION[metodo]}'
+        guardada = precalculadas.get(destino)
+        if guardada is not None and guardada['metodo'] == metodo and lmbda in (None, guardada['lmbda']):
+            nuevas[destino] = np.load(guardada['archivo'], mmap_mode='r')
+            infos[columna] = {k: v for k, v in guardada.items() if k != 'archivo'}
+        else:
+            nuevas[destino], infos[columna] = calcular_transformacion(df[columna].to_numpy(), metodo, lmbda)
+    # Un solo constructor con copy=False: asignar columna por columna copiaría los
+    # arreglos mapeados a memoria privada y escribible
+    df_transformado = pd.DataFrame({**{col: df[col] for col in df.columns}, **nuevas}, copy=False)
+    df_transformado.attrs = dict(df.attrs)
+    huella = huella_confiable(df)
+    if huella is not None:
+        # Resultado memorizado y determinista del DataFrame cargado: hereda su huella
+        marcar_huella(df_transformado, f"{huella}:{metodo}:{lmbda}:{','.join(columnas)}")
+
+    _transformaciones_en_memoria[clave] = (weakref.ref(df), df_transformado, infos)
+    weakref.finalize(df, _olvidar_transformacion, clave)
+    return df_transformado, infos
+
+def agregar_transformacion(df: pd.DataFrame, columna: str, metodo: str = 'log',
+                           lmbda: Optional[float] = None) -> Tuple[pd.DataFrame, Dict]:
+    """Agrega la columna transformada sin copiar en profundidad las demás columnas"""
+    df_transformado, infos = agregar_transformaciones(df, [columna], metodo, lmbda)
+    return df_transformado, infos[columna]
 
 def aplicar_transformacion_log(df: pd.DataFrame, columna: str) -> pd.DataFrame:
     """Aplica transformación logarítmica a una columna específica"""
-    df_transformado = df.copy()
-    df_transformado[f'{columna}_log'] = np.log(df[columna])
-    return df_transformado
+    return agregar_transformacion(df, columna, 'log')[0]
 
+@instrumentado
 def obtener_estadisticas_comparativas(df: pd.DataFrame, columna_original: str, columna_transformada: str) -> Dict:
     """Compara estadísticas básicas entre datos originales y transformados"""
     
@@ -31,4 +134,19 @@ def obtener_estadisticas_comparativas(df: pd.DataFrame, columna_original: str, c
             'min': transformado.min(),
             'max': transformado.max()
         }
-    }
\ No newline at end of file
+    }
+
+def estadisticas_comparativas_desde_resumenes(resumen_original: Dict, resumen_transformado: Dict) -> Dict:
+    """Arma el resultado de ``obtener_estadisticas_comparativas`` a partir de dos resúmenes ya calculados"""
+    def basicas(resumen: Dict) -> Dict:
+        descriptivas = resumen['estadisticas_descriptivas']
+        return {
+            'media': descriptivas['mean'],
+            'std': descriptivas['std'],
+            'asimetria': resumen['asimetria'],
+            'curtosis': resumen['curtosis'],
+            'min': descriptivas['min'],
+            'max': descriptivas['max']
+        }
+
+    return {'original': basicas(resumen_original), 'transformado': basicas(resumen_transformado)}
@@ -0,0 +1,352 @@
+import contextlib
+import functools
+import hashlib
+import inspect
+import io
+import os
+import pickle
+import shutil
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentacion import instrumentado
+
+# Directorio del caché persistente (se puede cambiar con la variable de entorno)
+DIRECTORIO_CACHE = os.environ.get('ANALISIS_CACHE_DIR', os.path.join('.cache', 'resultados'))
+
+# Entradas máximas del caché en memoria (política LRU)
+MAX_ENTRADAS_MEMORIA = 64
+
+# Tamaño máximo del caché en disco; al superarlo se borran los resultados menos usados
+MAX_MB_DISCO = int(os.environ.get('ANALISIS_CACHE_MAX_MB', 2048))
+
+# Cada cuántos resultados guardados por un proceso se revisa el tamaño del caché en disco
+GUARDADOS_POR_PODA = 32
+
+# Filas que se muestrean para verificar que un DataFrame con huella no fue filtrado o editado
+FILAS_MUESTRA_HUELLA = 1024
+
+# Versión manual del caché en disco: subirla invalida todos los resultados guardados
+# (por ejemplo al cambiar dependencias que alteran los números sin tocar el código)
+VERSION_CACHE = 1
+
+# Paquetes del proyecto cuyo código forma parte de la versión de cada resultado
+PAQUETES_VERSIONADOS = ('etl_data', 'visual_tools', 'utils')
+
+# Marca de "no está en disco" (None es un resultado válido)
+_AUSENTE = object()
+
+# DataFrames cuya huella de archivo es confiable: id -> referencia débil al objeto marcado
+_dataframes_con_huella: Dict[int, weakref.ref] = {}
+
+
+def marcar_huella(df: pd.DataFrame, huella: str) -> pd.DataFrame:
+    """Asocia a ``df`` la huella del archivo del que se cargó, sin modificaciones.
+
+    Solo los cargadores (y las transformaciones memorizadas sobre sus resultados)
+    deben marcar DataFrames: ``attrs`` se propaga a copias filtradas o editadas, así
+    que la huella solo se usa para el mismo objeto que se marcó.
+    """
+    df.attrs['huella'] = huella
+    _dataframes_con_huella[id(df)] = weakref.ref(df)
+    weakref.finalize(df, _dataframes_con_huella.pop, id(df), None)
+    return df
+
+def huella_confiable(df: pd.DataFrame) -> Optional[str]:
+    """Huella de archivo de ``df`` si es el mismo objeto que marcó un cargador"""
+    referencia = _dataframes_con_huella.get(id(df))
+    if referencia is None or referencia() is not df:
+        return None
+    return df.attrs.get('huella')
+
+
+def huella_dataframe(df: pd.DataFrame) -> str:
+    """Huella barata del contenido de un DataFrame.
+
+    Si el DataFrame es el objeto que devolvió un cargador (``marcar_huella``) se parte
+    del hash del archivo y se agregan forma, columnas, tipos y el hash de una muestra
+    espaciada de filas. Esto confía en que ese DataFrame compartido no se modifica en
+    el lugar: una edición fuera de la muestra no cambiaría la huella. Cualquier otro
+    DataFrame, incluidas las copias que heredan ``attrs['huella']``, se hashea completo.
+    """
+    hash_df = hashlib.blake2b(digest_size=16)
+    hash_df.update(repr((df.shape, list(df.columns), [str(t) for t in df.dtypes])).encode())
+    huella_archivo = huella_confiable(df)
+    if huella_archivo:
+        hash_df.update(huella_archivo.encode())
+        paso = max(1, len(df) // FILAS_MUESTRA_HUELLA)
+        muestra = df.iloc[::paso]
+    else:
+        muestra = df
+    hash_df.update(pd.util.hash_pandas_object(muestra, index=False).to_numpy().tobytes())
+    return hash_df.hexdigest()
+
+def _normalizar(valor: Any) -> Any:
+    """Representación estable de un argumento para construir la clave de caché"""
+    if isinstance(valor, pd.DataFrame):
+        return ('DataFrame', huella_dataframe(valor))
+    if isinstance(valor, pd.Series):
+        return ('Series', valor.name, huella_dataframe(valor.to_frame()))
+    if isinstance(valor, np.ndarray):
+        return ('ndarray', valor.dtype.str, valor.shape, hashlib.blake2b(valor.tobytes(), digest_size=16).hexdigest())
+    if isinstance(valor, dict):
+        return ('dict', tuple(sorted((str(k), _normalizar(v)) for k, v in valor.items())))
+    if isinstance(valor, (list, tuple)):
+        return (type(valor).__name__, tuple(_normalizar(v) for v in valor))
+    return repr(valor)
+
+@functools.lru_cache(maxsize=None)
+def version_codigo() -> str:
+    """Hash de ``VERSION_CACHE`` y de las fuentes de ``PAQUETES_VERSIONADOS`` (una vez por proceso).
+
+    Un resultado depende también de las funciones auxiliares que llama, así que
+    cualquier cambio en el código de los paquetes invalida los resultados en disco.
+    """
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    hash_codigo = hashlib.blake2b(str(VERSION_CACHE).encode(), digest_size=8)
+    for paquete in PAQUETES_VERSIONADOS:
+        directorio = os.path.join(raiz, paquete)
+        for nombre in sorted(os.listdir(directorio)):
+            if nombre.endswith('.py'):
+                hash_codigo.update(f"{paquete}/{nombre}".encode())
+                with open(os.path.join(directorio, nombre), 'rb') as archivo:
+                    hash_codigo.update(archivo.read())
+    return hash_codigo.hexdigest()
+
+def _version_funcion(funcion: Callable) -> str:
+    """Hash del código fuente de la función y de los paquetes del proyecto"""
+    try:
+        codigo = inspect.getsource(funcion)
+    except (OSError, TypeError):
+        codigo = funcion.__code__.co_code.hex()
+    return hashlib.blake2b(f"{version_codigo()}:{codigo}".encode(), digest_size=8).hexdigest()
+
+
+def _es_hexadecimal(nombre: str, largo: int) -> bool:
+    return len(nombre) == largo and all(c in '0123456789abcdef' for c in nombre)
+
+
+class CacheResultados:
+    """Caché LRU en memoria con respaldo opcional en disco (un pickle por clave).
+
+    En disco los resultados van bajo un subdirectorio por ``version_codigo()``. Cada
+    ``GUARDADOS_POR_PODA`` guardados (y en el primero de cada proceso) se borran los
+    subdirectorios de otras versiones del código y, si el total supera
+    ``max_mb_disco``, los resultados menos usados (la fecha de modificación se
+    actualiza en cada lectura).
+    """
+
+    def __init__(self, directorio: Optional[str] = DIRECTORIO_CACHE, max_entradas: int = MAX_ENTRADAS_MEMORIA,
+                 max_mb_disco: Optional[int] = MAX_MB_DISCO):
+        self.directorio = directorio
+        self.max_entradas = max_entradas
+        self.max_bytes_disco = max_mb_disco * 1024 ** 2 if max_mb_disco else None
+        self._memoria: "OrderedDict[str, Any]" = OrderedDict()
+        self._candado = threading.Lock()
+        # Cálculos en curso por clave: [candado, hilos interesados]
+        self._en_curso: Dict[str, list] = {}
+        self.aciertos = 0
+        self.fallos = 0
+        self._guardados = 0
+        self._candado_poda = threading.Lock()
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, version_codigo(), clave[:2], f"{clave}.pkl")
+
+    def obtener(self, clave: str) -> Tuple[bool, Any]:
+        """Busca en memoria y luego en disco; devuelve (encontrado, valor)"""
+        encontrado, valor = self._buscar(clave)
+        if encontrado:
+            self.aciertos += 1
+        else:
+            self.fallos += 1
+        return encontrado, valor
+
+    def _buscar(self, clave: str) -> Tuple[bool, Any]:
+        with self._candado:
+            if clave in self._memoria:
+                self._memoria.move_to_end(clave)
+                return True, self._memoria[clave]
+        if self.directorio:
+            valor = self._leer_disco(clave)
+            if valor is not _AUSENTE:
+                self._recordar(clave, valor)
+                return True, valor
+        return False, None
+
+    def _leer_disco(self, clave: str) -> Any:
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, 'rb') as archivo:
+                valor = pickle.load(archivo)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return _AUSENTE
+        # La fecha de modificación hace de "último uso" para la poda
+        with contextlib.suppress(OSError):
+            os.utime(ruta)
+        return valor
+
+    def obtener_o_calcular(self, clave: str, calcular: Callable[[], Any]) -> Any:
+        """Valor de ``clave``; si falta lo calcula un solo hilo aunque lo pidan varios a la vez.
+
+        Los demás esperan al primero y reciben su resultado. Si el cálculo falla, el
+        siguiente en espera lo intenta de nuevo.
+        """
+        encontrado, valor = self.obtener(clave)
+        if encontrado:
+            return valor
+        with self._candado:
+            en_curso = self._en_curso.setdefault(clave, [threading.Lock(), 0])
+            en_curso[1] += 1
+        try:
+            with en_curso[0]:
+                encontrado, valor = self._buscar(clave)
+                if not encontrado:
+                    valor = self._calcular(clave, calcular)
+        finally:
+            with self._candado:
+                en_curso[1] -= 1
+                if en_curso[1] == 0:
+                    del self._en_curso[clave]
+        return valor
+
+    def _calcular(self, clave: str, calcular: Callable[[], Any]) -> Any:
+        valor = calcular()
+        self.guardar(clave, valor)
+        return valor
+
+    def guardar(self, clave: str, valor: Any):
+        """Guarda en memoria y, si hay directorio, en disco de forma atómica"""
+        self._recordar(clave, valor)
+        if not self.directorio:
+            return
+        ruta = self._ruta(clave)
+        try:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            # Temporal por proceso e hilo: las tareas en segundo plano pueden guardar a la vez
+            temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporal, 'wb') as archivo:
+                pickle.dump(valor, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, ruta)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            # Resultados no serializables o disco no disponible: solo quedan en memoria
+            return
+        with self._candado:
+            podar = self._guardados % GUARDADOS_POR_PODA == 0
+            self._guardados += 1
+        if podar:
+            self.podar()
+
+    def podar(self) -> int:
+        """Borra los resultados de otras versiones del código y los menos usados hasta volver
+        al tamaño máximo; devuelve cuántos resultados de la versión actual se borraron"""
+        if not self.directorio or not os.path.isdir(self.directorio):
+            return 0
+        with self._candado_poda:
+            vigente = version_codigo()
+            for nombre in os.listdir(self.directorio):
+                # Subdirectorios de versiones anteriores (y del formato sin versión, por prefijo de clave)
+                if nombre != vigente and (_es_hexadecimal(nombre, len(vigente)) or _es_hexadecimal(nombre, 2)):
+                    shutil.rmtree(os.path.join(self.directorio, nombre), ignore_errors=True)
+            if not self.max_bytes_disco:
+                return 0
+            archivos = []
+            for raiz, _, nombres in os.walk(os.path.join(self.directorio, vigente)):
+                for nombre in nombres:
+                    if nombre.endswith('.pkl'):
+                        ruta = os.path.join(raiz, nombre)
+                        with contextlib.suppress(OSError):
+                            estado = os.stat(ruta)
+                            archivos.append((estado.st_mtime, estado.st_size, ruta))
+            total = sum(tamano for _, tamano, _ in archivos)
+            borrados = 0
+            for _, tamano, ruta in sorted(archivos):
+                if total <= self.max_bytes_disco:
+                    break
+                with contextlib.suppress(OSError):
+                    os.remove(ruta)
+                    total -= tamano
+                    borrados += 1
+            return borrados
+
+    def _recordar(self, clave: str, valor: Any):
+        with self._candado:
+            self._memoria[clave] = valor
+            self._memoria.move_to_end(clave)
+            while len(self._memoria) > self.max_entradas:
+                self._memoria.popitem(last=False)
+
+    def limpiar(self):
+        """Vacía el caché en memoria (el de disco se conserva)"""
+        with self._candado:
+            self._memoria.clear()
+
+
+_cache_global: Optional[CacheResultados] = None
+_candado_cache_global = threading.Lock()
+
+def obtener_cache_global() -> CacheResultados:
+    """Caché del proceso; con ANALISIS_CACHE_COMPARTIDO=1 se coordina con los demás procesos del host"""
+    global _cache_global
+    with _candado_cache_global:
+        if _cache_global is None:
+            if os.environ.get('ANALISIS_CACHE_COMPARTIDO') == '1':
+                from utils.servicio_resultados import ServicioResultados
+                _cache_global = ServicioResultados()
+            else:
+                _cache_global = CacheResultados()
+        return _cache_global
+
+# pyplot guarda estado global (figura actual): las figuras se construyen de a una aunque
+# se rendericen desde varios hilos
+_candado_pyplot = threading.Lock()
+
+def clave_llamada(funcion: Callable, args: tuple, kwargs: dict, version: str) -> str:
+    """Clave de caché: nombre y versión de la función más la huella de sus argumentos"""
+    contenido = repr((funcion.__module__, funcion.__qualname__, version,
+                      _normalizar(args), _normalizar(kwargs)))
+    return hashlib.blake2b(contenido.encode(), digest_size=20).hexdigest()
+
+def _envolver(f: Callable, version: str, cache: Optional[CacheResultados]) -> Callable:
+    @functools.wraps(f)
+    def envoltura(*args, **kwargs):
+        almacen = cache or obtener_cache_global()
+        clave = clave_llamada(f, args, kwargs, version)
+        return almacen.obtener_o_calcular(clave, lambda: f(*args, **kwargs))
+    return envoltura
+
+def cacheado(funcion: Optional[Callable] = None, *, cache: Optional[CacheResultados] = None):
+    """Decorador que memoriza el resultado por huella de los argumentos.
+
+    Se puede usar como ``@cacheado`` o envolviendo una función existente:
+    ``resumen = cacheado(obtener_resumen_estadistico)``.
+    """
+    def decorador(f: Callable) -> Callable:
+        return _envolver(f, _version_funcion(f), cache)
+
+    return decorador(funcion) if funcion is not None else decorador
+
+@instrumentado
+def figura_a_bytes(fig, formato: str = 'png', dpi: int = 100) -> bytes:
+    """Renderiza una figura de matplotlib a bytes PNG/SVG y la cierra"""
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=formato, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+def cachear_figura(constructor: Callable, formato: str = 'png',
+                   cache: Optional[CacheResultados] = None) -> Callable:
+    """Envuelve un constructor de figuras para que devuelva (y cachee) la imagen renderizada"""
+    @functools.wraps(constructor)
+    def renderizar(*args, **kwargs) -> bytes:
+        with _candado_pyplot:
+            return figura_a_bytes(constructor(*args, **kwargs), formato)
+
+    return _envolver(renderizar, f"{_version_funcion(constructor)}-{formato}", cache)
@@ -0,0 +1,209 @@
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+# Con ANALISIS_INSTRUMENTACION=1 se registran todos los tramos del proceso, no solo
+# los de las ejecuciones iniciadas con ``iniciar_ejecucion``
+INSTRUMENTACION_GLOBAL = os.environ.get('ANALISIS_INSTRUMENTACION') == '1'
+
+# Tramos que se conservan en el historial del proceso (para exportar)
+MAX_REGISTROS = 10_000
+
+_TAMANO_PAGINA = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+class _EstadoHilo(threading.local):
+    # Valores por defecto de clase: leerlos no lanza AttributeError (la ruta desactivada es barata)
+    registros: Optional[List[Dict]] = None
+    pila: Optional[List[str]] = None
+    perfil: Optional[cProfile.Profile] = None
+    inicio: Optional[float] = None
+
+
+_local = _EstadoHilo()
+_historial: deque = deque(maxlen=MAX_REGISTROS)
+_candado = threading.Lock()
+_NULO = contextlib.nullcontext()
+
+
+def instrumentacion_activa() -> bool:
+    """Indica si el hilo actual está registrando tramos"""
+    return INSTRUMENTACION_GLOBAL or _local.registros is not None
+
+def _memoria_rss() -> Optional[int]:
+    """RSS actual en bytes (``/proc/self/statm``); None si no está disponible"""
+    try:
+        with open('/proc/self/statm') as archivo:
+            return int(archivo.read().split()[1]) * _TAMANO_PAGINA
+    except (OSError, IndexError, ValueError):
+        return None
+
+def _contar_filas(args: tuple) -> Optional[int]:
+    """Filas de la primera entrada tabular (DataFrame, Series o arreglo) de la llamada"""
+    for arg in args:
+        forma = getattr(arg, 'shape', None)
+        if forma:
+            return int(forma[0])
+    return None
+
+
+class _Tramo:
+    """Contexto que mide duración y variación de memoria de un bloque de código"""
+
+    __slots__ = ('nombre', 'filas', 'inicio', 'memoria_inicial')
+
+    def __init__(self, nombre: str, filas: Optional[int] = None):
+        self.nombre = nombre
+        self.filas = filas
+
+    def __enter__(self):
+        pila = _local.pila
+        if pila is None:
+            pila = _local.pila = []
+        pila.append(self.nombre)
+        self.memoria_inicial = _memoria_rss()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        duracion = time.perf_counter() - self.inicio
+        memoria_final = _memoria_rss()
+        pila = _local.pila
+        pila.pop()
+        registro = {
+            'nombre': self.nombre,
+            'padre': pila[-1] if pila else None,
+            'nivel': len(pila),
+            'inicio_s': self.inicio - (_local.inicio or self.inicio),
+            'duracion_s': duracion,
+            'filas': self.filas,
+            'memoria_delta_mb': ((memoria_final - self.memoria_inicial) / 1024 ** 2
+                                 if memoria_final is not None and self.memoria_inicial is not None else None),
+            'error': tipo.__name__ if tipo is not None else None,
+            'hilo': threading.current_thread().name,
+            'marca_tiempo': time.time()
+        }
+        registros = _local.registros
+        if registros is not None:
+            registros.append(registro)
+        with _candado:
+            _historial.append(registro)
+        return False
+
+
+def medir(nombre: str, filas: Optional[int] = None):
+    """Context manager que registra un tramo; sin instrumentación activa no hace nada"""
+    if not instrumentacion_activa():
+        return _NULO
+    return _Tramo(nombre, filas)
+
+def instrumentado(funcion: Optional[Callable] = None, *, nombre: Optional[str] = None):
+    """Decorador que registra cada llamada (duración, filas de entrada y delta de memoria).
+
+    Desactivado, el costo es una verificación de bandera por llamada.
+    """
+    def decorador(f: Callable) -> Callable:
+        etiqueta = nombre or f"{f.__module__}.{f.__qualname__}"
+
+        @functools.wraps(f)
+        def envoltura(*args, **kwargs):
+            if not (INSTRUMENTACION_GLOBAL or _local.registros is not None):
+                return f(*args, **kwargs)
+            with _Tramo(etiqueta, _contar_filas(args)) as tramo:
+                resultado = f(*args, **kwargs)
+                if tramo.filas is None:
+                    # Funciones de carga: se reportan las filas producidas
+                    tramo.filas = _contar_filas((resultado,))
+                return resultado
+        return envoltura
+
+    return decorador(funcion) if funcion is not None else decorador
+
+def propagar_ejecucion(funcion: Callable) -> Callable:
+    """Envuelve ``funcion`` para que, ejecutada en otro hilo, registre sus tramos en la ejecución actual.
+
+    Sin ejecución activa en el hilo que la envía se devuelve ``funcion`` sin cambios.
+    La tarea completa aparece como un tramo ``tarea: <nombre>``; solo las que terminan
+    antes de ``finalizar_ejecucion`` llegan a su resultado, el resto queda en el historial.
+    """
+    registros = _local.registros
+    if registros is None:
+        return funcion
+    inicio = _local.inicio
+    etiqueta = f"tarea: {getattr(funcion, '__qualname__', repr(funcion))}"
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        previo = (_local.registros, _local.pila, _local.inicio)
+        _local.registros, _local.pila, _local.inicio = registros, [], inicio
+        try:
+            with _Tramo(etiqueta):
+                return funcion(*args, **kwargs)
+        finally:
+            _local.registros, _local.pila, _local.inicio = previo
+    return envoltura
+
+def iniciar_ejecucion(perfilar: bool = False) -> List[Dict]:
+    """Empieza a registrar tramos en el hilo actual (una ejecución de la página).
+
+    Con ``perfilar=True`` además se captura un perfil de cProfile hasta ``finalizar_ejecucion``.
+    """
+    if _local.perfil is not None:
+        # Una ejecución anterior terminó antes de finalizar (por ejemplo con st.stop)
+        _local.perfil.disable()
+    _local.registros = []
+    _local.pila = []
+    _local.perfil = None
+    _local.inicio = time.perf_counter()
+    if perfilar:
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Ya hay otro perfilador activo en el intérprete
+            pass
+        else:
+            _local.perfil = perfil
+    return _local.registros
+
+def finalizar_ejecucion(lineas_perfil: int = 40) -> Dict:
+    """Deja de registrar y devuelve los tramos, la duración total y el perfil (texto) si se pidió"""
+    # Copia: las tareas en segundo plano pueden seguir agregando tramos a la lista original
+    registros = list(_local.registros or [])
+    perfil = _local.perfil
+    texto_perfil = None
+    if perfil is not None:
+        perfil.disable()
+        salida = io.StringIO()
+        pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(lineas_perfil)
+        texto_perfil = salida.getvalue()
+    duracion = time.perf_counter() - _local.inicio if _local.inicio is not None else 0.0
+    _local.registros = None
+    _local.perfil = None
+    return {'tramos': registros, 'duracion_total_s': duracion, 'perfil': texto_perfil}
+
+def obtener_historial() -> List[Dict]:
+    """Copia de los tramos registrados en el proceso (los más recientes)"""
+    with _candado:
+        return list(_historial)
+
+def limpiar_historial():
+    with _candado:
+        _historial.clear()
+
+def exportar_json(registros: Optional[List[Dict]] = None, ruta: Optional[str] = None) -> str:
+    """Serializa los tramos (por defecto, el historial del proceso) como JSON y opcionalmente lo escribe"""
+    contenido = json.dumps({'tramos': obtener_historial() if registros is None else registros},
+                           indent=2, ensure_ascii=False)
+    if ruta:
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            archivo.write(contenido)
+    return contenido
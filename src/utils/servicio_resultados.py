@@ -0,0 +1,75 @@
+import contextlib
+import os
+from typing import Any, Callable, Optional
+
+from utils.cache import DIRECTORIO_CACHE, MAX_ENTRADAS_MEMORIA, MAX_MB_DISCO, CacheResultados, _AUSENTE
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se deduplica dentro del proceso
+    fcntl = None
+
+
+@contextlib.contextmanager
+def bloqueo_exclusivo(ruta: str, bloquear: bool = True):
+    """Bloqueo ``flock`` sobre ``ruta`` entre procesos; entrega False si no se obtuvo.
+
+    El sistema operativo lo libera aunque el proceso muera, así que un cálculo
+    abortado no deja a los demás esperando. Los archivos de bloqueo no se borran:
+    hacerlo mientras otro proceso espera rompería la exclusión.
+    """
+    if fcntl is None:
+        yield True
+        return
+    with open(ruta, 'a+b') as archivo:
+        try:
+            fcntl.flock(archivo, fcntl.LOCK_EX | (0 if bloquear else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(archivo, fcntl.LOCK_UN)
+
+
+class ServicioResultados(CacheResultados):
+    """Caché de resultados compartido por todos los procesos del host a través del disco.
+
+    Varios servidores de Streamlit (o el runner por lotes) apuntando al mismo
+    directorio comparten los resultados: lo que calcula una sesión lo leen las demás.
+    Un cálculo faltante lo hace un solo proceso; los que piden la misma clave esperan
+    su bloqueo de archivo y leen el resultado del disco. Dentro de cada proceso los
+    hilos ya se deduplican en ``CacheResultados``. No requiere servicios externos.
+    """
+
+    def __init__(self, directorio: str = DIRECTORIO_CACHE, max_entradas: int = MAX_ENTRADAS_MEMORIA,
+                 max_mb_disco: Optional[int] = MAX_MB_DISCO):
+        super().__init__(directorio, max_entradas, max_mb_disco)
+        self.calculos = 0
+
+    def _calcular(self, clave: str, calcular: Callable[[], Any]) -> Any:
+        ruta = self._ruta(clave)
+        try:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            bloqueo = bloqueo_exclusivo(f"{ruta}.lock")
+        except OSError:
+            # Directorio compartido no disponible: se calcula solo para este proceso
+            bloqueo = contextlib.nullcontext()
+        with bloqueo:
+            # Otro proceso pudo terminar el mismo cálculo mientras se esperaba el bloqueo
+            valor = super()._leer_disco(clave)
+            if valor is not _AUSENTE:
+                self._recordar(clave, valor)
+                return valor
+            self.calculos += 1
+            valor = calcular()
+            self.guardar(clave, valor)
+        return valor
+
+    def podar(self) -> int:
+        """Poda el almacén compartido; solo un proceso a la vez, si otro ya lo está haciendo no se espera"""
+        if not self.directorio or not os.path.isdir(self.directorio):
+            return 0
+        with bloqueo_exclusivo(os.path.join(self.directorio, '.poda.lock'), bloquear=False) as obtenido:
+            return super().podar() if obtenido else 0
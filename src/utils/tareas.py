@@ -0,0 +1,90 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Optional, Set, Tuple
+
+from utils.instrumentacion import propagar_ejecucion
+
+# Hilos compartidos por todas las sesiones: NumPy y el renderizado liberan el GIL en
+# buena parte, y los remuestreos grandes ya reparten su trabajo en el pool de procesos
+MAX_HILOS_TAREAS = int(os.environ.get('ANALISIS_HILOS_TAREAS', min(4, os.cpu_count() or 1)))
+
+_ejecutor: Optional[ThreadPoolExecutor] = None
+_candado_ejecutor = threading.Lock()
+
+def obtener_ejecutor() -> ThreadPoolExecutor:
+    """Ejecutor de hilos del proceso, creado en el primer uso y reutilizado entre reruns"""
+    global _ejecutor
+    with _candado_ejecutor:
+        if _ejecutor is None:
+            _ejecutor = ThreadPoolExecutor(max_workers=MAX_HILOS_TAREAS, thread_name_prefix='tarea-analisis')
+        return _ejecutor
+
+def _fallo(futuro: Future) -> bool:
+    return futuro.done() and not futuro.cancelled() and futuro.exception() is not None
+
+
+class GestorTareas:
+    """Tareas en segundo plano de una sesión, agrupadas por ámbito.
+
+    El ámbito identifica lo que la página está mostrando (sección, experimento,
+    métrica). Al cambiar de ámbito se cancelan las tareas del anterior que todavía no
+    empezaron; las que ya corren terminan (sus resultados quedan en el caché de
+    resultados) pero se descartan. Una tarea se identifica por una clave: volver a
+    enviarla mientras existe devuelve el mismo ``Future``. Una tarea cancelada se
+    reenvía enseguida; una que falló se reenvía a partir de la ejecución de la página
+    siguiente a aquella en que ya se veía el error, así el error se muestra una vez y
+    un fallo persistente no se reintenta en cada rerun. Las tareas registran sus
+    tramos en la ejecución de la página que las envió.
+    """
+
+    def __init__(self):
+        self.ambito: Hashable = None
+        self._tareas: Dict[Hashable, Tuple[Hashable, Future]] = {}
+        self._fallidas_vistas: Set[Hashable] = set()
+        self._reintentables: Set[Hashable] = set()
+        self._candado = threading.Lock()
+
+    def entrar_ambito(self, ambito: Hashable) -> int:
+        """Fija el ámbito actual (una vez por ejecución de la página); devuelve cuántas tareas se cancelaron"""
+        with self._candado:
+            self._reintentables = self._fallidas_vistas
+            self._fallidas_vistas = {clave for clave, (_, futuro) in self._tareas.items() if _fallo(futuro)}
+            if ambito == self.ambito:
+                return 0
+            self.ambito = ambito
+            obsoletas = [clave for clave, (ambito_tarea, _) in self._tareas.items() if ambito_tarea != ambito]
+            canceladas = 0
+            for clave in obsoletas:
+                _, futuro = self._tareas.pop(clave)
+                canceladas += futuro.cancel()
+            return canceladas
+
+    def enviar(self, clave: Hashable, funcion: Callable, *args, **kwargs) -> Future:
+        """Envía ``funcion(*args, **kwargs)`` al ejecutor en el ámbito actual (o reutiliza la tarea)"""
+        with self._candado:
+            existente = self._tareas.get(clave)
+            if existente is not None and not existente[1].cancelled():
+                if not (_fallo(existente[1]) and clave in self._reintentables):
+                    return existente[1]
+                self._reintentables.discard(clave)
+            futuro = obtener_ejecutor().submit(propagar_ejecucion(funcion), *args, **kwargs)
+            self._tareas[clave] = (self.ambito, futuro)
+            return futuro
+
+    def obtener(self, clave: Hashable) -> Optional[Future]:
+        with self._candado:
+            existente = self._tareas.get(clave)
+            return existente[1] if existente is not None else None
+
+    def pendientes(self) -> int:
+        """Tareas del ámbito actual que todavía no terminaron"""
+        with self._candado:
+            return sum(not futuro.done() for ambito, futuro in self._tareas.values() if ambito == self.ambito)
+
+    def cancelar_todas(self) -> int:
+        with self._candado:
+            canceladas = sum(futuro.cancel() for _, futuro in self._tareas.values())
+            self._tareas.clear()
+            return canceladas
+
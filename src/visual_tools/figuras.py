@@ -0,0 +1,204 @@
+import pandas as pd
+import numpy as np
+from typing import Dict
+import matplotlib.pyplot as plt
+
+from etl_data.indice_grupos import obtener_indice_grupos
+from utils.instrumentacion import instrumentado
+
+# Constructores de figuras de matplotlib. Viven separados de ``streamlit_plots`` para que
+# las secciones sin gráficos no paguen la importación de matplotlib; scipy y seaborn se
+# importan dentro de las funciones que los usan.
+
+# Parámetros del modo agregado: el costo de dibujar no depende del número de filas
+N_CUANTILES_QQ = 1000
+MAX_ATIPICOS_BOXPLOT = 500
+
+def _histograma_agregado(ax, valores: np.ndarray, bins: int = 30, **estilo):
+    """Dibuja un histograma a partir de los conteos de ``np.histogram``"""
+    valores = valores[np.isfinite(valores)]
+    conteos, bordes = np.histogram(valores, bins=bins)
+    ax.hist(bordes[:-1], bins=bordes, weights=conteos, **estilo)
+
+def _qq_agregado(ax, valores: np.ndarray, n_cuantiles: int = N_CUANTILES_QQ):
+    """Q-Q plot normal con un número fijo de cuantiles en lugar de todas las observaciones"""
+    from scipy.special import ndtri
+
+    valores = valores[np.isfinite(valores)]
+    probabilidades = (np.arange(1, n_cuantiles + 1) - 0.5) / n_cuantiles
+    teoricos = ndtri(probabilidades)
+    muestrales = np.quantile(valores, probabilidades)
+    pendiente, intercepto = np.polyfit(teoricos, muestrales, 1)
+    ax.plot(teoricos, muestrales, 'o', markersize=3)
+    ax.plot(teoricos, pendiente * teoricos + intercepto, 'r-')
+    ax.set_xlabel('Cuantiles teóricos')
+    ax.set_ylabel('Valores ordenados')
+
+def _agrupar_valores(df: pd.DataFrame, columna_grupo: str, columna_valores: str) -> Dict:
+    """Valores de la respuesta por categoría a partir del índice de grupos (compartido entre figuras)"""
+    return obtener_indice_grupos(df, [columna_grupo]).grupos(columna_valores)
+
+def resumir_caja(valores: np.ndarray, etiqueta: str, max_atipicos: int = MAX_ATIPICOS_BOXPLOT,
+                 semilla: int = 0) -> Dict:
+    """Resumen de cinco números (formato de ``Axes.bxp``) con una muestra acotada de atípicos.
+
+    Si todos los valores son atípicos los bigotes quedan en los cuartiles.
+    """
+    valores = valores[np.isfinite(valores)]
+    if len(valores) == 0:
+        raise ValueError(f"El grupo {etiqueta} no tiene valores finitos")
+    q1, mediana, q3 = np.quantile(valores, [0.25, 0.50, 0.75])
+    riq = q3 - q1
+    dentro = (valores >= q1 - 1.5 * riq) & (valores <= q3 + 1.5 * riq)
+    atipicos = valores[~dentro]
+    if len(atipicos) > max_atipicos:
+        atipicos = np.random.default_rng(semilla).choice(atipicos, max_atipicos, replace=False)
+    return {
+        'label': str(etiqueta),
+        'q1': q1,
+        'med': mediana,
+        'q3': q3,
+        'whislo': valores[dentro].min() if dentro.any() else q1,
+        'whishi': valores[dentro].max() if dentro.any() else q3,
+        'fliers': atipicos
+    }
+
+def _resumenes_cajas(grupos: Dict, max_atipicos: int) -> list:
+    """Resúmenes de caja de los grupos con algún valor finito (en log, un grupo con todo <= 0 se omite)"""
+    return [resumir_caja(v, g, max_atipicos) for g, v in grupos.items() if np.isfinite(v).any()]
+
+def _boxplot_agregado(ax, resumenes: list):
+    """Dibuja boxplots precalculados con los colores de la paleta de seaborn"""
+    cajas = ax.bxp(resumenes, patch_artist=True, showfliers=True, widths=0.8,
+                   flierprops=dict(marker='d', markersize=3, alpha=0.5))
+    for caja, color in zip(cajas['boxes'], plt.rcParams['axes.prop_cycle'].by_key()['color']):
+        caja.set_facecolor(color)
+
+@instrumentado
+def crear_graficos_antes_despues(df: pd.DataFrame, columna_original: str, columna_transformada: str,
+                                 agregado: bool = True, n_cuantiles: int = N_CUANTILES_QQ,
+                                 max_atipicos: int = MAX_ATIPICOS_BOXPLOT, columna_grupo: str = 'group'):
+    """Crea gráficos comparativos antes y después de la transformación.
+
+    En modo ``agregado`` los histogramas salen de ``np.histogram``, los Q-Q plots de
+    ``n_cuantiles`` cuantiles y los boxplots de resúmenes de cinco números con a lo
+    sumo ``max_atipicos`` atípicos por grupo, por lo que dibujar no depende del número de filas.
+    """
+    if not agregado:
+        return _crear_graficos_antes_despues_completo(df, columna_original, columna_transformada, columna_grupo)
+    
+    fig, axes = plt.subplots(2, 3, figsize=(18, 12))
+    filas = [
+        (columna_original, 'skyblue', 'Originales', 'Datos Originales'),
+        (columna_transformada, 'lightcoral', 'Transformados (log)', 'Datos Transformados (log)')
+    ]
+    
+    for i, (columna, color, sufijo, titulo) in enumerate(filas):
+        # Vista de la columna (sin copiar si está mapeada en memoria)
+        valores = df[columna].to_numpy()
+        
+        # Histograma
+        _histograma_agregado(axes[i,0], valores, bins=30, alpha=0.7, color=color, edgecolor='black')
+        axes[i,0].set_title(f'Histograma - {titulo}', fontweight='bold')
+        axes[i,0].set_xlabel(columna)
+        axes[i,0].grid(True, alpha=0.3)
+        
+        # Q-Q plot
+        _qq_agregado(axes[i,1], valores, n_cuantiles)
+        axes[i,1].set_title(f'Q-Q Plot - {titulo}')
+        axes[i,1].grid(True, alpha=0.3)
+        
+        # Boxplot por grupo
+        if columna_grupo in df.columns:
+            grupos = _agrupar_valores(df, columna_grupo, columna)
+            _boxplot_agregado(axes[i,2], _resumenes_cajas(grupos, max_atipicos))
+            axes[i,2].set_title(f'Boxplot por Grupo - {sufijo}')
+            axes[i,2].set_xlabel(columna_grupo)
+            axes[i,2].set_ylabel(columna)
+            axes[i,2].grid(True, alpha=0.3)
+    
+    plt.tight_layout()
+    return fig
+
+def _crear_graficos_antes_despues_completo(df: pd.DataFrame, columna_original: str, columna_transformada: str,
+                                           columna_grupo: str = 'group'):
+    """Crea gráficos comparativos antes y después de la transformación"""
+    from scipy import stats
+    import seaborn as sns
+    
+    fig, axes = plt.subplots(2, 3, figsize=(18, 12))
+    
+    # FILA 1: Datos Originales
+    # Histograma original
+    axes[0,0].hist(df[columna_original], bins=30, alpha=0.7, color='skyblue', edgecolor='black')
+    axes[0,0].set_title('Histograma - Datos Originales', fontweight='bold')
+    axes[0,0].set_xlabel(columna_original)
+    axes[0,0].grid(True, alpha=0.3)
+    
+    # Q-Q plot original
+    stats.probplot(df[columna_original], dist="norm", plot=axes[0,1])
+    axes[0,1].set_title('Q-Q Plot - Datos Originales')
+    axes[0,1].grid(True, alpha=0.3)
+    
+    # Boxplot original por grupo
+    if columna_grupo in df.columns:
+        sns.boxplot(data=df, x=columna_grupo, y=columna_original, ax=axes[0,2])
+        axes[0,2].set_title('Boxplot por Grupo - Originales')
+        axes[0,2].grid(True, alpha=0.3)
+    
+    # FILA 2: Datos Transformados
+    # Histograma transformado
+    axes[1,0].hist(df[columna_transformada], bins=30, alpha=0.7, color='lightcoral', edgecolor='black')
+    axes[1,0].set_title('Histograma - Datos Transformados (log)', fontweight='bold')
+    axes[1,0].set_xlabel(columna_transformada)
+    axes[1,0].grid(True, alpha=0.3)
+    
+    # Q-Q plot transformado
+    stats.probplot(df[columna_transformada], dist="norm", plot=axes[1,1])
+    axes[1,1].set_title('Q-Q Plot - Datos Transformados (log)')
+    axes[1,1].grid(True, alpha=0.3)
+    
+    # Boxplot transformado por grupo
+    if columna_grupo in df.columns:
+        sns.boxplot(data=df, x=columna_grupo, y=columna_transformada, ax=axes[1,2])
+        axes[1,2].set_title('Boxplot por Grupo - Transformados (log)')
+        axes[1,2].grid(True, alpha=0.3)
+    
+    plt.tight_layout()
+    return fig
+
+@instrumentado
+def crear_boxplots_categoricas(df: pd.DataFrame, variable_respuesta: str, variables_categoricas: list,
+                               agregado: bool = True, max_atipicos: int = MAX_ATIPICOS_BOXPLOT):
+    """Crea boxplots de la variable respuesta vs cada variable categórica"""
+    
+    n_vars = len(variables_categoricas)
+    fig, axes = plt.subplots(1, n_vars, figsize=(8*n_vars, 6))
+    
+    # Si solo hay una variable, axes no es una lista
+    if n_vars == 1:
+        axes = [axes]
+    
+    for i, var_cat in enumerate(variables_categoricas):
+        if agregado:
+            grupos = _agrupar_valores(df, var_cat, variable_respuesta)
+            _boxplot_agregado(axes[i], _resumenes_cajas(grupos, max_atipicos))
+        else:
+            import seaborn as sns
+            sns.boxplot(data=df, x=var_cat, y=variable_respuesta, ax=axes[i])
+        axes[i].set_title(f'{variable_respuesta.upper()} por {var_cat.title()}', fontweight='bold', fontsize=14)
+        axes[i].set_xlabel(var_cat.title(), fontsize=12)
+        axes[i].set_ylabel(variable_respuesta.upper(), fontsize=12)
+        axes[i].grid(True, alpha=0.3)
+        
+        # Agregar número de observaciones por grupo (conteos del índice de grupos)
+        conteos = obtener_indice_grupos(df, [var_cat]).conteos_por()
+        conteos.index = conteos.index.astype(str)
+        for j, etiqueta in enumerate(axes[i].get_xticklabels()):
+            n_obs = conteos.get(etiqueta.get_text(), 0)
+            axes[i].text(axes[i].get_xticks()[j], axes[i].get_ylim()[0], f'n={n_obs}', 
+                        ha='center', va='top', fontsize=10, 
+                        bbox=dict(boxstyle='round,pad=0.3', facecolor='lightblue', alpha=0.7))
+    
+    plt.tight_layout()
+    return fig
@@ -1,10 +1,23 @@
 import streamlit as st
 import pandas as pd
-from typing import Dict
-import matplotlib.pyplot as plt
-from scipy import stats
-import seaborn as sns
-from typing import Dict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+# Cada cuánto se vuelve a dibujar un resultado en segundo plano mientras no termina
+INTERVALO_TAREAS_S = 0.5
+
+# Los constructores de figuras viven en ``visual_tools.figuras`` (importa matplotlib);
+# se reexportan bajo demanda para no cargar matplotlib al importar este módulo
+_FIGURAS = {
+    'N_CUANTILES_QQ', 'MAX_ATIPICOS_BOXPLOT', 'resumir_caja',
+    'crear_graficos_antes_despues', 'crear_boxplots_categoricas'
+}
+
+def __getattr__(nombre: str):
+    if nombre in _FIGURAS:
+        from visual_tools import figuras
+        return getattr(figuras, nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
 
 
 def mostrar_resumen_valores_faltantes(info_faltantes: Dict):
@@ -30,6 +43,9 @@ def mostrar_resumen_duplicados(info_duplicados: Dict, columna_id: str):
         st.error(f"🚨 {info_duplicados['cantidad_duplicados']} duplicados encontrados")
         st.write("**Filas duplicadas:**")
         st.dataframe(info_duplicados['filas_duplicadas'])
+        if info_duplicados.get('muestra_truncada'):
+            st.caption(f"Se muestran {len(info_duplicados['filas_duplicadas']):,} de "
+                       f"{info_duplicados['filas_duplicadas_totales']:,} filas duplicadas")
     else:
         st.success(f"✅ No hay duplicados en {columna_id}")
 
@@ -95,52 +111,27 @@ def mostrar_resumen_categoricas(info_categoricas: Dict):
     for columna, valores in info_categoricas.items():
         st.write(f"- **{columna}:** {valores}")
 
-#############################################################################################################
+def mostrar_reporte_memoria(reporte: pd.DataFrame):
+    """Muestra la memoria por columna frente a los tipos por defecto de pandas"""
+    total = reporte.iloc[-1]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Memoria en uso", f"{total['memoria_mb']:,.2f} MB")
+    with col2:
+        st.metric("Con tipos por defecto", f"{total['memoria_sin_compactar_mb']:,.2f} MB")
+    with col3:
+        st.metric("Ahorro", f"{total['ahorro_porcentaje']:.1f}%")
+    st.dataframe(
+        reporte.rename(columns={
+            'columna': 'Columna', 'tipo': 'Tipo', 'tipo_sin_compactar': 'Tipo por defecto',
+            'memoria_mb': 'Memoria (MB)', 'memoria_sin_compactar_mb': 'Memoria por defecto (MB)',
+            'ahorro_porcentaje': 'Ahorro (%)'
+        }).round(2),
+        hide_index=True
+    )
 
+#############################################################################################################
 
-def crear_graficos_antes_despues(df: pd.DataFrame, columna_original: str, columna_transformada: str):
-    """Crea gráficos comparativos antes y después de la transformación"""
-    
-    fig, axes = plt.subplots(2, 3, figsize=(18, 12))
-    
-    # FILA 1: Datos Originales
-    # Histograma original
-    axes[0,0].hist(df[columna_original], bins=30, alpha=0.7, color='skyblue', edgecolor='black')
-    axes[0,0].set_title('Histograma - Datos Originales', fontweight='bold')
-    axes[0,0].set_xlabel(columna_original)
-    axes[0,0].grid(True, alpha=0.3)
-    
-    # Q-Q plot original
-    stats.probplot(df[columna_original], dist="norm", plot=axes[0,1])
-    axes[0,1].set_title('Q-Q Plot - Datos Originales')
-    axes[0,1].grid(True, alpha=0.3)
-    
-    # Boxplot original por grupo
-    if 'group' in df.columns:
-        sns.boxplot(data=df, x='group', y=columna_original, ax=axes[0,2])
-        axes[0,2].set_title('Boxplot por Grupo - Originales')
-        axes[0,2].grid(True, alpha=0.3)
-    
-    # FILA 2: Datos Transformados
-    # Histograma transformado
-    axes[1,0].hist(df[columna_transformada], bins=30, alpha=0.7, color='lightcoral', edgecolor='black')
-    axes[1,0].set_title('Histograma - Datos Transformados (log)', fontweight='bold')
-    axes[1,0].set_xlabel(columna_transformada)
-    axes[1,0].grid(True, alpha=0.3)
-    
-    # Q-Q plot transformado
-    stats.probplot(df[columna_transformada], dist="norm", plot=axes[1,1])
-    axes[1,1].set_title('Q-Q Plot - Datos Transformados (log)')
-    axes[1,1].grid(True, alpha=0.3)
-    
-    # Boxplot transformado por grupo
-    if 'group' in df.columns:
-        sns.boxplot(data=df, x='group', y=columna_transformada, ax=axes[1,2])
-        axes[1,2].set_title('Boxplot por Grupo - Transformados (log)')
-        axes[1,2].grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    return fig
 
 def mostrar_comparacion_estadisticas_simple(estadisticas: Dict):
     """Muestra comparación simple de estadísticas antes y después"""
@@ -200,29 +191,290 @@ def mostrar_comparacion_estadisticas_simple(estadisticas: Dict):
 
 
 
-def crear_boxplots_categoricas(df: pd.DataFrame, variable_respuesta: str, variables_categoricas: list):
-    """Crea boxplots de la variable respuesta vs cada variable categórica"""
+#############################################################################################################
+
+
+def mostrar_tabla_anova(resultado_rcbd: Dict, nombre_respuesta: str):
+    """Muestra la tabla ANOVA del RCBD y el efecto del tratamiento en Streamlit"""
+    st.subheader(f"📋 Tabla ANOVA - {nombre_respuesta}")
+    tabla = resultado_rcbd['tabla_anova'].copy()
+    tabla['gl'] = tabla['gl'].astype(int)
+    st.dataframe(tabla.style.format({'SC': '{:,.3f}', 'CM': '{:,.4f}', 'F': '{:.3f}', 'p_valor': '{:.4g}'},
+                                    na_rep=''))
+    
+    efecto = resultado_rcbd['efecto_tratamiento']
+    nivel = f"{efecto['nivel_confianza']:.0%}"
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(f"Efecto {resultado_rcbd['nivel_tratamiento']} - {resultado_rcbd['nivel_control']}",
+                  f"{efecto['estimacion']:.4f}")
+    with col2:
+        st.metric(f"IC {nivel}", f"[{efecto['ic_inferior']:.4f}, {efecto['ic_superior']:.4f}]")
+    with col3:
+        st.metric("p-valor", f"{efecto['p_valor']:.4g}")
+    
+    if not resultado_rcbd['balanceado']:
+        st.caption("Diseño desbalanceado: sumas de cuadrados tipo II (cada factor ajustado por el otro)")
+
+def mostrar_comparacion_modelos(resultado_rcbd: Dict):
+    """Muestra la comparación entre el Diseño Completamente Aleatorizado y el RCBD"""
+    crd = resultado_rcbd['modelo_crd']
+    efecto_rcbd = resultado_rcbd['efecto_tratamiento']
+    efecto_crd = crd['efecto_tratamiento']
+    tabla_error = resultado_rcbd['tabla_anova'].loc['Error']
+    
+    df_comparacion = pd.DataFrame({
+        'Estadística': ['CM Error', 'gl Error', 'Efecto', 'Error Estándar', 'IC Inferior', 'IC Superior', 'p-valor'],
+        'DCA': [
+            f"{crd['cm_error']:.4f}",
+            f"{crd['gl_error']:,}",
+            f"{efecto_crd['estimacion']:.4f}",
+            f"{efecto_crd['error_estandar']:.4f}",
+            f"{efecto_crd['ic_inferior']:.4f}",
+            f"{efecto_crd['ic_superior']:.4f}",
+            f"{efecto_crd['p_valor']:.4g}"
+        ],
+        'RCBD': [
+            f"{tabla_error['CM']:.4f}",
+            f"{int(tabla_error['gl']):,}",
+            f"{efecto_rcbd['estimacion']:.4f}",
+            f"{efecto_rcbd['error_estandar']:.4f}",
+            f"{efecto_rcbd['ic_inferior']:.4f}",
+            f"{efecto_rcbd['ic_superior']:.4f}",
+            f"{efecto_rcbd['p_valor']:.4g}"
+        ]
+    })
+    st.dataframe(df_comparacion, hide_index=True)
+    
+    eficiencia = resultado_rcbd['eficiencia_relativa']
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Eficiencia relativa (RCBD vs DCA)", f"{eficiencia:.3f}")
+    with col2:
+        st.metric("Reducción del CM Error", f"{(1 - tabla_error['CM'] / crd['cm_error']) * 100:.1f}%")
+    
+    if eficiencia > 1:
+        st.success(f"✅ El bloqueo es eficiente: un DCA necesitaría {eficiencia:.2f} veces más observaciones "
+                   "para lograr la misma precisión")
+    else:
+        st.info("📊 El bloqueo no mejora la precisión frente a un diseño completamente aleatorizado")
+
+def mostrar_supuestos(diagnostico: Dict):
+    """Muestra el diagnóstico de normalidad y homocedasticidad de los residuos en Streamlit"""
+    alpha = diagnostico['alpha']
+    normalidad = diagnostico['normalidad']
+    homocedasticidad = diagnostico['homocedasticidad']
+    if diagnostico['muestreado']:
+        st.caption(f"Muestra estratificada de {diagnostico['n_usados']:,} de {diagnostico['n_residuos']:,} residuos. "
+                   f"Potencia para detectar |asimetría| ≥ {normalidad['asimetria_minima']}: "
+                   f"{normalidad['potencia']:.0%}; para detectar una celda con "
+                   f"{homocedasticidad['razon_desviaciones_minima']}× la desviación del resto: "
+                   f"{homocedasticidad['potencia']:.0%}")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("**Normalidad de los residuos**")
+        ad = normalidad['anderson_darling']
+        df_normalidad = pd.DataFrame({
+            'Estadística': ["D'Agostino-Pearson (p-valor)", f"Anderson-Darling (crítico {ad['nivel_significancia']:.0%})",
+                            'Asimetría', 'Curtosis (exceso)'],
+            'Valor': [f"{normalidad['dagostino']['p_valor']:.4g}", f"{ad['estadistico']:.3f} ({ad['valor_critico']:.3f})",
+                      f"{normalidad['asimetria']:.3f}", f"{normalidad['curtosis_exceso']:.3f}"]
+        })
+        st.dataframe(df_normalidad, hide_index=True)
+    with col2:
+        st.write("**Homocedasticidad entre celdas**")
+        bf, levene = homocedasticidad['brown_forsythe'], homocedasticidad['levene']
+        df_homocedasticidad = pd.DataFrame({
+            'Estadística': ['Brown-Forsythe (p-valor)', 'Levene (p-valor)', 'Razón máx/mín desviación',
+                            'Correlación |residuo| vs ajustado'],
+            'Valor': [f"{bf['estadistico']:.3f} ({bf['p_valor']:.4g})", f"{levene['estadistico']:.3f} ({levene['p_valor']:.4g})",
+                      f"{homocedasticidad['razon_desviaciones']:.3f}", f"{diagnostico['correlacion_abs_residuo_ajustado']:.3f}"]
+        })
+        st.dataframe(df_homocedasticidad, hide_index=True)
+    
+    st.write("**Residuos vs ajustados por celda:**")
+    st.dataframe(diagnostico['residuos_por_celda'].round(4))
+    
+    # Con muchas filas cualquier desvío es significativo: se juzga también por su magnitud
+    normal = normalidad['dagostino']['p_valor'] >= alpha or abs(normalidad['asimetria']) < normalidad['asimetria_minima']
+    homogeneo = (homocedasticidad['brown_forsythe']['p_valor'] >= alpha
+                 or homocedasticidad['razon_desviaciones'] < homocedasticidad['razon_desviaciones_minima'])
+    if normal and homogeneo:
+        st.success("✅ Los residuos no muestran desvíos relevantes de normalidad ni de homocedasticidad")
+    else:
+        problemas = [texto for texto, cumple in [("normalidad", normal), ("homocedasticidad", homogeneo)] if not cumple]
+        st.warning(f"⚠️ Desvíos relevantes de {' y '.join(problemas)}: contrastar el efecto con la "
+                   "verificación no paramétrica")
+
+def mostrar_cuped(resultado_cuped: Dict, nombre_respuesta: str):
+    """Muestra el efecto ajustado por CUPED frente al sin ajuste y la reducción de varianza"""
+    ajustado, sin_ajuste = resultado_cuped['efecto_ajustado'], resultado_cuped['efecto_sin_ajuste']
+    nivel = f"{ajustado['nivel_confianza']:.0%}"
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(f"Efecto ajustado en {nombre_respuesta}", f"{ajustado['estimacion']:.4f}",
+                  delta=f"{ajustado['estimacion'] - sin_ajuste['estimacion']:+.4f} vs sin ajuste", delta_color="off")
+    with col2:
+        st.metric(f"IC {nivel} ajustado", f"[{ajustado['ic_inferior']:.4f}, {ajustado['ic_superior']:.4f}]")
+    with col3:
+        st.metric("Reducción de varianza", f"{resultado_cuped['reduccion_varianza']:.1%}")
+    
+    df_comparacion = pd.DataFrame({
+        'Estadística': ['Efecto', 'Error Estándar', 'IC Inferior', 'IC Superior', 'p-valor'],
+        'Sin ajuste': [f"{sin_ajuste[c]:.4f}" for c in ('estimacion', 'error_estandar', 'ic_inferior', 'ic_superior')]
+                      + [f"{sin_ajuste['p_valor']:.4g}"],
+        'CUPED': [f"{ajustado[c]:.4f}" for c in ('estimacion', 'error_estandar', 'ic_inferior', 'ic_superior')]
+                 + [f"{ajustado['p_valor']:.4g}"]
+    })
+    st.dataframe(df_comparacion, hide_index=True)
+    st.write("**Efecto por bloque:**")
+    st.dataframe(resultado_cuped['por_bloque'].round(4))
+    st.caption(f"θ = {resultado_cuped['theta']:.3f}, correlación dentro de celdas = {resultado_cuped['correlacion']:.3f}, "
+               f"{resultado_cuped['cobertura_covariable']:.1%} de los clientes con periodo previo")
+    
+    if resultado_cuped['reduccion_varianza'] > 0:
+        st.success(f"✅ Con la covariable previa se logra la misma precisión con "
+                   f"{1 / resultado_cuped['factor_muestra']:.0%} de la muestra "
+                   f"(el análisis sin ajuste necesitaría {resultado_cuped['factor_muestra']:.2f} veces más clientes)")
+    else:
+        st.info("📊 La covariable previa no reduce la varianza del efecto")
+
+def mostrar_efectos_cuantiles(resultado_cuantiles: Dict, nombre_respuesta: str):
+    """Muestra los efectos en cuantiles y medias recortadas con sus IC bootstrap"""
+    efectos = resultado_cuantiles['efectos']
+    nivel = f"{resultado_cuantiles['nivel_confianza']:.0%}"
+    df_efectos = pd.DataFrame({
+        'Estadístico': efectos.index,
+        resultado_cuantiles['nivel_control']: efectos['control'].round(4).to_numpy(),
+        resultado_cuantiles['nivel_tratamiento']: efectos['tratamiento'].round(4).to_numpy(),
+        'Efecto': efectos['estimacion'].round(4).to_numpy(),
+        f'IC {nivel}': [f"[{inferior:.4f}, {superior:.4f}]"
+                        for inferior, superior in zip(efectos['ic_inferior'], efectos['ic_superior'])],
+        'Significativo': ["✅ Sí" if inferior > 0 or superior < 0 else "❌ No"
+                          for inferior, superior in zip(efectos['ic_inferior'], efectos['ic_superior'])]
+    })
+    st.dataframe(df_efectos, hide_index=True)
+    st.write("**Efecto por bloque:**")
+    st.dataframe(resultado_cuantiles['por_bloque'].round(4))
+    st.caption(f"Diferencias {resultado_cuantiles['nivel_tratamiento']} - {resultado_cuantiles['nivel_control']} "
+               f"en {nombre_respuesta} ponderadas por tamaño de bloque; IC bootstrap de Poisson con "
+               f"{resultado_cuantiles['n_remuestras']:,} remuestras sobre sketches por celda "
+               f"(error relativo {resultado_cuantiles['error_relativo']:.0%})")
+
+def mostrar_curvas_potencia(resultado_potencia: Dict, nombre_respuesta: str):
+    """Muestra las curvas de potencia simuladas y el tamaño de muestra requerido por aumento"""
+    etiquetas = {aumento: f"{aumento:+.0%}" for aumento in resultado_potencia['potencia'].columns}
+    st.write(f"**Potencia por clientes por bloque ({resultado_potencia['n_bloques']} bloques, "
+             f"{resultado_potencia['n_replicas']:,} experimentos simulados por punto):**")
+    st.line_chart(resultado_potencia['potencia'].rename(columns=etiquetas))
     
-    n_vars = len(variables_categoricas)
-    fig, axes = plt.subplots(1, n_vars, figsize=(8*n_vars, 6))
+    objetivo = resultado_potencia['objetivo']
+    df_tamanos = pd.DataFrame({
+        f'Aumento en {nombre_respuesta}': list(etiquetas.values()),
+        f'Clientes por bloque (potencia {objetivo:.0%})': [
+            f"{n:,}" if n is not None else "fuera de la grilla" for n in resultado_potencia['tamano_requerido']],
+        'Aproximación normal': [f"{n:,}" if n is not None else "sin efecto"
+                                for n in resultado_potencia['tamano_normal']]
+    })
+    st.dataframe(df_tamanos, hide_index=True)
     
-    # Si solo hay una variable, axes no es una lista
-    if n_vars == 1:
-        axes = [axes]
+    tabla = resultado_potencia['potencia'].rename(columns=etiquetas)
+    st.dataframe(tabla.style.format('{:.1%}'))
+    parametros = resultado_potencia['parametros']
+    st.caption(f"Errores normales asimétricos con asimetría {parametros['asimetria']:.2f} "
+               f"(observada {parametros['asimetria_observada']:.2f}) y la media y desviación de cada bloque; "
+               f"α = {resultado_potencia['alpha']}, mitad de los clientes de cada bloque en cada grupo. "
+               f"Error Monte Carlo máximo: {resultado_potencia['error_mc'].to_numpy().max():.1%}")
+
+def mostrar_analisis_secuencial(historial: pd.DataFrame, estado: Dict, nombre_respuesta: str):
+    """Muestra la secuencia de confianza del efecto, el límite de la última mirada y la decisión"""
+    nivel = f"{1 - estado['alpha']:.0%}"
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(f"Mirada (n = {estado['n_observaciones']:,})", f"{estado['mirada']}")
+    with col2:
+        st.metric(f"Efecto en {nombre_respuesta}", f"{estado['estimacion']:.4f}")
+    with col3:
+        st.metric(f"Secuencia de confianza {nivel}", f"[{estado['ic_inferior']:.4f}, {estado['ic_superior']:.4f}]")
+    with col4:
+        st.metric("p-valor siempre válido", f"{estado['p_valor']:.4g}")
     
-    for i, var_cat in enumerate(variables_categoricas):
-        sns.boxplot(data=df, x=var_cat, y=variable_respuesta, ax=axes[i])
-        axes[i].set_title(f'{variable_respuesta.upper()} por {var_cat.title()}', fontweight='bold', fontsize=14)
-        axes[i].set_xlabel(var_cat.title(), fontsize=12)
-        axes[i].set_ylabel(variable_respuesta.upper(), fontsize=12)
-        axes[i].grid(True, alpha=0.3)
-        
-        # Agregar número de observaciones por grupo
-        for j, grupo in enumerate(df[var_cat].unique()):
-            n_obs = len(df[df[var_cat] == grupo])
-            axes[i].text(j, axes[i].get_ylim()[0], f'n={n_obs}', 
-                        ha='center', va='top', fontsize=10, 
-                        bbox=dict(boxstyle='round,pad=0.3', facecolor='lightblue', alpha=0.7))
+    if estado['decision'] == 'continuar':
+        st.info(f"⏳ **Continuar:** |z| = {abs(estado['z']):.2f} no alcanza el límite {estado['limite_z']:.2f} "
+                "y la secuencia de confianza incluye el cero")
+    else:
+        st.success(f"🛑 **{estado['decision'].capitalize()}** (límite cruzado en la mirada {estado['mirada_detencion']}): "
+                   "la secuencia de confianza excluye el cero")
     
-    plt.tight_layout()
-    return fig
\ No newline at end of file
+    st.write("**Secuencia de confianza por mirada:**")
+    st.line_chart(historial[['estimacion', 'ic_inferior', 'ic_superior']])
+    st.write("**Estadístico z contra el límite:**")
+    st.line_chart(historial.assign(abs_z=historial['z'].abs())[['abs_z', 'limite_z']])
+    st.dataframe(historial.round(4))
+    st.caption(f"Mezcla normal con τ = {estado['tau']} sobre el efecto en log; la cobertura vale "
+               "simultáneamente en todas las miradas, así que se puede mirar cada día sin inflar los falsos positivos")
+
+def mostrar_tarea(futuro: Future, mostrar: Callable[[Any], None], mensaje: str = "Calculando..."):
+    """Muestra el resultado de una tarea en segundo plano en cuanto termina, sin bloquear la página.
+
+    Mientras la tarea corre, solo este fragmento se vuelve a ejecutar cada
+    ``INTERVALO_TAREAS_S`` segundos; al terminar se pide un rerun para que deje de sondear.
+    """
+    pendiente = not futuro.done()
+
+    @st.fragment(run_every=INTERVALO_TAREAS_S if pendiente else None)
+    def fragmento():
+        if not futuro.done():
+            st.info(f"⏳ {mensaje}")
+            return
+        if pendiente:
+            st.rerun()
+        if futuro.cancelled():
+            st.warning("⚠️ El cálculo se canceló; vuelve a ejecutarlo")
+            return
+        error = futuro.exception()
+        if error is not None:
+            st.error(f"❌ Error en el cálculo: {type(error).__name__}: {error}")
+            return
+        mostrar(futuro.result())
+
+    fragmento()
+
+def mostrar_inferencia_no_parametrica(resultado_permutacion: Dict, resultado_bootstrap: Dict):
+    """Muestra la prueba de permutación estratificada y el IC bootstrap en Streamlit"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Diferencia estratificada", f"{resultado_permutacion['estadistico_observado']:.4f}")
+    with col2:
+        st.metric(f"p-valor ({resultado_permutacion['n_permutaciones']:,} permutaciones)",
+                  f"{resultado_permutacion['p_valor']:.4g}")
+    with col3:
+        nivel = f"{resultado_bootstrap['nivel_confianza']:.0%}"
+        st.metric(f"IC bootstrap {nivel}",
+                  f"[{resultado_bootstrap['ic_inferior']:.4f}, {resultado_bootstrap['ic_superior']:.4f}]")
+
+def mostrar_panel_rendimiento(ejecucion: Dict, clave_perfil: str = 'perfilar_siguiente'):
+    """Panel del sidebar con los tiempos por tramo de la ejecución actual y el perfil opcional"""
+    from utils.instrumentacion import exportar_json
+
+    with st.sidebar.expander("⏱️ Rendimiento", expanded=False):
+        st.metric("Tiempo total de la ejecución", f"{ejecucion['duracion_total_s']:.3f} s")
+        tramos = pd.DataFrame(ejecucion['tramos'])
+        if tramos.empty:
+            st.caption("Sin tramos registrados en esta ejecución")
+        else:
+            tramos = tramos.sort_values('inicio_s', kind='stable')
+            tramos['tramo'] = ['· ' * nivel + nombre for nivel, nombre in zip(tramos['nivel'], tramos['nombre'])]
+            st.dataframe(
+                tramos[['tramo', 'duracion_s', 'filas', 'memoria_delta_mb']].round(4),
+                hide_index=True
+            )
+        st.caption("Las tareas en segundo plano (tramos `tarea: …`) figuran solo si terminaron durante "
+                   "esta ejecución; las demás quedan en el historial del proceso.")
+        st.download_button("Exportar tramos (JSON)", exportar_json(ejecucion['tramos']),
+                           file_name="tramos_rendimiento.json", mime="application/json")
+        st.button("Perfilar la próxima ejecución (cProfile)",
+                  on_click=lambda: st.session_state.update({clave_perfil: True}))
+        if ejecucion['perfil']:
+            st.code(ejecucion['perfil'], language=None)
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Los módulos del proyecto se importan desde src (igual que las páginas y los scripts)
+for directorio in (os.path.join(RAIZ, 'src'), os.path.join(RAIZ, 'benchmarks')):
+    if directorio not in sys.path:
+        sys.path.insert(0, directorio)
+
+
+@pytest.fixture
+def datos_experimento():
+    """Experimento desbalanceado con 4 bloques, efecto de bloque y de tratamiento en log"""
+    rng = np.random.default_rng(42)
+    n = 6_000
+    bloque = rng.choice(list('ABCD'), n, p=[0.4, 0.3, 0.2, 0.1])
+    grupo = np.where(rng.random(n) < 0.35, 'Test', 'Control')
+    efecto_bloque = pd.Series({'A': 0.0, 'B': 0.3, 'C': -0.2, 'D': 0.5})[bloque].to_numpy()
+    pre = rng.lognormal(3, 0.8, n)
+    log_respuesta = 0.6 * np.log1p(pre) + efecto_bloque + 0.05 * (grupo == 'Test') + rng.normal(0, 0.7, n)
+    return pd.DataFrame({
+        'id': np.arange(n),
+        'management': pd.Categorical(bloque),
+        'group': pd.Categorical(grupo),
+        'htls': np.exp(log_respuesta),
+        'htls_log': log_respuesta,
+        'htls_pre': pre
+    })
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl_data.acumuladores import AcumuladorCovarianzas, AcumuladorMomentos, SketchCuantiles
+
+
+@pytest.fixture
+def valores():
+    rng = np.random.default_rng(0)
+    return np.concatenate([rng.lognormal(2, 1.5, 5_000), [0.0] * 20, -rng.exponential(3, 100), [np.nan] * 5])
+
+def test_momentos_combinados_coinciden_con_pandas(valores):
+    partes = [AcumuladorMomentos().actualizar(parte) for parte in np.array_split(valores, 7)]
+    acumulador = partes[0]
+    for parte in partes[1:]:
+        acumulador.combinar(parte)
+
+    serie = pd.Series(valores)
+    assert acumulador.n == serie.count()
+    assert acumulador.media == pytest.approx(serie.mean(), rel=1e-12)
+    assert acumulador.varianza == pytest.approx(serie.var(), rel=1e-10)
+    assert acumulador.asimetria == pytest.approx(serie.skew(), rel=1e-9)
+    assert acumulador.curtosis == pytest.approx(serie.kurtosis(), rel=1e-9)
+    assert acumulador.ceros == 20
+    assert acumulador.negativos == 100
+
+def test_sketch_respeta_el_error_relativo(valores):
+    sketch = SketchCuantiles(0.01)
+    for parte in np.array_split(valores, 3):
+        sketch.combinar(SketchCuantiles(0.01).actualizar(parte))
+
+    ordenados = np.sort(valores[~np.isnan(valores)])
+    cuantiles = np.linspace(0, 1, 41)
+    exactos = ordenados[np.floor(cuantiles * (len(ordenados) - 1)).astype(int)]
+    np.testing.assert_allclose(sketch.cuantiles(cuantiles), exactos, rtol=0.01 + 1e-12, atol=0)
+
+def test_sketch_cuenta_infinitos_aparte():
+    sketch = SketchCuantiles(0.01).actualizar(np.array([1.0, 2.0, np.inf, -np.inf, np.nan]))
+    assert sketch.n == 4
+    assert sketch.cuantil(0.0) == -np.inf
+    assert sketch.cuantil(1.0) == np.inf
+    assert sketch.contar_mayores(10.0) == 1
+
+def test_covarianzas_por_celda_coinciden_con_numpy():
+    rng = np.random.default_rng(1)
+    celda = rng.integers(0, 4, 3_000)
+    x = rng.normal(size=3_000)
+    y = 2 * x + rng.normal(size=3_000)
+    acumulador = AcumuladorCovarianzas(4)
+    for lote in np.array_split(np.arange(3_000), 5):
+        acumulador.actualizar(celda[lote], x[lote], y[lote])
+
+    for c in range(4):
+        en_celda = celda == c
+        covarianza = np.cov(x[en_celda], y[en_celda], ddof=0) * en_celda.sum()
+        assert acumulador.n[c] == en_celda.sum()
+        np.testing.assert_allclose([acumulador.cxx[c], acumulador.cxy[c], acumulador.cyy[c]],
+                                   [covarianza[0, 0], covarianza[0, 1], covarianza[1, 1]], rtol=1e-10)
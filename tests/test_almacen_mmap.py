@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from etl_data.almacen_mmap import ARCHIVO_VERSION, cargar_datos_mapeados, ruta_almacen
+from etl_data.eda import TIPOS_DATOS_TEST
+from etl_data.paralelo import _archivo_mapeado
+from etl_data.transformaciones import agregar_transformaciones
+
+
+def _escribir_csv(ruta, n: int, semilla: int):
+    rng = np.random.default_rng(semilla)
+    pd.DataFrame({
+        'client_id': np.arange(n),
+        'management': rng.choice(['M1', 'M2', 'M3'], n),
+        'group': rng.choice(['Test', 'Control'], n),
+        'htls': rng.lognormal(3, 1, n)
+    }).to_csv(ruta, index=False)
+
+def _versiones(directorio: str) -> list:
+    return sorted(nombre for nombre in os.listdir(directorio) if os.path.isdir(os.path.join(directorio, nombre)))
+
+def test_columnas_transformadas_son_vistas_de_solo_lectura(tmp_path):
+    ruta = str(tmp_path / 'datos.csv')
+    _escribir_csv(ruta, 500, 0)
+    df = cargar_datos_mapeados(ruta, TIPOS_DATOS_TEST, transformar=['htls'])
+    df_log, _ = agregar_transformaciones(df, ['htls'])
+
+    valores = df_log['htls_log'].to_numpy()
+    assert not valores.flags.writeable
+    assert _archivo_mapeado(valores) is not None
+    assert _archivo_mapeado(df_log['htls'].to_numpy()) is not None
+    np.testing.assert_allclose(valores, np.log(df['htls'].to_numpy()), rtol=1e-6)
+
+def test_reescritura_publica_una_version_nueva_y_conserva_la_anterior(tmp_path):
+    ruta = str(tmp_path / 'datos.csv')
+    directorio = ruta_almacen(os.path.abspath(ruta))
+    vistas = []
+    for i, n in enumerate((100, 200, 300)):
+        _escribir_csv(ruta, n, i)
+        # Cada versión nueva debe tener otra marca de tiempo que la anterior
+        os.utime(ruta, ns=(10**18 + i * 10**9, 10**18 + i * 10**9))
+        vistas.append(cargar_datos_mapeados(ruta, TIPOS_DATOS_TEST))
+        with open(os.path.join(directorio, ARCHIVO_VERSION), encoding='utf-8') as archivo:
+            assert archivo.read() == _versiones(directorio)[-1]
+
+    # Quedan la versión vigente y la anterior; los mapeos abiertos siguen siendo legibles
+    assert len(_versiones(directorio)) == 2
+    assert [len(vista) for vista in vistas] == [100, 200, 300]
+    assert vistas[0]['htls'].sum() > 0
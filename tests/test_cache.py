@@ -0,0 +1,34 @@
+import os
+
+from utils.cache import CacheResultados, version_codigo
+
+
+def _pickles(directorio: str) -> list:
+    return [nombre for _, _, nombres in os.walk(directorio) for nombre in nombres if nombre.endswith('.pkl')]
+
+def test_disco_acotado_borra_primero_los_menos_usados(tmp_path):
+    cache = CacheResultados(str(tmp_path), max_entradas=2, max_mb_disco=1)
+    bloque = b'x' * 300_000
+    for i in range(3):
+        cache.guardar(f"{i:02x}" * 20, bloque)
+        os.utime(cache._ruta(f"{i:02x}" * 20), (1_000 + i, 1_000 + i))
+    # El más viejo se vuelve a leer: pasa a ser el más reciente
+    cache.limpiar()
+    assert cache.obtener('00' * 20)[0]
+    cache.guardar('03' * 20, bloque)
+
+    assert cache.podar() == 1
+    assert sorted(_pickles(str(tmp_path))) == sorted(f"{c * 20}.pkl" for c in ('00', '02', '03'))
+
+def test_poda_borra_otras_versiones_del_codigo(tmp_path):
+    vieja = tmp_path / ('0' * len(version_codigo())) / 'ab'
+    sin_version = tmp_path / 'cd'
+    for directorio in (vieja, sin_version):
+        directorio.mkdir(parents=True)
+        (directorio / 'resultado.pkl').write_bytes(b'viejo')
+    (tmp_path / 'notas').mkdir()
+
+    cache = CacheResultados(str(tmp_path))
+    cache.guardar('ef' * 20, 42)
+    assert sorted(os.listdir(tmp_path)) == sorted([version_codigo(), 'notas'])
+    assert cache.obtener('ef' * 20) == (True, 42)
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from etl_data.cuped import TablaCovariables, efecto_cuped
+
+
+def test_efecto_ajustado_coincide_con_bucle_por_celda(datos_experimento):
+    df = datos_experimento
+    covariable = np.log1p(df['htls_pre'].to_numpy())
+    resultado = efecto_cuped(df, 'htls_log', covariable, filas_por_lote=1_000)
+
+    # Referencia: pendiente dentro de celdas combinada y diferencias por bloque con bucles
+    sxy = sxx = 0.0
+    celdas = {}
+    for (bloque, grupo), indices in df.groupby(['management', 'group'], observed=True).indices.items():
+        x, y = covariable[indices], df['htls_log'].to_numpy()[indices]
+        sxy += np.sum((x - x.mean()) * (y - y.mean()))
+        sxx += np.sum((x - x.mean()) ** 2)
+        celdas[bloque, grupo] = (len(x), x.mean(), y.mean())
+    theta = sxy / sxx
+    bloques = sorted({bloque for bloque, _ in celdas})
+    n_bloque = np.array([celdas[b, 'Control'][0] + celdas[b, 'Test'][0] for b in bloques])
+    diferencias = np.array([(celdas[b, 'Test'][2] - celdas[b, 'Control'][2])
+                            - theta * (celdas[b, 'Test'][1] - celdas[b, 'Control'][1]) for b in bloques])
+
+    assert resultado['theta'] == pytest.approx(theta, rel=1e-10)
+    assert resultado['efecto_ajustado']['estimacion'] == pytest.approx(n_bloque @ diferencias / n_bloque.sum(),
+                                                                       rel=1e-9)
+    assert resultado['reduccion_varianza'] > 0
+
+def test_tabla_covariables_une_por_id():
+    tabla = TablaCovariables(np.array([5, 3, 9, 3]), {'x': np.array([50.0, 30.0, 90.0, 31.0])})
+    np.testing.assert_array_equal(tabla.unir(np.array([3, 4, 9, 5]), 'x'), [30.0, np.nan, 90.0, 50.0])
@@ -0,0 +1,24 @@
+import pytest
+
+from etl_data.eda import TIPOS_DATOS_TEST, cargar_datos, perfilar_calidad, verificar_duplicados
+
+
+def test_perfil_coincide_con_verificar_duplicados(datos_experimento):
+    perfil = perfilar_calidad(datos_experimento, 'id', ['management', 'group'])
+    esperado = verificar_duplicados(datos_experimento, 'id')
+    for campo in ('total_filas', 'ids_unicos', 'cantidad_duplicados', 'tiene_duplicados'):
+        assert perfil['duplicados'][campo] == esperado[campo]
+
+@pytest.mark.parametrize('columna_id, categoricas', [('client_id', ['group']), ('id', ['segmento'])])
+def test_columnas_ausentes_lanzan_key_error(datos_experimento, columna_id, categoricas):
+    with pytest.raises(KeyError, match='ausentes'):
+        perfilar_calidad(datos_experimento, columna_id, categoricas)
+
+def test_carga_conserva_los_tipos_declarados(tmp_path):
+    ruta = tmp_path / 'datos.csv'
+    ruta.write_text("client_id,management,group,htls,visitas\n1,M1,Test,2.5,3\n2,M2,Control,1.5,4\n")
+    df = cargar_datos(str(ruta), TIPOS_DATOS_TEST, usar_cache=False)
+    assert df['client_id'].dtype == 'int64'
+    assert df['htls'].dtype == 'float32'
+    # Las columnas sin tipo declarado se siguen compactando
+    assert df['visitas'].dtype == 'int8'
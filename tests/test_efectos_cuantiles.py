@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from etl_data.efectos_cuantiles import _estadisticos_conteos, _estadisticos_exactos, efectos_cuantiles
+
+
+def test_estadisticos_exactos_coinciden_con_numpy_y_scipy():
+    valores = np.random.default_rng(3).lognormal(3, 1.2, 1_001)
+    resultado = _estadisticos_exactos(valores, [0.5, 0.9, 0.99], [0.0, 0.05, 0.1])
+    referencia = list(np.quantile(valores, [0.5, 0.9, 0.99])) + [valores.mean(), stats.trim_mean(valores, 0.05),
+                                                                stats.trim_mean(valores, 0.1)]
+    np.testing.assert_allclose(resultado, referencia, rtol=1e-12)
+
+def test_estadisticos_por_conteos_coinciden_con_los_valores_expandidos():
+    rng = np.random.default_rng(4)
+    representantes = np.sort(rng.normal(size=50))
+    conteos = rng.integers(0, 20, size=(30, 50)).astype(np.float64)
+    resultado = _estadisticos_conteos(representantes, conteos, [0.5, 0.9], [0.1])
+    for fila, conteos_fila in zip(resultado, conteos):
+        expandidos = np.repeat(representantes, conteos_fila.astype(int))
+        referencia = list(np.quantile(expandidos, [0.5, 0.9], method='lower')) + [stats.trim_mean(expandidos, 0.1)]
+        np.testing.assert_allclose(fila, referencia, rtol=1e-10)
+
+def test_efectos_estratificados_y_cobertura_del_ic(datos_experimento):
+    df = datos_experimento
+    resultado = efectos_cuantiles(df, 'htls', cuantiles=[0.5], recortes=[0.1], semilla=0)
+
+    ponderada = 0.0
+    for bloque, filas in df.groupby('management', observed=True):
+        diferencia = (np.median(filas.loc[filas['group'] == 'Test', 'htls'])
+                      - np.median(filas.loc[filas['group'] == 'Control', 'htls']))
+        ponderada += len(filas) / len(df) * diferencia
+    efecto = resultado['efectos'].loc['P50']
+    assert efecto['estimacion'] == pytest.approx(ponderada, rel=1e-10)
+    assert efecto['ic_inferior'] < efecto['estimacion'] < efecto['ic_superior']
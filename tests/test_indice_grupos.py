@@ -0,0 +1,26 @@
+import numpy as np
+
+from etl_data.indice_grupos import IndiceGrupos
+
+
+def test_grupos_coinciden_con_mascaras(datos_experimento):
+    df = datos_experimento
+    indice = IndiceGrupos(df, ['management', 'group'])
+    for (bloque, grupo), valores in indice.grupos('htls_log').items():
+        mascara = (df['management'] == bloque) & (df['group'] == grupo)
+        np.testing.assert_array_equal(valores, df.loc[mascara, 'htls_log'].to_numpy())
+        codigos = indice.codigos(bloque, grupo)
+        np.testing.assert_array_equal(indice.valores_grupo('htls_log', *codigos), valores)
+
+def test_estadisticas_coinciden_con_groupby(datos_experimento):
+    df = datos_experimento
+    esperado = df.groupby('management', observed=True)['htls_log'].agg(['count', 'mean', 'std', 'min', 'max'])
+    resultado = IndiceGrupos(df, ['management', 'group']).estadisticas('htls_log')
+    np.testing.assert_allclose(resultado.to_numpy(), esperado.to_numpy(), rtol=1e-12)
+
+def test_el_indice_no_retiene_columnas_reordenadas(datos_experimento):
+    indice = IndiceGrupos(datos_experimento, ['management'])
+    primera = indice.valores('htls')
+    assert indice.valores('htls') is not primera
+    assert all(not isinstance(valor, np.ndarray) or valor.dtype.kind in 'iu'
+               for valor in vars(indice).values())
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from etl_data.inferencia import bootstrap_estratificado_diferencia, prueba_permutacion_estratificada
+
+
+def _diferencia_estratificada(df):
+    total = 0.0
+    for _, filas in df.groupby('management', observed=True):
+        medias = filas.groupby('group', observed=True)['htls_log'].mean()
+        total += len(filas) / len(df) * (medias['Test'] - medias['Control'])
+    return total
+
+def test_estadistico_observado_coincide_con_groupby(datos_experimento):
+    permutacion = prueba_permutacion_estratificada(datos_experimento, 'htls_log', n_permutaciones=200, semilla=0)
+    bootstrap = bootstrap_estratificado_diferencia(datos_experimento, 'htls_log', n_remuestras=200, semilla=0)
+    referencia = _diferencia_estratificada(datos_experimento)
+    assert permutacion['estadistico_observado'] == pytest.approx(referencia, rel=1e-10)
+    assert bootstrap['estimacion'] == pytest.approx(referencia, rel=1e-10)
+
+def test_permutacion_conserva_los_tamanos_de_bloque(datos_experimento):
+    # Sin efecto (respuesta constante por bloque) toda permutación dentro de bloques da diferencia 0
+    df = datos_experimento.assign(htls_log=datos_experimento['management'].cat.codes.astype(float))
+    resultado = prueba_permutacion_estratificada(df, 'htls_log', n_permutaciones=100, semilla=0)
+    np.testing.assert_allclose(resultado['distribucion'], 0.0, atol=1e-12)
+    assert resultado['p_valor'] == 1.0
+
+def _varianza_permutacion_teorica(df, respuesta):
+    # Var(media_T - media_C) = S² · n / (n_T · n_C) bajo permutación completa dentro de cada bloque
+    total = 0.0
+    for _, filas in df.groupby('management', observed=True):
+        n = len(filas)
+        n_t = int((filas['group'] == 'Test').sum())
+        s2 = filas[respuesta].var(ddof=1)
+        total += (n / len(df)) ** 2 * s2 * n / (n_t * (n - n_t))
+    return total
+
+@pytest.mark.parametrize('fraccion', [0.1, 0.0])
+def test_permutacion_discreta_reproduce_la_varianza_teorica(datos_experimento, monkeypatch, fraccion):
+    # Con fracción 0 se fuerza el camino por claves aleatorias; con 0.1 se sortea sobre conteos
+    import etl_data.inferencia as inferencia
+    monkeypatch.setattr(inferencia, 'MAX_FRACCION_DISTINTOS', fraccion)
+    df = datos_experimento.assign(convertido=(datos_experimento['htls_log'] > datos_experimento['htls_log'].median()).astype(float))
+    resultado = prueba_permutacion_estratificada(df, 'convertido', n_permutaciones=4000, semilla=1, n_workers=1)
+    assert np.mean(resultado['distribucion']) == pytest.approx(0.0, abs=3e-3)
+    assert np.var(resultado['distribucion']) == pytest.approx(_varianza_permutacion_teorica(df, 'convertido'), rel=0.1)
+
+def test_bootstrap_discreto_por_conteos_coincide_con_claves(datos_experimento, monkeypatch):
+    import etl_data.inferencia as inferencia
+    df = datos_experimento.assign(convertido=(datos_experimento['htls_log'] > datos_experimento['htls_log'].median()).astype(float))
+    por_conteos = bootstrap_estratificado_diferencia(df, 'convertido', n_remuestras=2000, semilla=1, n_workers=1)
+    monkeypatch.setattr(inferencia, 'MAX_FRACCION_DISTINTOS', 0.0)
+    por_claves = bootstrap_estratificado_diferencia(df, 'convertido', n_remuestras=2000, semilla=1, n_workers=1)
+    assert por_conteos['estimacion'] == por_claves['estimacion']
+    assert por_conteos['error_estandar'] == pytest.approx(por_claves['error_estandar'], rel=0.1)
@@ -0,0 +1,22 @@
+from utils.instrumentacion import finalizar_ejecucion, iniciar_ejecucion, medir
+from utils.tareas import GestorTareas
+
+
+def _tarea_con_tramo():
+    with medir('paso_interno'):
+        return 42
+
+def test_tareas_en_segundo_plano_registran_en_la_ejecucion():
+    iniciar_ejecucion()
+    futuro = GestorTareas().enviar('tarea', _tarea_con_tramo)
+    assert futuro.result(timeout=10) == 42
+    tramos = {tramo['nombre']: tramo for tramo in finalizar_ejecucion()['tramos']}
+
+    assert tramos['paso_interno']['padre'] == 'tarea: _tarea_con_tramo'
+    assert tramos['tarea: _tarea_con_tramo']['hilo'].startswith('tarea-analisis')
+
+def test_sin_ejecucion_activa_la_tarea_no_registra():
+    futuro = GestorTareas().enviar('tarea', _tarea_con_tramo)
+    assert futuro.result(timeout=10) == 42
+    iniciar_ejecucion()
+    assert finalizar_ejecucion()['tramos'] == []
@@ -0,0 +1,58 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from etl_data.monitor import ARCHIVO_ESTADO, VERSION_ESTADO, MonitorExperimento
+
+
+def _lote(ids: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({
+        'client_id': ids,
+        'management': pd.Categorical(np.where(ids % 2 == 0, 'A', 'B')),
+        'group': pd.Categorical(np.where(ids % 3 == 0, 'Test', 'Control')),
+        'htls': 1.0 + ids % 7
+    })
+
+def test_estado_guardado_sobrevive_a_una_fusion_sin_guardar(tmp_path):
+    directorio = str(tmp_path / 'monitor')
+    monitor = MonitorExperimento.abrir(directorio)
+    monitor.actualizar(_lote(np.arange(0, 100)))
+
+    # Un lote del mismo tamaño fusiona los tramos; el proceso "se interrumpe" antes de guardar
+    MonitorExperimento.abrir(directorio).actualizar(_lote(np.arange(100, 200)), guardar=False)
+
+    reabierto = MonitorExperimento.abrir(directorio)
+    assert reabierto.indice_ids.contiene(np.arange(0, 100)).all()
+    ingreso = reabierto.actualizar(_lote(np.arange(50, 200)))
+    assert ingreso['filas_aceptadas'] == 100
+    assert len(reabierto.indice_ids) == 200
+
+    # Tras guardar solo quedan en disco los tramos referenciados
+    archivos = {nombre for nombre in os.listdir(directorio) if nombre.endswith('.npy')}
+    assert archivos == set(reabierto.indice_ids.tramos)
+
+def test_duplicados_del_lote_y_del_historial(tmp_path):
+    monitor = MonitorExperimento.abrir(str(tmp_path / 'monitor'))
+    assert monitor.actualizar(_lote(np.array([1, 2, 2, 3])))['filas_aceptadas'] == 3
+    assert monitor.actualizar(_lote(np.array([3, 4])))['duplicados_rechazados'] == 1
+
+def test_estado_sin_version_se_actualiza_al_abrir(tmp_path):
+    directorio = str(tmp_path / 'monitor')
+    monitor = MonitorExperimento.abrir(directorio)
+    monitor.actualizar(_lote(np.arange(0, 100)))
+
+    # Estado como lo guardaba la primera versión del monitor
+    del monitor.version_estado, monitor.secuencial, monitor.indice_ids.reemplazados
+    for acumuladores in monitor.celdas.values():
+        for _, sketch in acumuladores.values():
+            del sketch.infinitos_negativos, sketch.infinitos_positivos
+    with open(os.path.join(directorio, ARCHIVO_ESTADO), 'wb') as archivo:
+        pickle.dump(monitor, archivo)
+
+    reabierto = MonitorExperimento.abrir(directorio)
+    assert reabierto.version_estado == VERSION_ESTADO
+    reabierto.actualizar(_lote(np.arange(100, 300)))
+    assert reabierto.mirar()['n_observaciones'] == 300
+    assert reabierto.resumen()['resumen_original']['estadisticas_descriptivas']['count'] == 300
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from etl_data.potencia import curvas_potencia, simular_potencia, tamano_muestra_normal
+
+PARAMETROS = {
+    'bloques': ['A', 'B', 'C'],
+    'medias_bloque': np.array([1.0, 2.0, 3.0]),
+    'desviaciones_bloque': np.array([1.0, 1.2, 0.8]),
+    'asimetria': 0.6,
+    'asimetria_observada': 0.6
+}
+
+@pytest.mark.parametrize('n_por_bloque', [40, 2_000])
+def test_sin_efecto_la_tasa_de_rechazo_es_alpha(n_por_bloque):
+    tasa = simular_potencia(PARAMETROS, 0.0, n_por_bloque, n_replicas=8_000, semilla=1)
+    assert tasa == pytest.approx(0.05, abs=0.01)
+
+def test_aproximacion_normal_da_la_potencia_objetivo():
+    efecto = np.log1p(0.05)
+    n = tamano_muestra_normal(PARAMETROS, efecto, 0.8)
+    assert simular_potencia(PARAMETROS, efecto, n, n_replicas=8_000, semilla=2) == pytest.approx(0.8, abs=0.02)
+
+def test_aumento_cero_no_tiene_tamano_normal():
+    resultado = curvas_potencia(PARAMETROS, [0.0, 0.05], n_replicas=200, semilla=0)
+    assert resultado['tamano_normal'][0.0] is None
+    assert resultado['tamano_normal'][0.05] > 0
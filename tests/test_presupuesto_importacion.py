@@ -0,0 +1,17 @@
+import subprocess
+import sys
+
+from presupuesto_importacion import PAGINA_ANALISIS, PRESUPUESTO_MS, verificar_presupuesto
+
+
+def test_pagina_sin_modulos_pesados_y_dentro_del_presupuesto():
+    resultado = verificar_presupuesto(PAGINA_ANALISIS, PRESUPUESTO_MS, repeticiones=3)
+    assert resultado['prohibidos'] == []
+    assert resultado['fallas'] == []
+
+def test_script_termina_con_codigo_cero():
+    import presupuesto_importacion
+
+    salida = subprocess.run([sys.executable, presupuesto_importacion.__file__, '--repeticiones', '2'],
+                            capture_output=True, text=True)
+    assert salida.returncode == 0, salida.stdout
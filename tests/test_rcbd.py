@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl_data.rcbd import anova_rcbd
+
+
+def _sce(X: np.ndarray, y: np.ndarray):
+    """Suma de cuadrados del error de mínimos cuadrados fila por fila (referencia)"""
+    beta, *_ = np.linalg.lstsq(X, y, rcond=None)
+    residuos = y - X @ beta
+    return float(residuos @ residuos), beta
+
+def test_sumas_tipo_ii_coinciden_con_ols_por_filas(datos_experimento):
+    df = datos_experimento
+    resultado = anova_rcbd(df, 'htls_log')
+
+    y = df['htls_log'].to_numpy()
+    intercepto = np.ones((len(df), 1))
+    dummies_bloque = pd.get_dummies(df['management'], drop_first=True).to_numpy(dtype=float)
+    tratado = (df['group'] == 'Test').to_numpy(dtype=float)[:, None]
+    X_completo = np.hstack([intercepto, dummies_bloque, tratado])
+    sce_completo, beta = _sce(X_completo, y)
+    sce_solo_bloque, _ = _sce(np.hstack([intercepto, dummies_bloque]), y)
+    sce_solo_trat, _ = _sce(np.hstack([intercepto, tratado]), y)
+
+    tabla = resultado['tabla_anova']
+    assert tabla.loc['Tratamiento (group)', 'SC'] == pytest.approx(sce_solo_bloque - sce_completo, rel=1e-8)
+    assert tabla.loc['Bloque (management)', 'SC'] == pytest.approx(sce_solo_trat - sce_completo, rel=1e-8)
+    assert tabla.loc['Error', 'SC'] == pytest.approx(sce_completo, rel=1e-10)
+
+    gl_error = len(df) - X_completo.shape[1]
+    cm_error = sce_completo / gl_error
+    error_estandar = np.sqrt(cm_error * np.linalg.inv(X_completo.T @ X_completo)[-1, -1])
+    efecto = resultado['efecto_tratamiento']
+    assert efecto['estimacion'] == pytest.approx(beta[-1], rel=1e-8)
+    assert efecto['error_estandar'] == pytest.approx(error_estandar, rel=1e-8)
+    assert tabla.loc['Error', 'gl'] == gl_error
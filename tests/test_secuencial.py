@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from scipy import integrate, stats
+
+from etl_data.secuencial import PruebaSecuencial, log_razon_mezcla, radio_secuencia_confianza
+
+
+@pytest.mark.parametrize('estimacion, varianza, tau', [(0.0, 0.01, 0.1), (0.05, 0.0004, 0.1), (-0.2, 0.02, 0.3)])
+def test_razon_de_mezcla_coincide_con_integracion_numerica(estimacion, varianza, tau):
+    error = np.sqrt(varianza)
+    marginal, _ = integrate.quad(lambda theta: stats.norm.pdf(estimacion, theta, error) * stats.norm.pdf(theta, 0, tau),
+                                 -10 * tau, 10 * tau, points=[estimacion], limit=200)
+    referencia = np.log(marginal / stats.norm.pdf(estimacion, 0, error))
+    assert log_razon_mezcla(estimacion, varianza, tau) == pytest.approx(referencia, rel=1e-6, abs=1e-9)
+
+def test_radio_invierte_la_prueba():
+    varianza, tau, alpha = 0.0009, 0.1, 0.05
+    radio = radio_secuencia_confianza(varianza, tau, alpha)
+    assert log_razon_mezcla(radio, varianza, tau) == pytest.approx(np.log(1 / alpha), rel=1e-10)
+
+def test_falsos_positivos_acotados_con_miradas_repetidas():
+    rng = np.random.default_rng(7)
+    alpha, n_experimentos, n_miradas = 0.05, 1_000, 30
+    detenidos = 0
+    for _ in range(n_experimentos):
+        prueba = PruebaSecuencial(alpha)
+        # Efecto nulo: la estimación acumulada es un paseo aleatorio promediado
+        suma = 0.0
+        for mirada in range(1, n_miradas + 1):
+            suma += rng.normal(0, 1)
+            prueba.registrar({'estimacion': suma / mirada * 0.05, 'error_estandar': 0.05 / np.sqrt(mirada)}, mirada)
+        detenidos += prueba.detenida
+    assert detenidos / n_experimentos <= alpha
@@ -0,0 +1,18 @@
+import pytest
+from scipy import stats
+
+from etl_data.supuestos import diagnosticar_supuestos
+
+
+def test_homocedasticidad_coincide_con_scipy(datos_experimento):
+    df = datos_experimento
+    resultado = diagnosticar_supuestos(df, 'htls_log')
+
+    # Los residuos difieren de la respuesta en una constante por celda: las pruebas por celda coinciden
+    grupos = [filas['htls_log'].to_numpy() for _, filas in df.groupby(['management', 'group'], observed=True)]
+    brown_forsythe = stats.levene(*grupos, center='median')
+    levene = stats.levene(*grupos, center='mean')
+    homocedasticidad = resultado['homocedasticidad']
+    assert homocedasticidad['brown_forsythe']['estadistico'] == pytest.approx(brown_forsythe.statistic, rel=1e-9)
+    assert homocedasticidad['brown_forsythe']['p_valor'] == pytest.approx(brown_forsythe.pvalue, rel=1e-6)
+    assert homocedasticidad['levene']['estadistico'] == pytest.approx(levene.statistic, rel=1e-9)
@@ -0,0 +1,38 @@
+import pytest
+
+from utils.tareas import GestorTareas
+
+
+class _Falla:
+    def __init__(self, veces: int):
+        self.veces = veces
+
+    def __call__(self):
+        if self.veces:
+            self.veces -= 1
+            raise RuntimeError("falla transitoria")
+        return 'ok'
+
+def test_la_tarea_que_fallo_se_reintenta_en_la_ejecucion_siguiente():
+    gestor = GestorTareas()
+    tarea = _Falla(1)
+    gestor.entrar_ambito('seccion')
+    with pytest.raises(RuntimeError):
+        gestor.enviar('clave', tarea).result(timeout=10)
+
+    # La ejecución que muestra el error recibe el mismo Future
+    gestor.entrar_ambito('seccion')
+    fallida = gestor.enviar('clave', tarea)
+    assert fallida.exception() is not None
+
+    gestor.entrar_ambito('seccion')
+    reintento = gestor.enviar('clave', tarea)
+    assert reintento is not fallida
+    assert reintento.result(timeout=10) == 'ok'
+    assert gestor.enviar('clave', tarea) is reintento
+
+def test_claves_distintas_no_comparten_resultados():
+    gestor = GestorTareas()
+    gestor.entrar_ambito('seccion')
+    assert gestor.enviar(('figura', 'huella-a'), lambda: 'a').result(timeout=10) == 'a'
+    assert gestor.enviar(('figura', 'huella-b'), lambda: 'b').result(timeout=10) == 'b'